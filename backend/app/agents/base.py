@@ -1,11 +1,41 @@
+import time
 from abc import ABC, abstractmethod
 from typing import Any, Dict, List, Optional
+from app.core.config import settings
+from app.core import deadline, sdk
+from app.core.model_router import model_router
+from app.integrations.cassette import cassettes, decode_llm, encode_llm
+from app.integrations.resilience import call
 
 class BaseAgent(ABC):
-    def __init__(self, name: str, model: str = "gemini-pro"):
+    def __init__(self, name: str, task: str = "default", api_key: Optional[str] = None):
         self.name = name
-        self.model = model
+        # Routing task for this agent's calls (see TASK_TIERS); single calls may name another.
+        self.task = task
+        self.api_key = api_key
         self.memory: List[Dict[str, Any]] = []
+        self._model_instance: Any = None
+        self._clients: Dict[str, Any] = {}
+
+    @property
+    def model_instance(self) -> Any:
+        """
+        The Gemini model currently routed for this agent's task. Setting it pins
+        every call of the agent to that instance (used by tests).
+        """
+        if self._model_instance is not None:
+            return self._model_instance
+        return self._client(model_router.select(self.task))
+
+    @model_instance.setter
+    def model_instance(self, value: Any):
+        self._model_instance = value
+
+    def _client(self, model: str) -> Any:
+        # Built on first use so importing an agent does not load the SDK.
+        if model not in self._clients:
+            self._clients[model] = sdk.gemini_model(model, self.api_key)
+        return self._clients[model]
 
     @abstractmethod
     async def process(self, input_data: Any) -> Any:
@@ -14,3 +44,34 @@ class BaseAgent(ABC):
 
     def add_to_memory(self, role: str, content: str):
         self.memory.append({"role": role, "content": content})
+
+    def _generate(self, prompt: str, task: Optional[str] = None):
+        """
+        Calls the Gemini model routed for `task` (default: the agent's own)
+        through the shared outbound wrapper, reporting each attempt's latency
+        back to the router. The SDK's own retry is disabled so `call` alone
+        decides when to retry; each retry is routed afresh, so it can move to
+        a faster tier once the failed attempt marks this one unhealthy.
+        """
+        task = task or self.task
+
+        def attempt():
+            model_name = model_router.select(task)
+            model = self._model_instance if self._model_instance is not None else self._client(model_name)
+            t0 = time.monotonic()
+            ok = False
+            try:
+                response = cassettes.intercept(
+                    "gemini", task, {"model": model_name, "prompt": prompt},
+                    lambda: model.generate_content(
+                        prompt,
+                        request_options={"timeout": deadline.clamp(settings.LLM_TIMEOUT_SECONDS), "retry": None},
+                    ),
+                    encode_llm, decode_llm,
+                )
+                ok = True
+                return response
+            finally:
+                model_router.record(model_name, time.monotonic() - t0, ok)
+
+        return call("gemini", attempt)
@@ -1,28 +1,33 @@
+import asyncio
 import json
 from typing import Dict, Any, List
-import google.generativeai as genai
 from app.agents.base import BaseAgent
+from app.core import logs
 from app.models.trip import TripParameters
-from app.integrations.external import get_currency_rate, get_flight_prices
+from app.core.config import settings
+from app.integrations.external import get_flexible_date_prices, get_flight_prices
+
+log = logs.get_logger(__name__)
 
 class BudgetAgent(BaseAgent):
     def __init__(self, api_key: str):
-        super().__init__(name="Budget Agent")
-        genai.configure(api_key=api_key)
-        self.model_instance = genai.GenerativeModel('gemini-1.5-flash')
+        super().__init__(name="Budget Agent", task="budget", api_key=api_key)
 
     async def process(self, parameters: TripParameters, itinerary: List[Dict[str, Any]]) -> Dict[str, Any]:
         """
         Estimates costs and provides a budget breakdown.
         """
+        return await asyncio.to_thread(self._estimate, parameters, itinerary)
+
+    def _estimate(self, parameters: TripParameters, itinerary: List[Dict[str, Any]]) -> Dict[str, Any]:
         prompt = f"""
-        You are a travel budget expert. Estimate the REALISTIC total cost for this itinerary in {parameters.currency}.
+        You are a travel budget expert. Estimate the REALISTIC total cost for this itinerary in USD.
         
         Destination: {parameters.destination}
         Duration: {parameters.duration_days} days
         Travelers: {parameters.travelers}
         Budget Range/Quality: {parameters.preferences.budget_range}
-        User's Requested Budget Limit: {parameters.budget_total if parameters.budget_total else "No specific limit"}
+        User's Requested Budget Limit: {f"{parameters.budget_total} {parameters.currency}" if parameters.budget_total else "No specific limit"}
         
         Itinerary:
         {json.dumps(itinerary)}
@@ -58,116 +63,138 @@ class BudgetAgent(BaseAgent):
         ]
         """
         try:
-            response = self.model_instance.generate_content(prompt)
+            response = self._generate(prompt)
             text = response.text.strip()
             if text.startswith("```json"):
                 text = text[7:]
             if text.endswith("```"):
                 text = text[:-3]
             data = json.loads(text)
-            if parameters.currency and parameters.currency.upper() != "USD":
-                rate = get_currency_rate(parameters.currency)
-                if rate:
-                    def conv(x):
-                        try:
-                            return round(float(x) * rate, 2)
-                        except Exception:
-                            return x
-                    if isinstance(data.get("total_estimated_cost"), (int, float)):
-                        data["total_estimated_cost"] = conv(data["total_estimated_cost"])
-                    br = data.get("breakdown", {})
-                    for k in list(br.keys()):
-                        if isinstance(br.get(k), (int, float)):
-                            br[k] = conv(br[k])
-                    data["currency"] = parameters.currency
-            # Add flight costs if origin is provided (Main Success Path)
-            if parameters.origin:
-                flights = get_flight_prices(parameters.origin, parameters.destination)
-                if flights:
-                    cheapest_flight = flights[0]
-                    flight_cost = cheapest_flight["price"] * parameters.travelers
-                    
-                    # Ensure total_estimated_cost exists and is a number
-                    current_total = data.get("total_estimated_cost", 0)
-                    if not isinstance(current_total, (int, float)):
-                        current_total = 0
-                        
-                    data["total_estimated_cost"] = current_total + flight_cost
-                    
-                    # Ensure breakdown exists
-                    if "breakdown" not in data or not isinstance(data["breakdown"], dict):
-                        data["breakdown"] = {}
-                        
-                    data["breakdown"]["flights"] = flight_cost
-                    data["flight_options"] = flights[:3]
-
+            self._add_flights(parameters, data)
             return data
         except Exception as e:
-            print(f"BudgetAgent failed: {e}")
-            # Realistic fallback estimation
-            
-            # Base daily costs by destination and quality (very rough estimates)
-            daily_base = {
-                "Low Budget": 30,
-                "Budget Friendly": 50,
-                "Budget": 50,
-                "Moderate": 120,
-                "Luxury": 300,
-                "Ultra Luxury": 600
-            }
-            
-            daily_cost = daily_base.get(parameters.preferences.budget_range, 100)
-            estimated_cost = daily_cost * parameters.duration_days * parameters.travelers
-            
-            breakdown = {
-                "accommodation": estimated_cost * 0.4,
-                "food": estimated_cost * 0.3,
-                "activities": estimated_cost * 0.15,
-                "transport": estimated_cost * 0.15
-            }
+            log.warning("budget.failed", error=str(e))
+            return self.fallback(parameters)
+
+    def fallback(self, parameters: TripParameters) -> Dict[str, Any]:
+        """
+        Heuristic per-day estimate used when the LLM is unavailable or out of time.
+        """
+        # Realistic fallback estimation
+        
+        # Base daily costs by destination and quality (very rough estimates)
+        daily_base = {
+            "Low Budget": 30,
+            "Budget Friendly": 50,
+            "Budget": 50,
+            "Moderate": 120,
+            "Luxury": 300,
+            "Ultra Luxury": 600
+        }
+        
+        daily_cost = daily_base.get(parameters.preferences.budget_range, 100)
+        estimated_cost = daily_cost * parameters.duration_days * parameters.travelers
+        
+        breakdown = {
+            "accommodation": estimated_cost * 0.4,
+            "food": estimated_cost * 0.3,
+            "activities": estimated_cost * 0.15,
+            "transport": estimated_cost * 0.15
+        }
+        
+        result = {
+            "total_estimated_cost": estimated_cost,
+            "breakdown": breakdown,
+            "suggestions": ["Book accommodations in advance", "Use public transportation", "Look for combo tickets"]
+        }
+        
+        # Generate alternative scenarios if significantly over budget
+        if parameters.budget_total and estimated_cost > parameters.budget_total * 1.5:
+            # Calculate how many days fit the budget at current quality
+            days_for_budget = max(1, int(parameters.budget_total / (daily_cost * parameters.travelers)))
             
-            result = {
-                "total_estimated_cost": estimated_cost,
-                "breakdown": breakdown,
-                "suggestions": ["Book accommodations in advance", "Use public transportation", "Look for combo tickets"]
-            }
+            # Calculate budget-friendly option for full duration
+            budget_friendly_daily = daily_base.get("Budget Friendly", 50)
+            budget_friendly_cost = budget_friendly_daily * parameters.duration_days * parameters.travelers
             
-            # Generate alternative scenarios if significantly over budget
-            if parameters.budget_total and estimated_cost > parameters.budget_total * 1.5:
-                # Calculate how many days fit the budget at current quality
-                days_for_budget = max(1, int(parameters.budget_total / (daily_cost * parameters.travelers)))
-                
-                # Calculate budget-friendly option for full duration
-                budget_friendly_daily = daily_base.get("Budget Friendly", 50)
-                budget_friendly_cost = budget_friendly_daily * parameters.duration_days * parameters.travelers
-                
-                result["alternative_scenarios"] = [
-                    {
-                        "title": f"Reduce to {days_for_budget} Days",
-                        "description": f"Keep {parameters.preferences.budget_range} quality, shorter trip",
-                        "new_duration_days": days_for_budget,
-                        "new_budget_range": parameters.preferences.budget_range,
-                        "estimated_cost": days_for_budget * daily_cost * parameters.travelers
-                    },
-                    {
-                        "title": "Switch to Budget-Friendly",
-                        "description": f"Keep {parameters.duration_days} days, lower quality",
-                        "new_duration_days": parameters.duration_days,
-                        "new_budget_range": "Budget Friendly",
-                        "estimated_cost": budget_friendly_cost
-                    }
-                ]
+            result["alternative_scenarios"] = [
+                {
+                    "title": f"Reduce to {days_for_budget} Days",
+                    "description": f"Keep {parameters.preferences.budget_range} quality, shorter trip",
+                    "new_duration_days": days_for_budget,
+                    "new_budget_range": parameters.preferences.budget_range,
+                    "estimated_cost": days_for_budget * daily_cost * parameters.travelers
+                },
+                {
+                    "title": "Switch to Budget-Friendly",
+                    "description": f"Keep {parameters.duration_days} days, lower quality",
+                    "new_duration_days": parameters.duration_days,
+                    "new_budget_range": "Budget Friendly",
+                    "estimated_cost": budget_friendly_cost
+                }
+            ]
 
-            # Add flight costs if origin is provided (Fallback Path)
-            if parameters.origin:
-                flights = get_flight_prices(parameters.origin, parameters.destination)
-                if flights:
-                    # Assume the user picks the cheapest option for the estimate
-                    cheapest_flight = flights[0]
-                    flight_cost = cheapest_flight["price"] * parameters.travelers
-                    
-                    result["total_estimated_cost"] += flight_cost
-                    result["breakdown"]["flights"] = flight_cost
-                    result["flight_options"] = flights[:3] # Return top 3 options
-            
-            return result
+        self._add_flights(parameters, result)
+        return result
+
+    def rescale(self, budget_info: Dict[str, Any], old: TripParameters, new: TripParameters) -> Dict[str, Any]:
+        """
+        Adjusts an existing USD estimate to a new duration, party size, origin or
+        date without asking the LLM again: per-person, per-day costs are scaled
+        and flights are quoted afresh.
+        """
+        data = json.loads(json.dumps(budget_info))
+        breakdown = data.get("breakdown") if isinstance(data.get("breakdown"), dict) else {}
+        total = data.get("total_estimated_cost", 0)
+        if not isinstance(total, (int, float)):
+            total = 0
+        flights = breakdown.pop("flights", 0)
+        if isinstance(flights, (int, float)):
+            total -= flights
+        factor = (new.duration_days / max(old.duration_days, 1)) * (new.travelers / max(old.travelers, 1))
+        for key, value in breakdown.items():
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                breakdown[key] = round(value * factor, 2)
+        data["breakdown"] = breakdown
+        data["total_estimated_cost"] = round(total * factor, 2)
+        # Scenarios and fares were priced for the old parameters.
+        for key in ("alternative_scenarios", "flight_options", "flexible_dates", "flexible_dates_suggestion", "currency"):
+            data.pop(key, None)
+        self._add_flights(new, data)
+        return data
+
+    def _add_flights(self, parameters: TripParameters, data: Dict[str, Any]):
+        """
+        Adds the cheapest flight for the requested date to the estimate, plus
+        a +/- FLEXIBLE_DATES_WINDOW_DAYS price comparison when a start date is known.
+        The date-shift hint lives in its own field so rescale can drop it with the fares.
+        """
+        if not parameters.origin:
+            return
+        flights = get_flight_prices(parameters.origin, parameters.destination, parameters.start_date)
+        if not flights:
+            return
+        # Assume the user picks the cheapest option for the estimate
+        flight_cost = flights[0]["price"] * parameters.travelers
+
+        # Ensure total_estimated_cost exists and is a number
+        current_total = data.get("total_estimated_cost", 0)
+        if not isinstance(current_total, (int, float)):
+            current_total = 0
+        data["total_estimated_cost"] = current_total + flight_cost
+
+        # Ensure breakdown exists
+        if "breakdown" not in data or not isinstance(data["breakdown"], dict):
+            data["breakdown"] = {}
+        data["breakdown"]["flights"] = flight_cost
+        data["flight_options"] = flights[:3] # Return top 3 options
+
+        if parameters.start_date:
+            window = get_flexible_date_prices(parameters.origin, parameters.destination, parameters.start_date, settings.FLEXIBLE_DATES_WINDOW_DAYS)
+            if window:
+                data["flexible_dates"] = window
+                best = min(window, key=lambda d: d["cheapest_price"])
+                if best["cheapest_price"] < flights[0]["price"]:
+                    data["flexible_dates_suggestion"] = (
+                        f"Flights are cheapest around {best['date']}; shifting your dates could lower the flight cost"
+                    )
@@ -1,22 +1,32 @@
+import asyncio
 import json
 import re
 from typing import Any, List
-import google.generativeai as genai
 from app.agents.base import BaseAgent
+from app.core import logs
 from app.models.trip import TripParameters, TripPreferences
 from app.core.config import settings
 from app.integrations.external import search_places_text
 
+log = logs.get_logger(__name__)
+
 class DreamInterpreterAgent(BaseAgent):
     def __init__(self, api_key: str):
-        super().__init__(name="Dream Interpreter")
-        genai.configure(api_key=api_key)
-        self.model_instance = genai.GenerativeModel('gemini-pro')
+        super().__init__(name="Dream Interpreter", task="interpret", api_key=api_key)
 
     async def process(self, input_data: str) -> TripParameters:
         """
         Parses natural language input into structured trip parameters.
         """
+        return await asyncio.to_thread(self._interpret, input_data)
+
+    def fallback(self, input_data: str) -> TripParameters:
+        """
+        Heuristic-only interpretation for when there is no time left for the LLM.
+        """
+        return self._normalize(input_data, self._fallback_process(input_data))
+
+    def _interpret(self, input_data: str) -> TripParameters:
         prompt = f"""
         You are a Dream Interpreter Agent for a travel application.
         Your goal is to extract structured travel parameters from the user's natural language description.
@@ -44,7 +54,7 @@ class DreamInterpreterAgent(BaseAgent):
         """
         
         try:
-            response = self.model_instance.generate_content(prompt)
+            response = self._generate(prompt)
             
             # Clean up response if it contains markdown code blocks
             text = response.text.strip()
@@ -78,10 +88,8 @@ class DreamInterpreterAgent(BaseAgent):
             return self._normalize(input_data, tp)
             
         except Exception as e:
-            print(f"Error in DreamInterpreterAgent: {e}")
-            print("Falling back to heuristic parsing.")
-            tp = self._fallback_process(input_data)
-            return self._normalize(input_data, tp)
+            log.warning("interpret.failed", error=str(e), fallback="heuristic")
+            return self.fallback(input_data)
 
     def _fallback_process(self, input_data: str) -> TripParameters:
         """
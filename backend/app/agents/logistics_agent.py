@@ -1,31 +1,153 @@
+import asyncio
 import json
-from typing import List, Dict, Any
-import google.generativeai as genai
+from typing import List, Dict, Any, Optional
 from app.agents.base import BaseAgent
+from app.core import logs
+from app.core.config import settings
 from app.models.trip import TripParameters
 from app.integrations.external import search_places_text, route_duration_seconds
 
+log = logs.get_logger(__name__)
+
+SLOTS = ["morning", "afternoon", "evening"]
+
 class LogisticsAgent(BaseAgent):
     def __init__(self, api_key: str):
-        super().__init__(name="Logistics Agent")
-        genai.configure(api_key=api_key)
-        self.model_instance = genai.GenerativeModel('gemini-1.5-flash')
+        super().__init__(name="Logistics Agent", task="itinerary", api_key=api_key)
 
     async def process(self, parameters: TripParameters, research_findings: Dict[str, Any]) -> List[Dict[str, Any]]:
         """
         Creates a day-by-day itinerary based on research findings.
+        Trips longer than ITINERARY_CHUNK_DAYS are generated as concurrent day-range chunks.
+        """
+        if parameters.duration_days <= settings.ITINERARY_CHUNK_DAYS:
+            return await asyncio.to_thread(self._plan, parameters, research_findings)
+        return await self._plan_chunked(parameters, research_findings)
+
+    def fallback(self, parameters: TripParameters) -> List[Dict[str, Any]]:
+        """
+        Generic itinerary used when the LLM is unavailable or out of time.
+        """
+        return [self._fallback_day(parameters, i) for i in range(1, parameters.duration_days + 1)]
+
+    def _fallback_day(self, parameters: TripParameters, day_number: int) -> Dict[str, Any]:
+        return {
+            "day_number": day_number,
+            "morning": {"activity": f"Explore {parameters.destination}", "description": "Visit local landmarks.", "location": "City Center"},
+            "afternoon": {"activity": "Local Culture", "description": "Immerse in the local atmosphere.", "location": "Old Town"},
+            "evening": {"activity": "Dinner & Relax", "description": "Enjoy local cuisine.", "location": "Restaurant District"}
+        }
+
+    def _plan(self, parameters: TripParameters, research_findings: Dict[str, Any]) -> List[Dict[str, Any]]:
+        try:
+            return self._plan_days(parameters, research_findings, 1, parameters.duration_days)
+        except Exception as e:
+            log.warning("logistics.failed", error=str(e))
+            return self.fallback(parameters)
+
+    async def extend(self, parameters: TripParameters, research_findings: Dict[str, Any],
+                     existing: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Generates only the days after `existing` (e.g. when a trip is lengthened),
+        telling the model what the kept days already cover so nothing repeats.
         """
+        covered = {d["day_number"]: {"day_number": d["day_number"], "highlights": self._highlights(d)} for d in existing}
+        days = await self._generate_ranges(parameters, research_findings, len(existing) + 1, parameters.duration_days, covered)
+        days.update({d["day_number"]: d for d in existing})
+        return self._merge(parameters, days, {})
+
+    async def _plan_chunked(self, parameters: TripParameters, research_findings: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """
+        Asks for a compact outline of the whole trip first, then expands day ranges
+        in parallel. Each chunk is told which highlights belong to other days so
+        chunks generated concurrently do not repeat each other.
+        """
+        outline = await asyncio.to_thread(self._outline, parameters, research_findings)
+        days = await self._generate_ranges(parameters, research_findings, 1, parameters.duration_days, outline)
+        if not days:
+            return self.fallback(parameters)
+        return self._merge(parameters, days, outline)
+
+    async def _generate_ranges(self, parameters: TripParameters, research_findings: Dict[str, Any], first: int, last: int,
+                               outline: Dict[int, Dict[str, Any]]) -> Dict[int, Dict[str, Any]]:
+        size = settings.ITINERARY_CHUNK_DAYS
+        ranges = [(start, min(start + size - 1, last)) for start in range(first, last + 1, size)]
+        limit = asyncio.Semaphore(settings.ITINERARY_MAX_CONCURRENT_CHUNKS)
+
+        async def run(start: int, end: int) -> List[Dict[str, Any]]:
+            async with limit:
+                return await asyncio.to_thread(self._plan_days, parameters, research_findings, start, end, outline)
+
+        results = await asyncio.gather(*(run(s, e) for s, e in ranges), return_exceptions=True)
+        days: Dict[int, Dict[str, Any]] = {}
+        for (start, end), result in zip(ranges, results):
+            if isinstance(result, BaseException):
+                log.warning("logistics.chunk_failed", first_day=start, last_day=end, error=str(result))
+                continue
+            days.update({d["day_number"]: d for d in result})
+        return days
+
+    def _highlights(self, day: Dict[str, Any]) -> List[str]:
+        return [day[slot]["activity"] for slot in SLOTS if isinstance(day.get(slot), dict) and day[slot].get("activity")]
+
+    def _outline(self, parameters: TripParameters, research_findings: Dict[str, Any]) -> Dict[int, Dict[str, Any]]:
         prompt = f"""
-        Create a logical day-by-day itinerary for a {parameters.duration_days}-day trip to {parameters.destination}.
-        
+        Outline a {parameters.duration_days}-day trip to {parameters.destination}.
+
         Research Findings:
         {json.dumps(research_findings)}
-        
+
         Constraints:
         - Travel Style: {parameters.preferences.travel_style}
         - Interests: {', '.join(parameters.preferences.interests)}
         - Budget Range: {parameters.preferences.budget_range}
-        
+
+        For each day give a short theme, the neighbourhood or area to base the day in,
+        and up to 3 named highlights. Never use the same highlight on two days.
+
+        Return a JSON list where each item has 'day_number', 'theme', 'area', 'highlights' (list of strings).
+        Keep every string short.
+        """
+        try:
+            response = self._generate(prompt, task="itinerary_outline")
+            outline = self._parse_json(response.text)
+            return {int(d["day_number"]): d for d in outline if isinstance(d, dict) and "day_number" in d}
+        except Exception as e:
+            log.warning("logistics.outline_failed", error=str(e))
+            return {}
+
+    def _plan_days(self, parameters: TripParameters, research_findings: Dict[str, Any], start: int, end: int,
+                   outline: Optional[Dict[int, Dict[str, Any]]] = None) -> List[Dict[str, Any]]:
+        if start == 1 and end == parameters.duration_days:
+            scope = f"Create a logical day-by-day itinerary for a {parameters.duration_days}-day trip to {parameters.destination}."
+        else:
+            scope = (f"Create a logical day-by-day itinerary for days {start} to {end} "
+                     f"of a {parameters.duration_days}-day trip to {parameters.destination}.")
+        chunk_notes = ""
+        if outline:
+            own = [outline[d] for d in range(start, end + 1) if d in outline]
+            covered = [h for d, o in outline.items() if not start <= d <= end for h in o.get("highlights", [])]
+            if own:
+                chunk_notes += f"""
+        Trip Outline For These Days (follow it):
+        {json.dumps(own)}
+        """
+            if covered:
+                chunk_notes += f"""
+        Already Covered On Other Days (do NOT include these):
+        {json.dumps(covered)}
+        """
+        prompt = f"""
+        {scope}
+
+        Research Findings:
+        {json.dumps(research_findings)}
+        {chunk_notes}
+        Constraints:
+        - Travel Style: {parameters.preferences.travel_style}
+        - Interests: {', '.join(parameters.preferences.interests)}
+        - Budget Range: {parameters.preferences.budget_range}
+
         IMPORTANT INSTRUCTIONS:
         - Generate a REALISTIC itinerary appropriate for {parameters.destination}.
         - The "Budget Range" indicates the QUALITY LEVEL of experiences, NOT a strict dollar limit:
@@ -34,50 +156,70 @@ class LogisticsAgent(BaseAgent):
             - "Luxury": Premium experiences (upscale hotels, fine dining, private tours, exclusive activities)
         - Activities should reflect what tourists ACTUALLY do in {parameters.destination} at this quality level.
         - Be honest about what's realistic - don't force impossibly cheap "luxury" or unrealistic "free" alternatives.
-        
+
         Return a JSON list where each item represents a day (day_number, activities, morning, afternoon, evening).
+        Number days from {start} to {end}.
         Each time slot (morning, afternoon, evening) should have 'activity', 'description', 'location'.
         """
-        try:
-            response = self.model_instance.generate_content(prompt)
-            text = response.text.strip()
-            if text.startswith("```json"):
-                text = text[7:]
-            if text.endswith("```"):
-                text = text[:-3]
-            plan = json.loads(text)
-            for day in plan:
-                coords = []
-                for slot in ["morning", "afternoon", "evening"]:
-                    s = day.get(slot, {})
-                    name = s.get("location") or s.get("activity")
-                    if name:
-                        res = search_places_text(f"{name} in {parameters.destination}")
-                        if res:
-                            s["lat"] = res[0].get("lat")
-                            s["lng"] = res[0].get("lng")
-                            coords.append((s.get("lat"), s.get("lng")))
-                times = []
-                if len(coords) >= 2:
-                    for i in range(len(coords)-1):
-                        a = coords[i]
-                        b = coords[i+1]
-                        if a[0] and a[1] and b[0] and b[1]:
-                            dur = route_duration_seconds(a, b)
-                            if dur is not None:
-                                times.append(dur)
-                if times:
-                    day["travel_times_seconds"] = times
-            return plan
-        except Exception as e:
-            print(f"LogisticsAgent failed: {e}")
-            # Fallback itinerary
-            itinerary = []
-            for i in range(1, parameters.duration_days + 1):
-                itinerary.append({
-                    "day_number": i,
-                    "morning": {"activity": f"Explore {parameters.destination}", "description": "Visit local landmarks.", "location": "City Center"},
-                    "afternoon": {"activity": "Local Culture", "description": "Immerse in the local atmosphere.", "location": "Old Town"},
-                    "evening": {"activity": "Dinner & Relax", "description": "Enjoy local cuisine.", "location": "Restaurant District"}
-                })
-            return itinerary
+        response = self._generate(prompt)
+        plan = self._parse_json(response.text)
+        days = []
+        for offset, day in enumerate(d for d in plan if isinstance(d, dict)):
+            day_number = start + offset
+            if day_number > end:
+                break
+            day["day_number"] = day_number
+            self._add_locations(parameters, day)
+            days.append(day)
+        return days
+
+    def _merge(self, parameters: TripParameters, days: Dict[int, Dict[str, Any]],
+               outline: Dict[int, Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Validates merged chunks: every day 1..N present with all three slots,
+        falling back day by day rather than discarding the whole itinerary.
+        """
+        merged = []
+        for n in range(1, parameters.duration_days + 1):
+            day = days.get(n)
+            fallback = self._fallback_day(parameters, n)
+            if day is None:
+                day = fallback
+            for slot in SLOTS:
+                if not isinstance(day.get(slot), dict):
+                    day[slot] = fallback[slot]
+            if n in outline and outline[n].get("theme"):
+                day.setdefault("theme", outline[n]["theme"])
+            merged.append(day)
+        return merged
+
+    def _add_locations(self, parameters: TripParameters, day: Dict[str, Any]):
+        coords = []
+        for slot in SLOTS:
+            s = day.get(slot, {})
+            name = s.get("location") or s.get("activity")
+            if name:
+                res = search_places_text(f"{name} in {parameters.destination}")
+                if res:
+                    s["lat"] = res[0].get("lat")
+                    s["lng"] = res[0].get("lng")
+                    coords.append((s.get("lat"), s.get("lng")))
+        times = []
+        if len(coords) >= 2:
+            for i in range(len(coords)-1):
+                a = coords[i]
+                b = coords[i+1]
+                if a[0] and a[1] and b[0] and b[1]:
+                    dur = route_duration_seconds(a, b)
+                    if dur is not None:
+                        times.append(dur)
+        if times:
+            day["travel_times_seconds"] = times
+
+    def _parse_json(self, text: str) -> Any:
+        text = text.strip()
+        if text.startswith("```json"):
+            text = text[7:]
+        if text.endswith("```"):
+            text = text[:-3]
+        return json.loads(text)
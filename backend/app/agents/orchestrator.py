@@ -0,0 +1,215 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, List, Tuple, TypeVar
+from app.agents.dream_interpreter import DreamInterpreterAgent
+from app.agents.prefetch import research_prefetch
+from app.agents.research_agent import ResearchAgent
+from app.agents.logistics_agent import LogisticsAgent
+from app.agents.budget_agent import BudgetAgent
+from app.core import admission, deadline, logs, metrics
+from app.core.config import settings
+from app.core.deadline import Deadline
+from app.integrations.currency import convert_plan
+from app.integrations.weather import align_to_itinerary, get_trip_weather
+from app.models.trip import PlanRefinement, TripParameters, TripPlan
+
+log = logs.get_logger(__name__)
+
+T = TypeVar("T")
+
+# Preference fields; changing any of them invalidates every day of the itinerary.
+PREFERENCE_KEYS = {"interests", "travel_style", "budget_range", "dietary_restrictions"}
+
+
+async def run_stage(
+    name: str,
+    request_deadline: Deadline,
+    work: Callable[[], Awaitable[T]],
+    fallback: Callable[[], T],
+    degraded: List[str],
+) -> T:
+    """
+    Runs one pipeline stage within its share of the remaining request time.
+    On timeout or error the stage is cancelled and `fallback()` is returned
+    instead, and the stage name is appended to `degraded`. Stages shed by
+    admission control go straight to `fallback()`. Fallbacks run in a worker
+    thread: some still do blocking lookups (the heuristic interpreter validates
+    places), which must not stall the event loop under load.
+    """
+    if admission.should_shed(name):
+        metrics.incr("stage_degraded", stage=name, reason="load")
+        degraded.append(name)
+        return await asyncio.to_thread(fallback)
+    budget = request_deadline.share(settings.STAGE_TIME_SHARES.get(name, 1.0))
+
+    async def _scoped() -> T:
+        # Set inside the task so the stage deadline does not leak to later stages.
+        with deadline.scope(request_deadline.child(budget)):
+            return await work()
+
+    try:
+        if budget <= 0:
+            raise asyncio.TimeoutError()
+        return await asyncio.wait_for(_scoped(), timeout=budget)
+    except asyncio.CancelledError:
+        # The whole request was abandoned; there is no one to fall back for.
+        metrics.incr("stage_cancelled", stage=name)
+        raise
+    except asyncio.TimeoutError:
+        log.warning("stage.timed_out", stage=name, budget_s=round(budget, 2))
+        metrics.incr("stage_degraded", stage=name, reason="deadline")
+    except Exception as e:
+        log.warning("stage.failed", stage=name, error=str(e))
+        metrics.incr("stage_degraded", stage=name, reason="error")
+    degraded.append(name)
+    return await asyncio.to_thread(fallback)
+
+
+async def interpret_request(description: str, request_deadline: Deadline) -> TripParameters:
+    """
+    Turns a free-text trip description into parameters within the request
+    deadline, using the heuristic interpreter if the LLM cannot answer in time.
+    """
+    dream_agent = DreamInterpreterAgent(api_key=settings.GOOGLE_API_KEY)
+    degraded: List[str] = []
+    with deadline.scope(request_deadline):
+        params = await run_stage(
+            "interpret", request_deadline,
+            lambda: dream_agent.process(description),
+            lambda: dream_agent.fallback(description),
+            degraded,
+        )
+    # Appended in place rather than through a set: warning order feeds the plan's content hash.
+    if degraded and "interpret_degraded" not in params.validation_warnings:
+        params.validation_warnings.append("interpret_degraded")
+    return params
+
+
+class TripOrchestrator:
+    """
+    Runs research -> logistics -> budget for one request under a shared deadline.
+    """
+
+    def __init__(self):
+        self.research_agent = ResearchAgent(api_key=settings.GOOGLE_API_KEY, google_api_key=settings.GOOGLE_API_KEY, google_cse_id=settings.GOOGLE_CSE_ID)
+        self.logistics_agent = LogisticsAgent(api_key=settings.GOOGLE_API_KEY)
+        self.budget_agent = BudgetAgent(api_key=settings.GOOGLE_API_KEY)
+
+    async def generate(self, params: TripParameters, request_deadline: Deadline) -> TripPlan:
+        degraded: List[str] = []
+        with deadline.scope(request_deadline):
+            findings = await run_stage(
+                "research", request_deadline,
+                lambda: self._research(params),
+                lambda: self.research_agent.fallback(params),
+                degraded,
+            )
+            itinerary = await run_stage(
+                "logistics", request_deadline,
+                lambda: self.logistics_agent.process(params, findings),
+                lambda: self.logistics_agent.fallback(params),
+                degraded,
+            )
+            budget_info = await run_stage(
+                "budget", request_deadline,
+                lambda: self.budget_agent.process(params, itinerary),
+                lambda: self.budget_agent.fallback(params),
+                degraded,
+            )
+
+            plan = TripPlan(
+                parameters=params,
+                itinerary=align_to_itinerary(itinerary, findings.get("weather")),
+                budget_info=budget_info,
+                research_info=findings,
+                status="generated",
+                degraded_stages=degraded,
+            )
+            # Agents work in USD; convert every amount once, at the end.
+            return await asyncio.to_thread(convert_plan, plan, params.currency)
+
+    async def _research(self, params: TripParameters) -> Dict[str, Any]:
+        # Reuse a prefetch started by /interpret instead of racing it.
+        await research_prefetch.join(params)
+        return await self.research_agent.process(params)
+
+    async def refine(self, plan: TripPlan, changes: PlanRefinement, request_deadline: Deadline) -> Tuple[TripPlan, List[str]]:
+        """
+        Applies a parameter delta to a stored plan, regenerating only what the
+        delta affects. Research findings, geocoded days and the budget estimate are
+        reused where still valid. Returns the new plan and the parts regenerated.
+        """
+        old = plan.parameters
+        delta = {k: v for k, v in changes.model_dump(exclude_unset=True, exclude_none=True).items()
+                 if v != (getattr(old.preferences, k) if k in PREFERENCE_KEYS else getattr(old, k))}
+        params = old.model_copy(deep=True, update={k: v for k, v in delta.items() if k not in PREFERENCE_KEYS})
+        params.preferences = old.preferences.model_copy(update={k: v for k, v in delta.items() if k in PREFERENCE_KEYS})
+
+        # The stored amounts are in the plan's own currency, which stays USD when
+        # conversion was unavailable at generate time.
+        source = (plan.budget_info or {}).get("currency") or old.currency
+        base = await asyncio.to_thread(convert_plan, plan.model_copy(deep=True), "USD", source)
+        findings = dict(base.research_info or {})
+        itinerary = [dict(d) for d in base.itinerary]
+        budget_info = base.budget_info
+        regenerated: List[str] = []
+        degraded: List[str] = []
+
+        with deadline.scope(request_deadline):
+            if "interests" in delta:
+                kept_places = findings.get("top_places", [])
+                findings["top_places"] = await run_stage(
+                    "research", request_deadline,
+                    lambda: asyncio.to_thread(self.research_agent.find_top_places, params),
+                    lambda: kept_places,
+                    degraded,
+                )
+                regenerated.append("top_places")
+
+            if PREFERENCE_KEYS & delta.keys():
+                itinerary = await run_stage(
+                    "logistics", request_deadline,
+                    lambda: self.logistics_agent.process(params, findings),
+                    lambda: self.logistics_agent.fallback(params),
+                    degraded,
+                )
+                regenerated.append("itinerary")
+            elif params.duration_days > len(itinerary):
+                kept = itinerary
+                itinerary = await run_stage(
+                    "logistics", request_deadline,
+                    lambda: self.logistics_agent.extend(params, findings, kept),
+                    lambda: kept + self.logistics_agent.fallback(params)[len(kept):],
+                    degraded,
+                )
+                regenerated.append(f"itinerary_days:{len(kept) + 1}-{params.duration_days}")
+            elif params.duration_days < len(itinerary):
+                itinerary = itinerary[:params.duration_days]
+
+            if {"start_date", "duration_days"} & delta.keys():
+                findings["weather"] = await asyncio.to_thread(
+                    get_trip_weather, params.destination, params.start_date, params.duration_days
+                )
+                regenerated.append("weather")
+
+            if "itinerary" in regenerated or {"budget_range", "budget_total"} & delta.keys() or not budget_info:
+                budget_info = await run_stage(
+                    "budget", request_deadline,
+                    lambda: self.budget_agent.process(params, itinerary),
+                    lambda: self.budget_agent.fallback(params),
+                    degraded,
+                )
+                regenerated.append("budget")
+            elif {"duration_days", "travelers", "origin", "start_date"} & delta.keys():
+                budget_info = await asyncio.to_thread(self.budget_agent.rescale, budget_info, old, params)
+                regenerated.append("budget_rescaled")
+
+        refined = TripPlan(
+            parameters=params,
+            itinerary=align_to_itinerary(itinerary, findings.get("weather")),
+            budget_info=budget_info,
+            research_info=findings,
+            status=plan.status,
+            degraded_stages=sorted(set(plan.degraded_stages) | set(degraded)),
+        )
+        refined = await asyncio.to_thread(convert_plan, refined, params.currency)
+        return refined, regenerated
@@ -0,0 +1,69 @@
+import asyncio
+import threading
+from typing import Dict, Optional
+from app.agents.research_agent import ResearchAgent
+from app.core import deadline, logs, metrics
+from app.core.cache import cache
+from app.core.config import settings
+from app.core.deadline import Deadline
+from app.models.trip import TripParameters
+
+log = logs.get_logger(__name__)
+
+
+class ResearchPrefetcher:
+    """
+    Runs research for freshly interpreted parameters while the user is still on
+    the clarification screen, filling the shared cache under the key /generate
+    looks up. It is low priority: at most PREFETCH_MAX_CONCURRENT run at once per
+    worker and anything beyond that is dropped rather than queued.
+    """
+
+    def __init__(self):
+        self._agent: Optional[ResearchAgent] = None
+        self._inflight: Dict[str, "asyncio.Future"] = {}
+        self._slots = threading.BoundedSemaphore(max(settings.PREFETCH_MAX_CONCURRENT, 1))
+
+    @property
+    def agent(self) -> ResearchAgent:
+        if self._agent is None:
+            self._agent = ResearchAgent(api_key=settings.GOOGLE_API_KEY, google_api_key=settings.GOOGLE_API_KEY, google_cse_id=settings.GOOGLE_CSE_ID)
+        return self._agent
+
+    async def run(self, params: TripParameters):
+        """Prefetches research for `params`; meant to run as a response background task."""
+        key = ResearchAgent.cache_key(params)
+        if key in self._inflight:
+            metrics.incr("research_prefetch", outcome="inflight")
+            return
+        if await asyncio.to_thread(cache.get, "research", key) is not None:
+            metrics.incr("research_prefetch", outcome="cached")
+            return
+        if not self._slots.acquire(blocking=False):
+            metrics.incr("research_prefetch", outcome="busy")
+            return
+        try:
+            with deadline.scope(Deadline(settings.PREFETCH_DEADLINE_SECONDS)):
+                task = self._inflight[key] = asyncio.ensure_future(asyncio.to_thread(self.agent.destination_findings, params))
+            metrics.incr("research_prefetch", outcome="started")
+            await task
+        except Exception as e:
+            log.warning("prefetch.failed", destination=params.destination, error=str(e))
+            metrics.incr("research_prefetch", outcome="failed")
+        finally:
+            self._inflight.pop(key, None)
+            self._slots.release()
+
+    async def join(self, params: TripParameters):
+        """Waits for a prefetch of the same research, if one is running, so it is not done twice."""
+        task = self._inflight.get(ResearchAgent.cache_key(params))
+        if task is None or task.done():
+            return
+        metrics.incr("research_prefetch", outcome="joined")
+        try:
+            await asyncio.shield(task)
+        except Exception:
+            pass
+
+
+research_prefetch = ResearchPrefetcher()
@@ -1,46 +1,109 @@
+import asyncio
 import json
 from typing import List, Dict, Any
-import google.generativeai as genai
-from googleapiclient.discovery import build
 from app.agents.base import BaseAgent
+from app.agents.search_results import merge_queries, select_results
+from app.core import logs, metrics, sdk
+from app.core.cache import cache, cache_key
+from app.core.config import settings
 from app.models.trip import TripParameters
-from app.integrations.external import get_weather_forecast, search_places_text
+from app.integrations.external import search_places_text
+from app.integrations.weather import get_trip_weather
+from app.integrations.cassette import cassettes, decode_json, encode_json
+from app.integrations.resilience import call
+
+log = logs.get_logger(__name__)
 
 class ResearchAgent(BaseAgent):
     def __init__(self, api_key: str, google_api_key: str, google_cse_id: str):
-        super().__init__(name="Research Agent")
-        genai.configure(api_key=api_key)
-        self.model_instance = genai.GenerativeModel('gemini-1.5-flash')
+        super().__init__(name="Research Agent", task="research_synthesis", api_key=api_key)
         self.google_api_key = google_api_key
         self.google_cse_id = google_cse_id
-        self.search_service = build("customsearch", "v1", developerKey=self.google_api_key)
-        self._cache: Dict[str, List[Dict[str, str]]] = {}
+        self._search_service: Any = None
+
+    @property
+    def search_service(self) -> Any:
+        if self._search_service is None:
+            self._search_service = sdk.customsearch(self.google_api_key)
+        return self._search_service
 
     async def process(self, parameters: TripParameters) -> Dict[str, Any]:
         """
         Conducts research based on trip parameters.
         """
-        # 1. Formulate search queries
+        return await asyncio.to_thread(self._research, parameters)
+
+    def fallback(self, parameters: TripParameters) -> Dict[str, Any]:
+        """
+        Canned findings used when research cannot finish in time.
+        """
+        findings = self._fallback_findings(parameters)
+        findings["weather"] = get_trip_weather(parameters.destination, parameters.start_date, parameters.duration_days, forecast=False)
+        findings["top_places"] = []
+        return findings
+
+    def _research(self, parameters: TripParameters) -> Dict[str, Any]:
+        findings = self.destination_findings(parameters)
+        findings["weather"] = get_trip_weather(parameters.destination, parameters.start_date, parameters.duration_days)
+        return findings
+
+    def destination_findings(self, parameters: TripParameters) -> Dict[str, Any]:
+        """
+        Synthesized findings and top places for the destination, interests,
+        budget and style. They do not depend on dates or trip length, so they are
+        kept in the shared cache and reused by every worker (see app/cli/prewarm.py).
+        """
+        key = self.cache_key(parameters)
+        cached = cache.get("research", key)
+        if cached is not None:
+            return cached
+
+        # 1. Formulate search queries, merging near-duplicates before they spend CSE quota
         queries = self._generate_search_queries(parameters)
+        unique = merge_queries(queries, settings.RESEARCH_QUERY_MERGE_SIMILARITY)
+        metrics.incr("research_queries_merged", len(queries) - len(unique))
         
         # 2. Execute searches (mocked if no key)
-        search_results = self._execute_searches(queries)
+        results = self._execute_searches(unique)
+
+        # 3. Only the most relevant distinct results go to the LLM
+        selected = select_results(results, parameters.preferences.interests,
+                                  settings.RESEARCH_TOP_K_RESULTS, settings.RESEARCH_SNIPPET_DUP_SIMILARITY)
         
-        w = get_weather_forecast(parameters.destination)
+        findings = self._synthesize_findings(parameters, selected)
+        # Canned findings must not be cached in place of real ones.
+        synthesized = findings != self._fallback_findings(parameters)
+        findings["top_places"] = self.find_top_places(parameters)
+        if synthesized:
+            cache.set("research", key, findings, settings.RESEARCH_CACHE_TTL_SECONDS)
+        return findings
+
+    @staticmethod
+    def cache_key(parameters: TripParameters) -> str:
+        """
+        Everything the findings depend on: destination, interests, and the budget
+        and style that steer the search queries (and so the suggested stays and
+        dining). Trip length and dates are deliberately left out of the prompts.
+        """
+        prefs = parameters.preferences
+        interests = sorted({i.strip().lower() for i in prefs.interests})
+        return cache_key(parameters.destination.strip().lower(), interests,
+                         (prefs.budget_range or "").strip().lower(), (prefs.travel_style or "").strip().lower())
+
+    def find_top_places(self, parameters: TripParameters) -> List[Dict[str, Any]]:
+        """
+        Places matching the traveller's top interests. Needs no LLM call, so it can
+        be refreshed alone when only the interests change.
+        """
         top_places = []
         for interest in parameters.preferences.interests[:3]:
             q = f"{interest} in {parameters.destination}"
             top_places.extend(search_places_text(q)[:3])
-        findings = self._synthesize_findings(parameters, search_results)
-        findings["weather"] = w
-        findings["top_places"] = top_places[:10]
-        
-        return findings
+        return top_places[:10]
 
     def _generate_search_queries(self, parameters: TripParameters) -> List[str]:
         prompt = f"""
-        Generate 5 specific Google search queries to plan a trip to {parameters.destination} 
-        for {parameters.duration_days} days.
+        Generate 5 specific Google search queries to plan a trip to {parameters.destination}.
         Interests: {', '.join(parameters.preferences.interests)}
         Travel Style: {parameters.preferences.travel_style}
         Budget: {parameters.preferences.budget_range}
@@ -48,7 +111,7 @@ class ResearchAgent(BaseAgent):
         Return only the queries as a JSON list of strings.
         """
         try:
-            response = self.model_instance.generate_content(prompt)
+            response = self._generate(prompt, task="research_queries")
             text = response.text.strip()
             if text.startswith("```json"):
                 text = text[7:]
@@ -56,7 +119,7 @@ class ResearchAgent(BaseAgent):
                 text = text[:-3]
             return json.loads(text)
         except Exception as e:
-            print(f"ResearchAgent query generation failed: {e}")
+            log.warning("research.queries_failed", error=str(e))
             return [f"things to do in {parameters.destination}", f"hotels in {parameters.destination}", f"restaurants in {parameters.destination}"]
 
     def _execute_searches(self, queries: List[str]) -> List[Dict]:
@@ -64,14 +127,11 @@ class ResearchAgent(BaseAgent):
         if self.google_api_key and self.google_cse_id:
             for query in queries:
                 try:
-                    if query in self._cache:
-                        results.append({"query": query, "organic_results": self._cache[query]})
-                        continue
-                    response = self.search_service.cse().list(
-                        q=query,
-                        cx=self.google_cse_id,
-                        num=3
-                    ).execute()
+                    response = call("google_cse", lambda: cassettes.intercept(
+                        "google_cse", "cse.list", {"q": query, "cx": self.google_cse_id, "num": 3},
+                        lambda: self.search_service.cse().list(q=query, cx=self.google_cse_id, num=3).execute(),
+                        encode_json, decode_json,
+                    ))
                     
                     formatted_results = []
                     for item in response.get("items", []):
@@ -82,9 +142,8 @@ class ResearchAgent(BaseAgent):
                         })
 
                     results.append({"query": query, "organic_results": formatted_results})
-                    self._cache[query] = formatted_results
                 except Exception as e:
-                    print(f"Google Custom Search error: {e}")
+                    log.warning("research.search_failed", query=query, error=str(e))
         else:
             # Mock results if no key
             results = [{"query": q, "organic_results": [{"title": f"Result for {q}", "snippet": f"Mock description for {q} in {queries[0].split()[-1]}"}]} for q in queries]
@@ -102,7 +161,7 @@ class ResearchAgent(BaseAgent):
         Each should be a list of items with 'name', 'description', 'estimated_cost'.
         """
         try:
-            response = self.model_instance.generate_content(prompt)
+            response = self._generate(prompt)
             text = response.text.strip()
             if text.startswith("```json"):
                 text = text[7:]
@@ -110,9 +169,12 @@ class ResearchAgent(BaseAgent):
                 text = text[:-3]
             return json.loads(text)
         except Exception as e:
-            print(f"ResearchAgent synthesis failed: {e}")
-            return {
-                "activities": [{"name": "City Tour", "description": f"Explore the highlights of {parameters.destination}", "estimated_cost": "$50"}], 
-                "accommodations": [{"name": "Central Hotel", "description": "Comfortable stay in the city center", "estimated_cost": "$150/night"}], 
-                "dining": [{"name": "Local Cuisine", "description": "Traditional dishes", "estimated_cost": "$30"}]
-            }
+            log.warning("research.synthesis_failed", error=str(e))
+            return self._fallback_findings(parameters)
+
+    def _fallback_findings(self, parameters: TripParameters) -> Dict[str, Any]:
+        return {
+            "activities": [{"name": "City Tour", "description": f"Explore the highlights of {parameters.destination}", "estimated_cost": "$50"}], 
+            "accommodations": [{"name": "Central Hotel", "description": "Comfortable stay in the city center", "estimated_cost": "$150/night"}], 
+            "dining": [{"name": "Local Cuisine", "description": "Traditional dishes", "estimated_cost": "$30"}]
+        }
@@ -0,0 +1,118 @@
+import math
+import random
+import re
+import zlib
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Set
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+_STOPWORDS = {
+    "a", "an", "and", "are", "best", "for", "from", "how", "in", "is", "of", "on", "or", "the", "to", "top",
+    "what", "where", "with",
+}
+_TRACKING = re.compile(r"^(utm_.*|gclid|fbclid|ref|ref_src|mc_cid|mc_eid)$")
+_MINHASH_PRIME = (1 << 61) - 1
+_rng = random.Random(0x5EED)
+_PERMUTATIONS = [(_rng.randrange(1, _MINHASH_PRIME), _rng.randrange(_MINHASH_PRIME)) for _ in range(64)]
+
+
+def tokens(text: str) -> List[str]:
+    """Lowercase words minus stopwords, with plural "s" dropped."""
+    words = re.findall(r"[a-z0-9]+", (text or "").lower())
+    return [w[:-1] if len(w) > 3 and w.endswith("s") else w for w in words if w not in _STOPWORDS]
+
+
+def _jaccard(a: Set[Any], b: Set[Any]) -> float:
+    return len(a & b) / len(a | b) if a or b else 1.0
+
+
+def merge_queries(queries: Iterable[str], similarity: float) -> List[str]:
+    """
+    Drops queries whose terms overlap an earlier query's by at least
+    `similarity` (Jaccard), e.g. "best things to do in Kyoto" after
+    "things to do in Kyoto". Order is kept.
+    """
+    kept: List[str] = []
+    seen: List[Set[str]] = []
+    for q in queries:
+        t = set(tokens(q))
+        if any(_jaccard(t, s) >= similarity for s in seen):
+            continue
+        kept.append(q)
+        seen.append(t)
+    return kept
+
+
+def canonical_url(url: Optional[str]) -> Optional[str]:
+    """Scheme, "www.", fragment, tracking parameters and trailing slash removed; parameters sorted."""
+    if not url:
+        return None
+    parts = urlsplit(url.strip())
+    host = parts.netloc.lower()
+    if host.startswith("www."):
+        host = host[4:]
+    query = urlencode(sorted((k, v) for k, v in parse_qsl(parts.query) if not _TRACKING.match(k)))
+    path = parts.path.rstrip("/") or "/"
+    return f"{host}{path}?{query}" if query else f"{host}{path}"
+
+
+def minhash(text: str, shingle: int = 3) -> List[int]:
+    """MinHash signature of the text's word `shingle`-grams."""
+    words = tokens(text)
+    grams = {" ".join(words[i:i + shingle]) for i in range(max(len(words) - shingle + 1, 1))}
+    hashes = [zlib.crc32(g.encode("utf-8")) for g in grams]
+    return [min((a * h + b) % _MINHASH_PRIME for h in hashes) for a, b in _PERMUTATIONS]
+
+
+def _estimated_similarity(a: List[int], b: List[int]) -> float:
+    return sum(x == y for x, y in zip(a, b)) / len(a)
+
+
+def bm25(documents: List[List[str]], query: List[str], k1: float = 1.5, b: float = 0.75) -> List[float]:
+    """Okapi BM25 score of each tokenized document for the query terms."""
+    n = len(documents)
+    if not n:
+        return []
+    avg_len = sum(len(d) for d in documents) / n or 1.0
+    df = Counter(t for d in documents for t in set(d))
+    scores = []
+    for d in documents:
+        tf = Counter(d)
+        score = 0.0
+        for t in set(query):
+            if tf[t]:
+                idf = math.log(1 + (n - df[t] + 0.5) / (df[t] + 0.5))
+                score += idf * tf[t] * (k1 + 1) / (tf[t] + k1 * (1 - b + b * len(d) / avg_len))
+        scores.append(score)
+    return scores
+
+
+def select_results(search_results: List[Dict[str, Any]], interests: List[str], top_k: int, snippet_similarity: float) -> List[Dict[str, Any]]:
+    """
+    Removes results already seen under another query (same canonical URL or
+    near-duplicate snippet), ranks the rest with BM25 against the interests and
+    keeps the best `top_k`. The {"query", "organic_results"} grouping is
+    kept, with groups ordered by their best result.
+    """
+    items, urls, signatures = [], set(), []
+    for group in search_results:
+        for r in group.get("organic_results", []):
+            url = canonical_url(r.get("link"))
+            if url is not None and url in urls:
+                continue
+            sig = minhash(f"{r.get('title') or ''} {r.get('snippet') or ''}")
+            if any(_estimated_similarity(sig, s) >= snippet_similarity for s in signatures):
+                continue
+            if url is not None:
+                urls.add(url)
+            signatures.append(sig)
+            items.append((group["query"], r))
+
+    scores = bm25([tokens(f"{r.get('title') or ''} {r.get('snippet') or ''}") for _, r in items],
+                  tokens(" ".join(interests)))
+    ranked = sorted(range(len(items)), key=lambda i: -scores[i])[:max(top_k, 0)]
+    grouped: Dict[str, List[Dict[str, Any]]] = {}
+    for i in ranked:
+        query, result = items[i]
+        grouped.setdefault(query, []).append(result)
+    return [{"query": q, "organic_results": rs} for q, rs in grouped.items()]
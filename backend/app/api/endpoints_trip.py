@@ -1,57 +1,144 @@
-from fastapi import APIRouter, Depends, HTTPException
+import asyncio
+from typing import Awaitable, Optional, TypeVar
+from fastapi import APIRouter, BackgroundTasks, Body, Depends, Header, HTTPException, Request
 from fastapi.responses import Response
-from app.models.trip import TripParameters, TripPlan
-from app.agents.dream_interpreter import DreamInterpreterAgent
-from app.agents.research_agent import ResearchAgent
-from app.agents.logistics_agent import LogisticsAgent
-from app.agents.budget_agent import BudgetAgent
+from app.models.trip import PlanRefinement, PlanRefinementResult, TripParameters, TripPlan
+from app.agents.orchestrator import TripOrchestrator, interpret_request
+from app.agents.prefetch import research_prefetch
+from app.core import jsondiff, metrics
+from app.core.admission import Overloaded, admission
 from app.core.config import settings
+from app.core.deadline import Deadline
+from app.core.plan_store import plan_store
 from pydantic import BaseModel
 
 router = APIRouter()
 
+T = TypeVar("T")
+
+# Not sent to anyone; the status is only for access logs (nginx's "client closed request").
+CLIENT_CLOSED_REQUEST = 499
+
+
+class ClientDisconnected(Exception):
+    pass
+
+
+async def _unless_disconnected(request: Request, work: Awaitable[T], request_deadline: Deadline, endpoint: str) -> T:
+    """
+    Runs `work` while polling for a client disconnect. If the client goes away,
+    the request deadline is cancelled (so outbound calls already running in
+    worker threads give up at their next check) and the pipeline task is
+    cancelled. Whatever was already cached by then stays cached.
+    """
+    task = asyncio.ensure_future(work)
+    while True:
+        done, _ = await asyncio.wait({task}, timeout=settings.DISCONNECT_POLL_SECONDS)
+        if done:
+            return task.result()
+        if await request.is_disconnected():
+            request_deadline.cancel()
+            task.cancel()
+            metrics.incr("requests_cancelled", endpoint=endpoint)
+            await asyncio.gather(task, return_exceptions=True)
+            raise ClientDisconnected()
+
+def _too_busy(e: Overloaded) -> HTTPException:
+    return HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+
 class TripRequest(BaseModel):
     description: str
+    # Start researching the interpreted destination while the user reviews it.
+    prefetch_research: bool = True
 
 @router.post("/interpret", response_model=TripParameters)
-async def interpret_dream(request: TripRequest):
+async def interpret_dream(request: TripRequest, http_request: Request, background_tasks: BackgroundTasks,
+                          x_request_deadline_ms: Optional[int] = Header(None)):
     try:
-        dream_agent = DreamInterpreterAgent(api_key=settings.GOOGLE_API_KEY)
-        params = await dream_agent.process(request.description)
+        request_deadline = Deadline.from_header(x_request_deadline_ms)
+        async with admission.admit("interpret") as degraded:
+            params = await _unless_disconnected(
+                http_request, interpret_request(request.description, request_deadline), request_deadline, "interpret"
+            )
+        if settings.PREFETCH_RESEARCH and request.prefetch_research and params.destination and not degraded:
+            # Runs after the response is sent, during the user's think time.
+            background_tasks.add_task(research_prefetch.run, params)
         return params
+    except Overloaded as e:
+        raise _too_busy(e)
+    except ClientDisconnected:
+        return Response(status_code=CLIENT_CLOSED_REQUEST)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/generate", response_model=TripPlan)
-async def generate_trip(params: TripParameters):
+async def generate_trip(params: TripParameters, request: Request, x_request_deadline_ms: Optional[int] = Header(None)):
     try:
-        # Initialize Agents
-        research_agent = ResearchAgent(api_key=settings.GOOGLE_API_KEY, google_api_key=settings.GOOGLE_API_KEY, google_cse_id=settings.GOOGLE_CSE_ID)
-        logistics_agent = LogisticsAgent(api_key=settings.GOOGLE_API_KEY)
-        budget_agent = BudgetAgent(api_key=settings.GOOGLE_API_KEY)
+        request_deadline = Deadline.from_header(x_request_deadline_ms)
+        async with admission.admit("generate"):
+            plan = await _unless_disconnected(
+                request, TripOrchestrator().generate(params, request_deadline), request_deadline, "generate"
+            )
+        await asyncio.to_thread(plan_store.save, plan)
+        return plan
+    except Overloaded as e:
+        raise _too_busy(e)
+    except ClientDisconnected:
+        return Response(status_code=CLIENT_CLOSED_REQUEST)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
 
-        # 2. Research
-        findings = await research_agent.process(params)
-        
-        # 3. Logistics (Itinerary)
-        itinerary = await logistics_agent.process(params, findings)
-        
-        # 4. Budget
-        budget_info = await budget_agent.process(params, itinerary)
-        
-        return TripPlan(
-            parameters=params,
-            itinerary=itinerary,
-            budget_info=budget_info,
-            research_info=findings,
-            status="generated"
-        )
-        
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    # Weak comparison (RFC 9110): compression varies the bytes, not the plan.
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in if_none_match.split(","))
+
+@router.get("/plans/{plan_id}", response_model=TripPlan)
+async def get_plan(plan_id: str, if_none_match: Optional[str] = Header(None)):
+    etag = f'W/"{plan_id}"'
+    plan = await asyncio.to_thread(plan_store.get, plan_id)
+    if plan is None:
+        raise HTTPException(status_code=404, detail="Plan not found")
+    # Stored plans are content-addressed and never change.
+    headers = {"ETag": etag, "Cache-Control": "private, max-age=31536000, immutable"}
+    if _etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=plan.model_dump_json(), media_type="application/json", headers=headers)
+
+@router.patch("/plans/{plan_id}", response_model=PlanRefinementResult)
+async def refine_plan(plan_id: str, changes: PlanRefinement, request: Request, x_request_deadline_ms: Optional[int] = Header(None)):
+    plan = await asyncio.to_thread(plan_store.get, plan_id)
+    if plan is None:
+        raise HTTPException(status_code=404, detail="Plan not found")
+    try:
+        request_deadline = Deadline.from_header(x_request_deadline_ms)
+        before = plan.model_dump(exclude={"plan_id"})
+        async with admission.admit("refine"):
+            refined, regenerated = await _unless_disconnected(
+                request, TripOrchestrator().refine(plan, changes, request_deadline), request_deadline, "refine"
+            )
+        await asyncio.to_thread(plan_store.save, refined)
+        diff = jsondiff.diff(before, refined.model_dump(exclude={"plan_id"}))
+        return PlanRefinementResult(plan=refined, regenerated=regenerated, diff=diff)
+    except Overloaded as e:
+        raise _too_busy(e)
+    except ClientDisconnected:
+        return Response(status_code=CLIENT_CLOSED_REQUEST)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/export/pdf")
-async def export_pdf(plan: TripPlan):
+async def export_pdf(plan: Optional[TripPlan] = Body(None), plan_id: Optional[str] = None):
+    if plan is None:
+        if not plan_id:
+            raise HTTPException(status_code=422, detail="Provide a plan body or a plan_id")
+        plan = await asyncio.to_thread(plan_store.get, plan_id)
+        if plan is None:
+            raise HTTPException(status_code=404, detail="Plan not found")
     try:
         from io import BytesIO
         from reportlab.lib.pagesizes import letter
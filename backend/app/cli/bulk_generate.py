@@ -0,0 +1,189 @@
+"""
+Generates plans in bulk from JSONL, running interpret -> generate through the
+agent classes directly, without an HTTP server.
+
+    python -m app.cli.bulk_generate requests.jsonl plans.jsonl \\
+        --workers 8 --provider-limit gemini=4 --provider-limit google_places=8
+
+Each input line is either a trip request ({"description": ...}) or trip
+parameters ({"destination": ..., "duration_days": ..., ...}); an optional "id"
+is copied to the output. Input is streamed through a bounded queue and every
+result is appended to the output as soon as it is ready, with per-stage
+timings, so memory stays flat however long the input is. The output is the
+only record of progress: a rerun skips every input line already present in
+it and trims a final record left half-written by a crash.
+"""
+import argparse
+import asyncio
+import json
+import random
+import re
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+from app.agents.orchestrator import TripOrchestrator, interpret_request
+from app.core.config import settings
+from app.core.deadline import Deadline
+from app.integrations import resilience
+from app.models.trip import TripParameters
+
+
+def read_records(path: Path, skip: Set[int]) -> Iterator[Tuple[int, str]]:
+    with path.open(encoding="utf-8") as f:
+        for line_no, line in enumerate(f, 1):
+            if line.strip() and line_no not in skip:
+                yield line_no, line
+
+
+_LINE_PREFIX = re.compile(rb'^\{"line": (\d+)[,}]')
+
+
+def load_done(path: Path) -> Set[int]:
+    """
+    Input line numbers already written to the output. A trailing partial
+    record is truncated so the next append starts on a fresh line.
+    """
+    done: Set[int] = set()
+    if not path.exists():
+        return done
+    complete = 0
+    with path.open("rb") as f:
+        for line in f:
+            if not line.endswith(b"\n"):
+                break
+            complete += len(line)
+            match = _LINE_PREFIX.match(line)
+            if match:
+                done.add(int(match.group(1)))
+            elif line.strip():
+                done.add(int(json.loads(line)["line"]))
+    if complete < path.stat().st_size:
+        with path.open("r+b") as f:
+            f.truncate(complete)
+    return done
+
+
+def parse_limits(values: List[str]) -> Dict[str, int]:
+    limits = {}
+    for value in values:
+        name, _, n = value.partition("=")
+        limits[name.strip()] = int(n)
+    return limits
+
+
+class Reservoir:
+    """
+    Uniform sample of at most `size` values (Algorithm R), so latency
+    percentiles over any number of records use fixed memory.
+    """
+
+    def __init__(self, size: int = 10000, seed: int = 0):
+        self.size = size
+        self.count = 0
+        self.values: List[float] = []
+        self._rng = random.Random(seed)
+
+    def add(self, value: float):
+        self.count += 1
+        if len(self.values) < self.size:
+            self.values.append(value)
+            return
+        i = self._rng.randrange(self.count)
+        if i < self.size:
+            self.values[i] = value
+
+    def percentile(self, q: float) -> float:
+        ordered = sorted(self.values)
+        return ordered[int(q * (len(ordered) - 1))]
+
+
+async def process_record(orchestrator: TripOrchestrator, line_no: int, line: str, deadline_seconds: float) -> Dict[str, Any]:
+    timings: Dict[str, float] = {}
+    out: Dict[str, Any] = {"line": line_no}
+    t0 = time.perf_counter()
+    try:
+        record = json.loads(line)
+        out["id"] = record.pop("id", None)
+        if "description" in record and "destination" not in record:
+            t = time.perf_counter()
+            params = await interpret_request(record["description"], Deadline(deadline_seconds))
+            timings["interpret"] = round((time.perf_counter() - t) * 1000.0, 1)
+        else:
+            params = TripParameters.model_validate(record)
+        t = time.perf_counter()
+        plan = await orchestrator.generate(params, Deadline(deadline_seconds))
+        timings["generate"] = round((time.perf_counter() - t) * 1000.0, 1)
+        out.update({"status": "ok", "plan": plan.model_dump()})
+    except Exception as e:
+        out.update({"status": "error", "error": f"{type(e).__name__}: {e}"})
+    timings["total"] = round((time.perf_counter() - t0) * 1000.0, 1)
+    out["timings_ms"] = timings
+    return out
+
+
+async def run(input_path: Path, output_path: Path, workers: int, deadline_seconds: float,
+              progress_every: int = 100) -> Dict[str, Any]:
+    done = load_done(output_path)
+    queue: "asyncio.Queue[Optional[Tuple[int, str]]]" = asyncio.Queue(maxsize=workers * 2)
+    orchestrator = TripOrchestrator()
+    totals = Reservoir()
+    counts = {"skipped": len(done), "ok": 0, "error": 0}
+    started = time.perf_counter()
+
+    with output_path.open("a", encoding="utf-8") as out:
+        async def worker():
+            while True:
+                item = await queue.get()
+                if item is None:
+                    return
+                result = await process_record(orchestrator, *item, deadline_seconds)
+                # One write per record, so a crash leaves at most one partial line for load_done to trim.
+                out.write(json.dumps(result, default=str) + "\n")
+                out.flush()
+                counts[result["status"]] += 1
+                totals.add(result["timings_ms"]["total"])
+                processed = counts["ok"] + counts["error"]
+                if processed % progress_every == 0:
+                    rate = processed / (time.perf_counter() - started)
+                    print(f"{processed} done ({counts['error']} errors), {rate:.2f} records/s", file=sys.stderr)
+
+        tasks = [asyncio.create_task(worker()) for _ in range(workers)]
+        for item in read_records(input_path, done):
+            await queue.put(item)
+        for _ in tasks:
+            await queue.put(None)
+        await asyncio.gather(*tasks)
+
+    elapsed = time.perf_counter() - started
+    summary: Dict[str, Any] = {**counts, "elapsed_s": round(elapsed, 1)}
+    if totals.count:
+        summary["records_per_s"] = round(totals.count / elapsed, 2)
+        summary["p50_ms"] = round(statistics.median(totals.values), 1)
+        summary["p95_ms"] = round(totals.percentile(0.95), 1)
+    return summary
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Generate trip plans in bulk from a JSONL file.")
+    parser.add_argument("input", help="JSONL of trip requests or trip parameters")
+    parser.add_argument("output", help="JSONL results, appended to; lines already in it are skipped")
+    parser.add_argument("--workers", type=int, default=4, help="records processed concurrently")
+    parser.add_argument("--provider-limit", action="append", default=[], metavar="PROVIDER=N",
+                        help="max concurrent calls to a provider, e.g. gemini=4; repeatable")
+    parser.add_argument("--deadline-seconds", type=float, default=settings.MAX_REQUEST_DEADLINE_SECONDS,
+                        help="per-record deadline for interpret and for generate")
+    parser.add_argument("--progress-every", type=int, default=100)
+    args = parser.parse_args(argv)
+
+    settings.PROVIDER_MAX_CONCURRENCY = {**settings.PROVIDER_MAX_CONCURRENCY, **parse_limits(args.provider_limit)}
+    resilience.reset_providers()
+    summary = asyncio.run(run(Path(args.input), Path(args.output), max(args.workers, 1),
+                              args.deadline_seconds, max(args.progress_every, 1)))
+    print(json.dumps(summary))
+    return 1 if summary["error"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,141 @@
+"""
+Precomputes research for popular destinations into the shared cache so workers
+start warm.
+
+    python -m app.cli.prewarm --destinations top_destinations.txt \\
+        --interests "culture,food" --interests "nightlife" \\
+        --budget-range Moderate --budget-range Luxury --travel-style Balanced --concurrency 4
+
+Research is cached per destination, interests, budget range and travel style,
+so one job runs per combination. Budget and style default to the values the
+clarification screen preselects ("Moderate", "Balanced"); pass the flags again
+to cover the tiers users actually pick. Each job runs research synthesis and top-places
+geocoding and checks climate-normals coverage; the USD rate table is fetched
+once. Finished jobs are appended to a checkpoint file, so an interrupted run
+resumes where it stopped.
+"""
+import argparse
+import asyncio
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Dict, Iterator, List, Set, Tuple
+from app.agents.research_agent import ResearchAgent
+from app.core.cache import cache
+from app.core.config import DATA_DIR, settings
+from app.integrations.currency import rates
+from app.integrations.weather import normals
+from app.models.trip import TripParameters, TripPreferences
+
+Job = Tuple[str, List[str], str, str]
+
+
+def read_destinations(path: str) -> List[str]:
+    with open(path, encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip() and not line.startswith("#")]
+
+
+def plan_jobs(destinations: List[str], interest_sets: List[List[str]], budget_ranges: List[str],
+              travel_styles: List[str]) -> Iterator[Job]:
+    for destination in destinations:
+        for interests in interest_sets or [[]]:
+            for budget_range in budget_ranges:
+                for travel_style in travel_styles:
+                    yield destination, interests, budget_range, travel_style
+
+
+def job_params(destination: str, interests: List[str], budget_range: str, travel_style: str) -> TripParameters:
+    return TripParameters(
+        destination=destination,
+        duration_days=3,
+        original_request=f"prewarm {destination}",
+        preferences=TripPreferences(interests=interests, budget_range=budget_range, travel_style=travel_style),
+    )
+
+
+def load_checkpoint(path: Path) -> Set[str]:
+    if not path.exists():
+        return set()
+    with path.open(encoding="utf-8") as f:
+        return {json.loads(line)["key"] for line in f if line.strip()}
+
+
+def warm_one(agent: ResearchAgent, params: TripParameters) -> Dict[str, object]:
+    findings = agent.destination_findings(params)
+    if cache.get("research", ResearchAgent.cache_key(params)) is None:
+        raise RuntimeError("research fell back to canned findings; not cached")
+    return {
+        "activities": len(findings.get("activities", [])),
+        "top_places": len(findings.get("top_places", [])),
+        "climate_normals": normals().lookup(params.destination) is not None,
+    }
+
+
+async def run(jobs: List[Job], concurrency: int, checkpoint: Path) -> Dict[str, int]:
+    agent = ResearchAgent(api_key=settings.GOOGLE_API_KEY, google_api_key=settings.GOOGLE_API_KEY, google_cse_id=settings.GOOGLE_CSE_ID)
+    done = load_checkpoint(checkpoint)
+    pending = [job for job in jobs if ResearchAgent.cache_key(job_params(*job)) not in done]
+    counts = {"total": len(jobs), "skipped": len(jobs) - len(pending), "ok": 0, "failed": 0}
+    print(f"{counts['skipped']} of {len(jobs)} jobs already done, {len(pending)} to run")
+
+    await asyncio.to_thread(rates.table)
+    limit = asyncio.Semaphore(concurrency)
+    checkpoint.parent.mkdir(parents=True, exist_ok=True)
+
+    with checkpoint.open("a", encoding="utf-8") as out:
+        async def warm(job: Job):
+            params = job_params(*job)
+            destination, interests, budget_range, travel_style = job
+            label = f"{destination} {interests} {budget_range}/{travel_style}"
+            async with limit:
+                t0 = time.perf_counter()
+                try:
+                    stats = await asyncio.to_thread(warm_one, agent, params)
+                except Exception as e:
+                    counts["failed"] += 1
+                    print(f"[{counts['ok'] + counts['failed']}/{len(pending)}] {label}: failed: {e}")
+                    return
+            counts["ok"] += 1
+            out.write(json.dumps({"key": ResearchAgent.cache_key(params), "destination": destination, "interests": interests,
+                                  "budget_range": budget_range, "travel_style": travel_style}) + "\n")
+            out.flush()
+            print(f"[{counts['ok'] + counts['failed']}/{len(pending)}] {label}: "
+                  f"{stats} in {time.perf_counter() - t0:.1f}s")
+
+        await asyncio.gather(*(warm(job) for job in pending))
+    return counts
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Prewarm the shared research cache for popular destinations.")
+    parser.add_argument("--destinations", required=True, help="file with one destination per line")
+    parser.add_argument("--interests", action="append", default=[],
+                        help="comma-separated interest set; repeat for several (default: no interests)")
+    parser.add_argument("--budget-range", action="append", default=[],
+                        help='budget range to warm, e.g. "Luxury"; repeat for several (default: Moderate)')
+    parser.add_argument("--travel-style", action="append", default=[],
+                        help='travel style to warm, e.g. "Relaxed"; repeat for several (default: Balanced)')
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--cache", default=settings.CACHE_STORE_PATH, help="shared cache file to fill")
+    parser.add_argument("--checkpoint", default=str(DATA_DIR / "prewarm.checkpoint.jsonl"))
+    parser.add_argument("--restart", action="store_true", help="ignore the checkpoint and run every job")
+    args = parser.parse_args(argv)
+
+    checkpoint = Path(args.checkpoint)
+    if args.restart and checkpoint.exists():
+        checkpoint.unlink()
+    cache.open(args.cache)
+    interest_sets = [[i.strip() for i in s.split(",") if i.strip()] for s in args.interests]
+    jobs = list(plan_jobs(read_destinations(args.destinations), interest_sets,
+                          args.budget_range or ["Moderate"], args.travel_style or ["Balanced"]))
+    try:
+        counts = asyncio.run(run(jobs, max(args.concurrency, 1), checkpoint))
+    finally:
+        cache.close()
+    print(json.dumps(counts))
+    return 1 if counts["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,95 @@
+import asyncio
+import threading
+import time
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import AsyncIterator, FrozenSet
+from app.core import metrics
+from app.core.config import settings
+
+
+class Overloaded(Exception):
+    def __init__(self, retry_after: int):
+        super().__init__(f"server overloaded, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+_shed_stages: ContextVar[FrozenSet[str]] = ContextVar("shed_stages", default=frozenset())
+
+
+def should_shed(stage: str) -> bool:
+    """True when the current request was admitted degraded and `stage` is one to skip."""
+    return stage in _shed_stages.get()
+
+
+class AdmissionController:
+    """
+    Admits pipeline requests by load. Below ADMISSION_DEGRADE_INFLIGHT requests
+    run normally; above it they are admitted degraded, with the costly stages in
+    ADMISSION_SHED_STAGES answered by their heuristic fallbacks. At
+    ADMISSION_MAX_INFLIGHT new requests queue for up to
+    ADMISSION_QUEUE_TIMEOUT_SECONDS (and are degraded once admitted); when the
+    queue is full or the wait runs out they are rejected with Overloaded.
+    """
+
+    def __init__(self):
+        self.inflight = 0
+        self.queued = 0
+        self._lock = threading.Lock()
+
+    def _try_enter(self) -> bool:
+        with self._lock:
+            if self.inflight < settings.ADMISSION_MAX_INFLIGHT:
+                self.inflight += 1
+                return True
+            return False
+
+    async def _enter(self, endpoint: str) -> bool:
+        """Takes a slot and returns whether the request should run degraded."""
+        with self._lock:
+            if self.inflight < settings.ADMISSION_MAX_INFLIGHT:
+                self.inflight += 1
+                return self.inflight > settings.ADMISSION_DEGRADE_INFLIGHT
+            if self.queued >= settings.ADMISSION_MAX_QUEUE:
+                metrics.incr("requests_shed", endpoint=endpoint, reason="queue_full")
+                raise Overloaded(settings.ADMISSION_RETRY_AFTER_SECONDS)
+            self.queued += 1
+        try:
+            give_up = time.monotonic() + settings.ADMISSION_QUEUE_TIMEOUT_SECONDS
+            while time.monotonic() < give_up:
+                await asyncio.sleep(0.05)
+                if self._try_enter():
+                    return True
+            metrics.incr("requests_shed", endpoint=endpoint, reason="queue_timeout")
+            raise Overloaded(settings.ADMISSION_RETRY_AFTER_SECONDS)
+        finally:
+            with self._lock:
+                self.queued -= 1
+
+    def _leave(self):
+        with self._lock:
+            self.inflight -= 1
+
+    @asynccontextmanager
+    async def admit(self, endpoint: str) -> AsyncIterator[bool]:
+        """
+        Holds a pipeline slot for the block; yields True if admitted degraded.
+        Raises Overloaded when the request should be rejected with 429.
+        """
+        degraded = await self._enter(endpoint)
+        if degraded:
+            metrics.incr("requests_degraded", endpoint=endpoint)
+        token = _shed_stages.set(frozenset(settings.ADMISSION_SHED_STAGES) if degraded else frozenset())
+        try:
+            yield degraded
+        finally:
+            _shed_stages.reset(token)
+            self._leave()
+
+    def states(self):
+        with self._lock:
+            return {"admission": {"inflight": self.inflight, "queued": self.queued}}
+
+
+admission = AdmissionController()
+metrics.register_collector(admission.states)
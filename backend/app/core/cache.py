@@ -0,0 +1,88 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Optional
+from app.core.config import settings
+from app.core import logs
+
+log = logs.get_logger(__name__)
+
+
+def cache_key(*parts: Any) -> str:
+    """Stable key for normalized parts, e.g. cache_key("tokyo", ["culture", "food"])."""
+    canonical = json.dumps(parts, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:32]
+
+
+class SharedCache:
+    """
+    Namespaced key/value cache in SQLite with per-entry expiry. Every worker that
+    points CACHE_STORE_PATH at the same file shares it, so work done by one worker
+    (or by the prewarm job in app/cli/prewarm.py) is reused by all. An empty path
+    disables it.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path if path is not None else settings.CACHE_STORE_PATH
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> Optional[sqlite3.Connection]:
+        if self._conn is None and self.path:
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                "namespace TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL, expires_at REAL NOT NULL, "
+                "PRIMARY KEY (namespace, key))"
+            )
+            self._conn = conn
+        return self._conn
+
+    def get(self, namespace: str, key: str) -> Optional[Any]:
+        try:
+            with self._lock:
+                conn = self._connect()
+                if conn is None:
+                    return None
+                row = conn.execute(
+                    "SELECT value FROM entries WHERE namespace = ? AND key = ? AND expires_at > ?",
+                    (namespace, key, time.time()),
+                ).fetchone()
+        except sqlite3.Error as e:
+            log.warning("cache.read_failed", namespace=namespace, error=str(e))
+            return None
+        return json.loads(row[0]) if row else None
+
+    def set(self, namespace: str, key: str, value: Any, ttl: float):
+        try:
+            with self._lock:
+                conn = self._connect()
+                if conn is None:
+                    return
+                conn.execute(
+                    "INSERT OR REPLACE INTO entries (namespace, key, value, expires_at) VALUES (?, ?, ?, ?)",
+                    (namespace, key, json.dumps(value, default=str), time.time() + ttl),
+                )
+                conn.commit()
+        except sqlite3.Error as e:
+            log.warning("cache.write_failed", namespace=namespace, error=str(e))
+
+    def open(self, path: str):
+        """Switches to another cache file (used by the CLIs and tests)."""
+        self.close()
+        with self._lock:
+            self.path = path
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+cache = SharedCache()
@@ -0,0 +1,84 @@
+import gzip
+from typing import List, Optional, Tuple
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # optional: gzip only
+    brotli = None
+
+# Already-compressed payloads gain nothing from another pass.
+SKIP_TYPES = ("image/", "video/", "audio/", "application/zip", "application/gzip")
+
+
+def _choose_encoding(accept_encoding: str) -> Optional[str]:
+    accepted = {part.split(";")[0].strip().lower() for part in accept_encoding.split(",")}
+    if brotli is not None and "br" in accepted:
+        return "br"
+    if "gzip" in accepted:
+        return "gzip"
+    return None
+
+
+class CompressionMiddleware:
+    """
+    Compresses responses of at least `minimum_size` bytes with brotli (when the
+    optional `brotli` package is installed and the client accepts it) or gzip.
+    Bodies are buffered, which is fine for this API's JSON and PDF responses.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 5):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = _choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start: Optional[Message] = None
+        chunks: List[bytes] = []
+
+        async def buffered_send(message: Message):
+            nonlocal start
+            if message["type"] == "http.response.start":
+                start = message
+                return
+            if message["type"] != "http.response.body" or start is None:
+                await send(message)
+                return
+            chunks.append(message.get("body", b""))
+            if message.get("more_body", False):
+                return
+            headers, body = self._encode(start, b"".join(chunks), encoding)
+            start["headers"] = headers
+            await send(start)
+            await send({"type": "http.response.body", "body": body})
+
+        await self.app(scope, receive, buffered_send)
+
+    def _encode(self, start: Message, body: bytes, encoding: str) -> Tuple[list, bytes]:
+        headers = MutableHeaders(raw=list(start["headers"]))
+        content_type = headers.get("content-type", "")
+        if (
+            len(body) < self.minimum_size
+            or "content-encoding" in headers
+            or start["status"] in (204, 304)
+            or content_type.startswith(SKIP_TYPES)
+        ):
+            return headers.raw, body
+        if encoding == "br":
+            body = brotli.compress(body, quality=self.brotli_quality)
+        else:
+            body = gzip.compress(body, compresslevel=self.gzip_level)
+        headers["content-encoding"] = encoding
+        headers["content-length"] = str(len(body))
+        headers.add_vary_header("Accept-Encoding")
+        return headers.raw, body
@@ -1,5 +1,9 @@
+from pathlib import Path
+from typing import Dict, List
 from pydantic_settings import BaseSettings
 
+DATA_DIR = Path(__file__).resolve().parent.parent / "data"
+
 class Settings(BaseSettings):
     PROJECT_NAME: str = "Travel Dream Simulator"
     VERSION: str = "0.1.0"
@@ -13,6 +17,135 @@ class Settings(BaseSettings):
     OPENROUTESERVICE_API_KEY: str = ""
     GOOGLE_PLACES_API_KEY: str = ""
 
+    # Structured logging (see app/core/logs.py)
+    LOG_QUEUE_SIZE: int = 10000
+    # Fraction of requests whose below-warning events are logged; warnings, errors
+    # and slow or failed requests are always logged
+    LOG_SUCCESS_SAMPLE_RATE: float = 1.0
+    LOG_SLOW_REQUEST_SECONDS: float = 10.0
+
+    # Outbound calls (see app/integrations/resilience.py)
+    OUTBOUND_TIMEOUT_SECONDS: float = 20.0
+    LLM_TIMEOUT_SECONDS: float = 30.0
+    OUTBOUND_MAX_RETRIES: int = 2
+    OUTBOUND_BACKOFF_BASE_SECONDS: float = 0.5
+    OUTBOUND_BACKOFF_MAX_SECONDS: float = 8.0
+    OUTBOUND_RATE_WAIT_SECONDS: float = 5.0
+    RATE_LIMIT_BURST_SECONDS: float = 2.0
+    DEFAULT_PROVIDER_RATE_LIMIT: float = 5.0
+    PROVIDER_RATE_LIMITS: Dict[str, float] = {
+        "gemini": 5.0,
+        "google_cse": 1.0,
+        "google_places": 10.0,
+        "openweathermap": 1.0,
+        "currencylayer": 0.5,
+        "openrouteservice": 2.0,
+    }
+    # Max calls in flight per provider across the process; unlisted providers are unbounded
+    PROVIDER_MAX_CONCURRENCY: Dict[str, int] = {}
+    BREAKER_FAILURE_THRESHOLD: int = 5
+    BREAKER_RESET_SECONDS: float = 30.0
+
+    # Request deadlines (see app/core/deadline.py)
+    REQUEST_DEADLINE_SECONDS: float = 45.0
+    MAX_REQUEST_DEADLINE_SECONDS: float = 120.0
+    STAGE_TIME_SHARES: Dict[str, float] = {
+        "interpret": 1.0,
+        "research": 0.3,
+        "logistics": 0.6,
+        "budget": 1.0,
+    }
+    # How often long-running endpoints check whether the client is still connected
+    DISCONNECT_POLL_SECONDS: float = 0.25
+
+    # Admission control and load shedding (see app/core/admission.py)
+    ADMISSION_MAX_INFLIGHT: int = 32
+    ADMISSION_DEGRADE_INFLIGHT: int = 16
+    ADMISSION_MAX_QUEUE: int = 32
+    ADMISSION_QUEUE_TIMEOUT_SECONDS: float = 2.0
+    ADMISSION_RETRY_AFTER_SECONDS: int = 5
+    ADMISSION_SHED_STAGES: List[str] = ["interpret", "research", "logistics", "budget"]
+
+    # Itineraries longer than this are generated as concurrent day-range chunks
+    ITINERARY_CHUNK_DAYS: int = 5
+    ITINERARY_MAX_CONCURRENT_CHUNKS: int = 6
+
+    # USD rate table refresh (see app/integrations/currency.py)
+    CURRENCY_RATES_TTL_SECONDS: float = 3600.0
+    CURRENCY_RATES_RETRY_SECONDS: float = 60.0
+
+    # +/- days priced around start_date by the fare engine
+    FLEXIBLE_DATES_WINDOW_DAYS: int = 3
+
+    # Weather (see app/integrations/weather.py)
+    WEATHER_FORECAST_TTL_SECONDS: float = 3 * 3600.0
+    WEATHER_FORECAST_HORIZON_DAYS: int = 4
+
+    # Stored plans and response compression
+    PLAN_STORE_PATH: str = str(DATA_DIR / "plans.db")
+    COMPRESSION_MIN_BYTES: int = 1024
+
+    # Shared cache (see app/core/cache.py); point every worker at the same file, "" disables
+    CACHE_STORE_PATH: str = str(DATA_DIR / "cache.db")
+    RESEARCH_CACHE_TTL_SECONDS: float = 7 * 24 * 3600.0
+    PLACES_CACHE_TTL_SECONDS: float = 30 * 24 * 3600.0
+
+    # Research prefetched after /interpret (see app/agents/prefetch.py)
+    PREFETCH_RESEARCH: bool = True
+    PREFETCH_MAX_CONCURRENT: int = 2
+    PREFETCH_DEADLINE_SECONDS: float = 60.0
+
+    # Local POI store (see app/integrations/poi.py); "" disables it and every lookup goes to Places
+    POI_STORE_PATH: str = str(DATA_DIR / "poi.db")
+    POI_RADIUS_KM: float = 25.0
+    # Fewer local matches than this counts as thin coverage and asks Places instead
+    POI_MIN_LOCAL_RESULTS: int = 3
+
+    # Search result selection before research synthesis (see app/agents/search_results.py)
+    RESEARCH_QUERY_MERGE_SIMILARITY: float = 0.6
+    RESEARCH_SNIPPET_DUP_SIMILARITY: float = 0.8
+    RESEARCH_TOP_K_RESULTS: int = 8
+
+    # Model routing (see app/core/model_router.py); tiers ordered largest to fastest
+    MODEL_TIER_ORDER: List[str] = ["large", "medium", "small"]
+    MODEL_TIERS: Dict[str, str] = {
+        "large": "gemini-1.5-pro",
+        "medium": "gemini-1.5-flash",
+        "small": "gemini-1.5-flash-8b",
+    }
+    TASK_TIERS: Dict[str, str] = {
+        "interpret": "small",
+        "research_queries": "small",
+        "research_synthesis": "medium",
+        "itinerary_outline": "medium",
+        "itinerary": "large",
+        "budget": "medium",
+    }
+    DEFAULT_MODEL_TIER: str = "medium"
+    MODEL_P95_TARGET_SECONDS: Dict[str, float] = {"large": 20.0, "medium": 10.0, "small": 5.0}
+    MODEL_MAX_ERROR_RATE: float = 0.5
+    MODEL_ROUTING_WINDOW_SECONDS: float = 300.0
+    MODEL_ROUTING_MIN_SAMPLES: int = 10
+
+    # Outbound traffic capture/replay (see app/integrations/cassette.py): "off", "record" or "replay"
+    CASSETTE_MODE: str = "off"
+    CASSETTE_PATH: str = str(DATA_DIR / "cassette.db")
+    CASSETTE_REPLAY_LATENCY: bool = True
+    CASSETTE_REPLAY_LOOSE: bool = True
+
+    # Admin access (profiles endpoint, X-Profile-Token); empty disables admin features
+    ADMIN_TOKEN: str = ""
+
+    # Per-request profiling (see app/core/profiling.py)
+    PROFILE_SAMPLE_RATE: float = 0.0
+    PROFILE_INTERVAL_SECONDS: float = 0.005
+    PROFILE_DIR: str = str(DATA_DIR / "profiles")
+    PROFILE_MAX_FILES: int = 200
+
+    # SDKs imported at worker startup rather than on first use (see app/core/sdk.py),
+    # e.g. ["genai", "discovery"]. Empty keeps boot fast; the first request pays instead.
+    PRELOAD_SDKS: List[str] = []
+
     class Config:
         env_file = ".env"
 
@@ -0,0 +1,73 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+from app.core.config import settings
+
+
+class Deadline:
+    def __init__(self, seconds: float, parent: Optional["Deadline"] = None):
+        self.expires_at = time.monotonic() + max(0.0, seconds)
+        self.parent = parent
+        self._cancelled = False
+
+    def remaining(self) -> float:
+        if self.cancelled:
+            return 0.0
+        left = max(0.0, self.expires_at - time.monotonic())
+        return min(left, self.parent.remaining()) if self.parent is not None else left
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled or (self.parent is not None and self.parent.cancelled)
+
+    def cancel(self):
+        """Expires this deadline and every child now, e.g. when the client has gone away."""
+        self._cancelled = True
+
+    def expired(self) -> bool:
+        return self.remaining() <= 0.0
+
+    def share(self, fraction: float) -> float:
+        """Seconds a stage may spend if it gets `fraction` of what is left."""
+        return self.remaining() * max(0.0, min(1.0, fraction))
+
+    def child(self, seconds: float) -> "Deadline":
+        """A deadline that never outlives this one, and is cancelled with it."""
+        return Deadline(min(seconds, self.remaining()), parent=self)
+
+    @classmethod
+    def from_header(cls, deadline_ms: Optional[int]) -> "Deadline":
+        """Builds the request deadline from `X-Request-Deadline-Ms`, falling back to config."""
+        seconds = settings.REQUEST_DEADLINE_SECONDS
+        if deadline_ms is not None and deadline_ms > 0:
+            seconds = min(deadline_ms / 1000.0, settings.MAX_REQUEST_DEADLINE_SECONDS)
+        return cls(seconds)
+
+
+_current: ContextVar[Optional[Deadline]] = ContextVar("deadline", default=None)
+
+
+def current() -> Optional[Deadline]:
+    return _current.get()
+
+
+@contextmanager
+def scope(deadline: Deadline) -> Iterator[Deadline]:
+    """
+    Makes `deadline` the active one for this context. Worker threads started with
+    `asyncio.to_thread` inherit it, so outbound calls see the stage's budget.
+    """
+    token = _current.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _current.reset(token)
+
+
+def clamp(timeout: float) -> float:
+    """Shortens `timeout` to the active deadline, if any."""
+    dl = _current.get()
+    if dl is None:
+        return timeout
+    return max(0.001, min(timeout, dl.remaining()))
@@ -0,0 +1,216 @@
+import atexit
+import json
+import logging
+import queue
+import random
+import re
+import sys
+import time
+import uuid
+import zlib
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Iterator, Mapping, Optional
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.core import metrics
+from app.core.config import settings
+
+# Correlation ID of the request being served. contextvars follow asyncio tasks
+# and `asyncio.to_thread`, so agent and outbound-call events carry it too.
+request_id: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+_SAFE_ID = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+_RESERVED = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "fields", "keep", "request_id"}
+
+_listener: Optional[QueueListener] = None
+
+
+def request_id_from(headers: Mapping[str, str]) -> str:
+    """The caller's X-Request-ID when it is safe to echo and use as a filename, else a new one."""
+    supplied = headers.get("x-request-id", "")
+    return supplied if _SAFE_ID.match(supplied) else uuid.uuid4().hex
+
+
+@contextmanager
+def correlated(rid: str) -> Iterator[str]:
+    token = request_id.set(rid)
+    try:
+        yield rid
+    finally:
+        request_id.reset(token)
+
+
+def sampled(rid: Optional[str], rate: float) -> bool:
+    """
+    Whether success events of request `rid` are kept. The choice is a hash of
+    the ID, so a sampled request keeps all of its lines, not a random subset.
+    """
+    if rate >= 1.0:
+        return True
+    if rate <= 0.0:
+        return False
+    if rid is None:
+        return random.random() < rate
+    return zlib.crc32(rid.encode("utf-8")) / 0xFFFFFFFF < rate
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: ts, level, logger, event, request_id, then the event's fields."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        out = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname.lower(),
+            "logger": record.name,
+            "event": record.getMessage(),
+        }
+        rid = getattr(record, "request_id", None)
+        if rid:
+            out["request_id"] = rid
+        out.update(getattr(record, "fields", None) or {})
+        # Plain `extra=` keys from third-party loggers.
+        out.update({k: v for k, v in vars(record).items() if k not in _RESERVED and not k.startswith("_")})
+        if record.exc_text:
+            out["exc"] = record.exc_text
+        elif record.exc_info:
+            out["exc"] = self.formatException(record.exc_info)
+        return json.dumps(out, default=str, ensure_ascii=False)
+
+
+class AsyncQueueHandler(QueueHandler):
+    """
+    Enqueues records for the listener thread, which does the formatting and
+    writing. Request threads never block: success events outside the sample
+    are dropped up front, and when the queue is full the record is dropped
+    and counted.
+    """
+
+    def filter(self, record: logging.LogRecord):
+        record.request_id = getattr(record, "request_id", None) or request_id.get()
+        if record.levelno < logging.WARNING and not getattr(record, "keep", False):
+            if not sampled(record.request_id, settings.LOG_SUCCESS_SAMPLE_RATE):
+                return False
+        return super().filter(record)
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # The message and traceback are rendered here because args and frames
+        # may change or be freed before the listener gets to them.
+        record = logging.makeLogRecord(vars(record))
+        record.msg, record.args = record.getMessage(), None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            metrics.incr("log_records_dropped")
+
+
+class EventLogger:
+    """
+    Leveled structured events: `log.warning("research.synthesis_failed", error=str(e))`.
+    Pass `keep=True` to bypass success-log sampling.
+    """
+
+    def __init__(self, name: str):
+        self.logger = logging.getLogger(name)
+
+    def _log(self, level: int, event: str, exc_info: Any = None, keep: bool = False, **fields: Any):
+        if self.logger.isEnabledFor(level):
+            self.logger.log(level, event, exc_info=exc_info, extra={"fields": fields, "keep": keep})
+
+    def debug(self, event: str, **fields: Any):
+        self._log(logging.DEBUG, event, **fields)
+
+    def info(self, event: str, **fields: Any):
+        self._log(logging.INFO, event, **fields)
+
+    def warning(self, event: str, **fields: Any):
+        self._log(logging.WARNING, event, **fields)
+
+    def error(self, event: str, **fields: Any):
+        self._log(logging.ERROR, event, **fields)
+
+    def exception(self, event: str, **fields: Any):
+        self._log(logging.ERROR, event, exc_info=True, **fields)
+
+
+def get_logger(name: str) -> EventLogger:
+    return EventLogger(name)
+
+
+class RequestLogMiddleware:
+    """
+    Sets the request's correlation ID, logs request.started/request.finished
+    and returns the ID as X-Request-ID. Plain ASGI rather than
+    `@app.middleware("http")`: BaseHTTPMiddleware hides http.disconnect from
+    `request.is_disconnected()`, which would keep abandoned requests running.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self.log = get_logger("travel_dream")
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        method, path = scope["method"], scope["path"]
+        status = 500
+
+        with correlated(request_id_from(Headers(scope=scope))) as rid:
+            async def send_with_id(message: Message):
+                nonlocal status
+                if message["type"] == "http.response.start":
+                    status = message["status"]
+                    MutableHeaders(scope=message)["X-Request-ID"] = rid
+                await send(message)
+
+            t0 = time.perf_counter()
+            self.log.info("request.started", method=method, path=path)
+            try:
+                await self.app(scope, receive, send_with_id)
+            except Exception:
+                self.log.exception("request.failed", method=method, path=path,
+                                   duration_ms=round((time.perf_counter() - t0) * 1000, 1))
+                raise
+            elapsed = time.perf_counter() - t0
+            self.log.info("request.finished", method=method, path=path, status=status,
+                          duration_ms=round(elapsed * 1000, 1),
+                          keep=status >= 500 or elapsed >= settings.LOG_SLOW_REQUEST_SECONDS)
+
+
+def setup(level: str = "INFO", stream: Any = None):
+    """
+    Routes the root logger through a bounded queue to a background thread that
+    writes JSON lines to `stream` (stdout by default). Safe to call again, e.g.
+    to switch streams in tests.
+    """
+    global _listener
+    shutdown()
+    q: "queue.Queue[logging.LogRecord]" = queue.Queue(maxsize=settings.LOG_QUEUE_SIZE)
+    target = logging.StreamHandler(stream or sys.stdout)
+    target.setFormatter(JsonFormatter())
+    _listener = QueueListener(q, target, respect_handler_level=False)
+    _listener.start()
+    root = logging.getLogger()
+    for h in [h for h in root.handlers if isinstance(h, AsyncQueueHandler)]:
+        root.removeHandler(h)
+    root.addHandler(AsyncQueueHandler(q))
+    root.setLevel(getattr(logging, level.upper(), logging.INFO))
+
+
+def shutdown():
+    """Flushes queued records and stops the listener thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+atexit.register(shutdown)
@@ -0,0 +1,52 @@
+import threading
+from typing import Any, Callable, Dict, List
+
+_lock = threading.Lock()
+_counters: Dict[str, float] = {}
+_gauges: Dict[str, Any] = {}
+_collectors: List[Callable[[], Dict[str, Any]]] = []
+
+
+def _key(name: str, labels: Dict[str, Any]) -> str:
+    if not labels:
+        return name
+    inner = ",".join(f'{k}="{v}"' for k, v in sorted(labels.items()))
+    return f"{name}{{{inner}}}"
+
+
+def incr(name: str, value: float = 1, **labels: Any):
+    key = _key(name, labels)
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+
+def set_gauge(name: str, value: Any, **labels: Any):
+    with _lock:
+        _gauges[_key(name, labels)] = value
+
+
+def register_collector(fn: Callable[[], Dict[str, Any]]):
+    """
+    Registers a callable whose output is merged into every snapshot.
+    Used for state that is cheaper to read on demand than to keep in sync.
+    """
+    with _lock:
+        _collectors.append(fn)
+
+
+def snapshot() -> Dict[str, Any]:
+    with _lock:
+        out: Dict[str, Any] = {"counters": dict(_counters), "gauges": dict(_gauges)}
+        collectors = list(_collectors)
+    for fn in collectors:
+        try:
+            out.update(fn())
+        except Exception:
+            pass
+    return out
+
+
+def reset():
+    with _lock:
+        _counters.clear()
+        _gauges.clear()
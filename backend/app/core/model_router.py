@@ -0,0 +1,103 @@
+import math
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+from app.core import metrics
+from app.core.config import settings
+
+
+class ModelStats:
+    """Latency and outcome of recent calls to one model, over a sliding time window."""
+
+    def __init__(self):
+        self.samples: Deque[Tuple[float, float, bool]] = deque()
+
+    def add(self, seconds: float, ok: bool, now: float):
+        self.samples.append((now, seconds, ok))
+
+    def prune(self, now: float):
+        horizon = now - settings.MODEL_ROUTING_WINDOW_SECONDS
+        while self.samples and self.samples[0][0] < horizon:
+            self.samples.popleft()
+
+    def p95(self) -> Optional[float]:
+        if not self.samples:
+            return None
+        latencies = sorted(s[1] for s in self.samples)
+        return latencies[min(len(latencies) - 1, math.ceil(0.95 * len(latencies)) - 1)]
+
+    def error_rate(self) -> float:
+        return sum(1 for s in self.samples if not s[2]) / len(self.samples) if self.samples else 0.0
+
+
+class ModelRouter:
+    """
+    Picks the Gemini model for each task. TASK_TIERS maps a task to its preferred
+    tier and MODEL_TIERS a tier to a model; MODEL_TIER_ORDER runs from largest to
+    fastest. A tier whose observed p95 exceeds MODEL_P95_TARGET_SECONDS, or whose
+    error rate exceeds MODEL_MAX_ERROR_RATE, is skipped for the next faster one.
+    Samples age out of the window, so a slow model gets traffic back once it is
+    no longer judged on old calls. model_tier_fallback counts each time a task's
+    route moves onto a fallback tier, not every call routed there.
+    """
+
+    def __init__(self):
+        self._stats: Dict[str, ModelStats] = {}
+        self._routes: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def select(self, task: str) -> str:
+        order: List[str] = settings.MODEL_TIER_ORDER
+        tier = settings.TASK_TIERS.get(task, settings.DEFAULT_MODEL_TIER)
+        start = order.index(tier) if tier in order else len(order) - 1
+        for i, candidate in enumerate(order[start:]):
+            model = settings.MODEL_TIERS[candidate]
+            if start + i == len(order) - 1 or self.healthy(candidate, model):
+                with self._lock:
+                    moved = self._routes.get(task) != candidate
+                    self._routes[task] = candidate
+                if i and moved:
+                    metrics.incr("model_tier_fallback", task=task, tier=tier, to=candidate)
+                return model
+        return settings.MODEL_TIERS[order[-1]]
+
+    def healthy(self, tier: str, model: str) -> bool:
+        now = time.monotonic()
+        with self._lock:
+            stats = self._stats.get(model)
+            if stats is None:
+                return True
+            stats.prune(now)
+            if len(stats.samples) < settings.MODEL_ROUTING_MIN_SAMPLES:
+                return True
+            p95, errors = stats.p95(), stats.error_rate()
+        target = settings.MODEL_P95_TARGET_SECONDS.get(tier)
+        if target is not None and p95 is not None and p95 > target:
+            return False
+        return errors <= settings.MODEL_MAX_ERROR_RATE
+
+    def record(self, model: str, seconds: float, ok: bool):
+        with self._lock:
+            self._stats.setdefault(model, ModelStats()).add(seconds, ok, time.monotonic())
+
+    def states(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        with self._lock:
+            for stats in self._stats.values():
+                stats.prune(now)
+            return {
+                "models": {
+                    model: {"samples": len(s.samples), "p95_seconds": s.p95(), "error_rate": round(s.error_rate(), 3)}
+                    for model, s in self._stats.items()
+                }
+            }
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+            self._routes.clear()
+
+
+model_router = ModelRouter()
+metrics.register_collector(model_router.states)
@@ -0,0 +1,68 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+from app.core.config import settings
+from app.models.trip import TripPlan
+
+
+def plan_hash(plan: TripPlan) -> str:
+    """Content hash of the plan, ignoring its own `plan_id`."""
+    body = plan.model_dump(exclude={"plan_id"})
+    canonical = json.dumps(body, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:32]
+
+
+class PlanStore:
+    """
+    Generated plans in SQLite, keyed by content hash. Identical plans share an
+    ID, and a stored plan never changes, so its ID doubles as its ETag.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = Path(path or settings.PLAN_STORE_PATH)
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.path), check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS plans (id TEXT PRIMARY KEY, body TEXT NOT NULL, created_at REAL NOT NULL)"
+            )
+            self._conn = conn
+        return self._conn
+
+    def save(self, plan: TripPlan) -> str:
+        plan.plan_id = plan_hash(plan)
+        body = plan.model_dump_json()
+        with self._lock:
+            conn = self._connect()
+            conn.execute("INSERT OR IGNORE INTO plans (id, body, created_at) VALUES (?, ?, ?)", (plan.plan_id, body, time.time()))
+            conn.commit()
+        return plan.plan_id
+
+    def get(self, plan_id: str) -> Optional[TripPlan]:
+        with self._lock:
+            row = self._connect().execute("SELECT body FROM plans WHERE id = ?", (plan_id,)).fetchone()
+        return TripPlan.model_validate_json(row[0]) if row else None
+
+    def open(self, path: str):
+        """Switches to another store file (used by tests)."""
+        self.close()
+        with self._lock:
+            self.path = Path(path)
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+plan_store = PlanStore()
@@ -0,0 +1,229 @@
+import asyncio
+import json
+import random
+import re
+import secrets
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from types import FrameType
+from typing import Any, AsyncIterator, Dict, List, Mapping, Optional
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.core import logs
+from app.core.config import settings
+
+_active: ContextVar[Optional["RequestProfile"]] = ContextVar("profile", default=None)
+_SAFE_ID = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+
+def is_admin(token: Optional[str]) -> bool:
+    return bool(settings.ADMIN_TOKEN) and bool(token) and secrets.compare_digest(token, settings.ADMIN_TOKEN)
+
+
+def should_profile(headers: Mapping[str, str]) -> bool:
+    """An admin asked for it with `X-Profile-Token`, or the request was sampled."""
+    if "x-profile-token" in headers and is_admin(headers["x-profile-token"]):
+        return True
+    return settings.PROFILE_SAMPLE_RATE > 0 and random.random() < settings.PROFILE_SAMPLE_RATE
+
+
+def _label(code) -> str:
+    return f"{code.co_qualname} ({Path(code.co_filename).name}:{code.co_firstlineno})"
+
+
+def _thread_stack(frame: Optional[FrameType], stop_code=None) -> List[FrameType]:
+    """Frames from outermost to innermost, starting above `stop_code` if it is on the stack."""
+    frames: List[FrameType] = []
+    while frame is not None and frame.f_code is not stop_code:
+        frames.append(frame)
+        frame = frame.f_back
+    frames.reverse()
+    return frames
+
+
+class ProfilingExecutor(ThreadPoolExecutor):
+    """
+    Default executor that lets an active request profile see the worker threads
+    running its `asyncio.to_thread` calls. When nothing is being profiled it
+    adds one context variable lookup per submit.
+    """
+
+    def submit(self, fn, /, *args, **kwargs):
+        profile = _active.get()
+        if profile is None:
+            return super().submit(fn, *args, **kwargs)
+        return super().submit(profile.track_thread, fn, *args, **kwargs)
+
+
+class RequestProfile:
+    """
+    Wall-clock sampling profile of one request. Every interval it records, for
+    each of the request's asyncio tasks, the coroutine await chain (so time spent
+    waiting on the LLM or a worker thread is attributed to the awaiting code),
+    plus the real stacks of worker threads running for the request.
+    """
+
+    def __init__(self, request_id: str, method: str, path: str):
+        self.request_id = request_id
+        self.method = method
+        self.path = path
+        self.interval = settings.PROFILE_INTERVAL_SECONDS
+        self.loop = asyncio.get_running_loop()
+        self.loop_thread = threading.get_ident()
+        self.samples: Counter = Counter()
+        self.ticks = 0
+        self._threads: Dict[int, str] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._sampler = threading.Thread(target=self._run, name=f"profiler-{request_id}", daemon=True)
+
+    def track_thread(self, fn, *args, **kwargs):
+        tid = threading.get_ident()
+        with self._lock:
+            self._threads[tid] = threading.current_thread().name
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            with self._lock:
+                self._threads.pop(tid, None)
+
+    def start(self):
+        self.started = time.time()
+        self._t0 = time.perf_counter()
+        self._sampler.start()
+
+    def stop(self):
+        self._stop.set()
+        self._sampler.join()
+        self.duration = time.perf_counter() - self._t0
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self._sample()
+            except Exception:
+                # Racing the loop thread can occasionally trip a read; skip that tick.
+                continue
+
+    def _sample(self):
+        frames = sys._current_frames()
+        self.ticks += 1
+        loop_stack = _thread_stack(frames.get(self.loop_thread))
+        for task in asyncio.all_tasks(self.loop):
+            if task.get_context().get(_active) is self:
+                stack = self._task_stack(task, loop_stack)
+                if stack is not None:
+                    self.samples["request;" + ";".join(stack)] += 1
+        with self._lock:
+            threads = dict(self._threads)
+        for tid, name in threads.items():
+            stack = _thread_stack(frames.get(tid), RequestProfile.track_thread.__code__)
+            if stack:
+                self.samples[f"thread {name};" + ";".join(_label(f.f_code) for f in stack[1:])] += 1
+
+    def _task_stack(self, task: asyncio.Task, loop_stack: List[FrameType]) -> Optional[List[str]]:
+        """The await chain of `task`, or None when it is only waiting on another of our tasks."""
+        chain: List[FrameType] = []
+        awaitable: Any = task.get_coro()
+        while awaitable is not None:
+            frame = getattr(awaitable, "cr_frame", None) or getattr(awaitable, "gi_frame", None)
+            if frame is None:
+                break
+            chain.append(frame)
+            awaitable = getattr(awaitable, "cr_await", None) or getattr(awaitable, "gi_yieldfrom", None)
+        # Waiting on our own tasks (directly or through gather): they are sampled themselves.
+        waited = [awaitable] + list(getattr(awaitable, "_children", None) or [])
+        if any(isinstance(t, asyncio.Task) and t.get_context().get(_active) is self for t in waited):
+            return None
+        labels = [_label(f.f_code) for f in chain]
+        # A running task also shows the synchronous calls below its innermost coroutine.
+        if chain and chain[-1] in loop_stack:
+            labels += [_label(f.f_code) for f in loop_stack[loop_stack.index(chain[-1]) + 1:]]
+        elif awaitable is not None:
+            labels.append(f"<await {type(awaitable).__name__}>")
+        return labels
+
+    def save(self, directory: Path) -> Dict[str, Any]:
+        directory.mkdir(parents=True, exist_ok=True)
+        meta = {
+            "request_id": self.request_id,
+            "method": self.method,
+            "path": self.path,
+            "started_at": self.started,
+            "duration_ms": round(self.duration * 1000.0, 1),
+            "interval_ms": self.interval * 1000.0,
+            "ticks": self.ticks,
+        }
+        folded = "".join(f"{stack} {count}\n" for stack, count in self.samples.most_common())
+        (directory / f"{self.request_id}.folded").write_text(folded, encoding="utf-8")
+        (directory / f"{self.request_id}.json").write_text(json.dumps(meta), encoding="utf-8")
+        _prune(directory)
+        return meta
+
+
+def _prune(directory: Path):
+    metas = sorted(directory.glob("*.json"), key=lambda p: p.stat().st_mtime, reverse=True)
+    for old in metas[settings.PROFILE_MAX_FILES:]:
+        old.unlink(missing_ok=True)
+        old.with_suffix(".folded").unlink(missing_ok=True)
+
+
+@asynccontextmanager
+async def profile(request_id: str, method: str, path: str) -> AsyncIterator[RequestProfile]:
+    """Profiles the block and saves it as PROFILE_DIR/<request_id>.folded (flamegraph.pl / speedscope input)."""
+    p = RequestProfile(request_id, method, path)
+    token = _active.set(p)
+    p.start()
+    try:
+        yield p
+    finally:
+        _active.reset(token)
+        p.stop()
+        await asyncio.to_thread(p.save, Path(settings.PROFILE_DIR))
+
+
+def list_profiles(limit: int = 50) -> List[Dict[str, Any]]:
+    directory = Path(settings.PROFILE_DIR)
+    if not directory.exists():
+        return []
+    metas = sorted(directory.glob("*.json"), key=lambda p: p.stat().st_mtime, reverse=True)[:limit]
+    return [json.loads(p.read_text(encoding="utf-8")) for p in metas]
+
+
+def read_profile(request_id: str) -> Optional[str]:
+    if not _SAFE_ID.match(request_id):
+        return None
+    path = Path(settings.PROFILE_DIR) / f"{request_id}.folded"
+    return path.read_text(encoding="utf-8") if path.exists() else None
+
+
+class ProfileMiddleware:
+    """
+    Profiles requests picked by `should_profile` and returns the profile's ID
+    as X-Profile-Id. Plain ASGI so http.disconnect still reaches endpoints
+    (see logs.RequestLogMiddleware).
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        headers = Headers(scope=scope) if scope["type"] == "http" else None
+        if headers is None or not should_profile(headers):
+            await self.app(scope, receive, send)
+            return
+        request_id = logs.request_id.get() or logs.request_id_from(headers)
+
+        async def send_with_id(message: Message):
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message)["X-Profile-Id"] = request_id
+            await send(message)
+
+        async with profile(request_id, scope["method"], scope["path"]):
+            await self.app(scope, receive, send_with_id)
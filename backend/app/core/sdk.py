@@ -0,0 +1,40 @@
+import importlib
+import threading
+from types import ModuleType
+from typing import Any, Iterable
+
+# Heavy third-party SDKs, imported on first use instead of at app import.
+# Names here are what PRELOAD_SDKS refers to.
+MODULES = {
+    "genai": "google.generativeai",
+    "discovery": "googleapiclient.discovery",
+    "reportlab": "reportlab.pdfgen.canvas",
+}
+
+_configure_lock = threading.Lock()
+_configured_key: Any = object()
+
+
+def load(name: str) -> ModuleType:
+    """Imports (once) and returns the SDK registered under `name`."""
+    return importlib.import_module(MODULES[name])
+
+
+def preload(names: Iterable[str]):
+    """Imports the given SDKs now, e.g. at worker startup, so the first request does not pay for them."""
+    for name in names:
+        load(name)
+
+
+def gemini_model(model_name: str, api_key: str) -> Any:
+    global _configured_key
+    genai = load("genai")
+    with _configure_lock:
+        if api_key != _configured_key:
+            genai.configure(api_key=api_key)
+            _configured_key = api_key
+    return genai.GenerativeModel(model_name)
+
+
+def customsearch(api_key: str) -> Any:
+    return load("discovery").build("customsearch", "v1", developerKey=api_key)
@@ -0,0 +1,187 @@
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+import zlib
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, Optional, Tuple, TypeVar
+import requests
+from app.core import logs, metrics
+from app.core.config import settings
+
+log = logs.get_logger(__name__)
+
+T = TypeVar("T")
+
+# Parameter names whose values are credentials and must never be written out.
+_SECRET = re.compile(r"key|token|secret|appid|password|signature", re.IGNORECASE)
+REDACTED = "REDACTED"
+
+
+class CassetteMissError(Exception):
+    """Replay mode found no recording for a request."""
+
+    def __init__(self, provider: str):
+        super().__init__(f"no recorded response for {provider} request")
+        self.provider = provider
+
+
+def redact(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {k: REDACTED if _SECRET.search(str(k)) else redact(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [redact(v) for v in value]
+    return value
+
+
+def _digest(*parts: Any) -> str:
+    canonical = json.dumps(parts, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:32]
+
+
+class CassetteStore:
+    """
+    Records outbound request/response pairs, with credentials redacted, into one
+    SQLite file with compressed payloads, and serves them back in replay mode.
+
+    Requests are matched on provider plus the full redacted request; repeats of the
+    same request replay in recorded order. With CASSETTE_REPLAY_LOOSE, a request
+    that was never recorded verbatim (say, a prompt that embeds today's date) gets
+    the next recording of the same route (provider + URL or model) instead.
+    Replay sleeps for each call's recorded latency unless CASSETTE_REPLAY_LATENCY
+    is off.
+    """
+
+    def __init__(self):
+        self.mode = settings.CASSETTE_MODE
+        self.path = settings.CASSETTE_PATH
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._seq: Dict[Tuple[str, str], int] = {}
+
+    def open(self, path: str, mode: str):
+        """Switches cassette file and mode ("off", "record" or "replay")."""
+        self.close()
+        with self._lock:
+            self.path, self.mode = path, mode
+            self._seq.clear()
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS interactions ("
+                "id INTEGER PRIMARY KEY, provider TEXT NOT NULL, match_key TEXT NOT NULL, route_key TEXT NOT NULL, "
+                "request TEXT NOT NULL, response BLOB NOT NULL, latency REAL NOT NULL, recorded_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS interactions_match ON interactions (match_key, id)")
+            conn.execute("CREATE INDEX IF NOT EXISTS interactions_route ON interactions (route_key, id)")
+            self._conn = conn
+        return self._conn
+
+    def intercept(self, provider: str, route: str, request: Dict[str, Any], fn: Callable[[], T],
+                  encode: Callable[[T], Any], decode: Callable[[Any], T]) -> T:
+        """
+        Runs `fn` (off), runs and records it (record), or answers from the
+        cassette (replay). `route` names the endpoint or model without the
+        varying parts of the request.
+        """
+        if self.mode not in ("record", "replay"):
+            return fn()
+        request = redact(request)
+        match_key, route_key = _digest(provider, request), _digest(provider, route)
+        if self.mode == "replay":
+            return decode(self._replay(provider, match_key, route_key))
+
+        t0 = time.perf_counter()
+        result = fn()
+        latency = time.perf_counter() - t0
+        try:
+            payload = encode(result)
+        except Exception as e:
+            log.warning("cassette.record_failed", provider=provider, error=str(e))
+            return result
+        blob = zlib.compress(json.dumps(payload, default=str).encode("utf-8"))
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "INSERT INTO interactions (provider, match_key, route_key, request, response, latency, recorded_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (provider, match_key, route_key, json.dumps(request, default=str), blob, latency, time.time()),
+            )
+            conn.commit()
+        metrics.incr("cassette_recorded", provider=provider)
+        return result
+
+    def _replay(self, provider: str, match_key: str, route_key: str) -> Any:
+        row = self._next("match_key", match_key)
+        if row is None and settings.CASSETTE_REPLAY_LOOSE:
+            row = self._next("route_key", route_key)
+        if row is None:
+            metrics.incr("cassette_misses", provider=provider)
+            raise CassetteMissError(provider)
+        blob, latency = row
+        metrics.incr("cassette_replayed", provider=provider)
+        if settings.CASSETTE_REPLAY_LATENCY:
+            time.sleep(latency)
+        return json.loads(zlib.decompress(blob))
+
+    def _next(self, column: str, key: str) -> Optional[Tuple[bytes, float]]:
+        """The next recording for `key`, cycling back to the first once all have been served."""
+        with self._lock:
+            conn = self._connect()
+            n = self._seq.get((column, key), 0)
+            row = conn.execute(
+                f"SELECT response, latency FROM interactions WHERE {column} = ? ORDER BY id LIMIT 1 OFFSET ?", (key, n)
+            ).fetchone()
+            if row is None and n:
+                n = 0
+                row = conn.execute(
+                    f"SELECT response, latency FROM interactions WHERE {column} = ? ORDER BY id LIMIT 1", (key,)
+                ).fetchone()
+            if row is not None:
+                self._seq[(column, key)] = n + 1
+            return row
+
+
+cassettes = CassetteStore()
+
+
+def encode_http(r: requests.Response) -> Dict[str, Any]:
+    return {"status": r.status_code, "body": r.text, "content_type": r.headers.get("Content-Type", "")}
+
+
+def decode_http(data: Dict[str, Any]) -> requests.Response:
+    r = requests.Response()
+    r.status_code = data["status"]
+    r._content = data["body"].encode("utf-8")
+    r.encoding = "utf-8"
+    r.headers["Content-Type"] = data["content_type"]
+    return r
+
+
+def encode_llm(response: Any) -> Dict[str, Any]:
+    return {"text": response.text}
+
+
+def decode_llm(data: Dict[str, Any]) -> Any:
+    return SimpleNamespace(text=data["text"])
+
+
+def encode_json(data: Any) -> Any:
+    return data
+
+
+def decode_json(data: Any) -> Any:
+    return data
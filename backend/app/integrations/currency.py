@@ -0,0 +1,158 @@
+import re
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+from app.core.cache import cache
+from app.core.config import settings
+from app.integrations.resilience import http_get
+from app.models.trip import TripPlan
+
+# Paths inside budget_info whose numeric (or currency-formatted string) values are amounts;
+# "*" is every key of a dict and "[]" every item of a list. Itinerary and research text is left as written.
+MONEY_PATHS: List[Tuple[str, ...]] = [
+    ("total_estimated_cost",),
+    ("breakdown", "*"),
+    ("flight_options", "[]", "price"),
+    ("flexible_dates", "[]", "cheapest_price"),
+    ("alternative_scenarios", "[]", "estimated_cost"),
+]
+_NUMBER = r"(\d+(?:,\d{3})*(?:\.\d+)?)"
+
+
+def _amount_pattern(currency: str) -> "re.Pattern[str]":
+    """Matches amounts as written in `currency`: "$50" for USD, "50.00 EUR" otherwise."""
+    if currency == "USD":
+        return re.compile(r"\$\s?" + _NUMBER)
+    return re.compile(_NUMBER + r" " + re.escape(currency) + r"\b")
+
+
+def _fetch_table() -> Optional[Dict[str, float]]:
+    key = getattr(settings, "CURRENCYLAYER_API_KEY", "")
+    if not key:
+        return None
+    try:
+        r = http_get(
+            "currencylayer",
+            "http://api.currencylayer.com/live",
+            params={"access_key": key, "source": "USD", "format": 1},
+        )
+        if r.ok:
+            quotes = r.json().get("quotes", {})
+            table = {k[3:]: float(v) for k, v in quotes.items() if k.startswith("USD") and isinstance(v, (int, float))}
+            if table:
+                table["USD"] = 1.0
+                return table
+    except Exception:
+        pass
+    return None
+
+
+class RatesService:
+    """
+    USD-based rate table fetched in one call and kept in memory for
+    CURRENCY_RATES_TTL_SECONDS. A failed refresh keeps serving the stale table
+    and is not retried until CURRENCY_RATES_RETRY_SECONDS have passed. Fresh
+    tables are shared with other workers through the shared cache.
+    """
+
+    def __init__(self):
+        self._rates: Dict[str, float] = {"USD": 1.0}
+        self._expires_at = 0.0
+        self._lock = threading.Lock()
+
+    def table(self) -> Dict[str, float]:
+        if time.monotonic() < self._expires_at:
+            return self._rates
+        with self._lock:
+            # Another thread may have refreshed while we waited for the lock.
+            if time.monotonic() < self._expires_at:
+                return self._rates
+            shared = cache.get("rates", "USD")
+            if shared:
+                age = max(time.time() - shared["fetched_at"], 0.0)
+                self._rates = shared["table"]
+                self._expires_at = time.monotonic() + max(settings.CURRENCY_RATES_TTL_SECONDS - age, 0.0)
+                return self._rates
+            fetched = _fetch_table()
+            if fetched:
+                self._rates = fetched
+                self._expires_at = time.monotonic() + settings.CURRENCY_RATES_TTL_SECONDS
+                cache.set("rates", "USD", {"table": fetched, "fetched_at": time.time()}, settings.CURRENCY_RATES_TTL_SECONDS)
+            else:
+                self._expires_at = time.monotonic() + settings.CURRENCY_RATES_RETRY_SECONDS
+            return self._rates
+
+    def rate(self, currency: str) -> Optional[float]:
+        return self.table().get((currency or "USD").upper())
+
+    def reset(self):
+        with self._lock:
+            self._rates = {"USD": 1.0}
+            self._expires_at = 0.0
+
+
+rates = RatesService()
+
+
+def _collect(node: Any, path: Tuple[str, ...], pattern: "re.Pattern[str]", out: List[Tuple[Any, Any]]):
+    head, rest = path[0], path[1:]
+    if head == "[]":
+        items = list(enumerate(node)) if isinstance(node, list) else []
+    elif head == "*":
+        items = list(node.items()) if isinstance(node, dict) else []
+    else:
+        items = [(head, node[head])] if isinstance(node, dict) and head in node else []
+    for k, v in items:
+        if rest:
+            _collect(v, rest, pattern, out)
+        elif isinstance(v, (int, float)) and not isinstance(v, bool) or isinstance(v, str) and pattern.search(v):
+            out.append((node, k))
+
+
+def _convert_string(text: str, pattern: "re.Pattern[str]", rate: float, currency: str) -> str:
+    def repl(m: "re.Match[str]") -> str:
+        amount = float(m.group(1).replace(",", "")) * rate
+        return f"${amount:,.2f}" if currency == "USD" else f"{amount:,.2f} {currency}"
+    return pattern.sub(repl, text)
+
+
+def convert_plan(plan: TripPlan, currency: str, source: str = "USD") -> TripPlan:
+    """
+    Rewrites the budget amounts in the plan (totals and breakdown, flight
+    options, flexible-date fares, alternative scenarios) from `source` into
+    `currency` in a single pass over the collected fields. Leaves the plan in
+    `source` when no rate is available.
+    """
+    target = (currency or "USD").upper()
+    source = (source or "USD").upper()
+    rate = 1.0
+    if target != source:
+        to_target, to_source = rates.rate(target), rates.rate(source)
+        if to_target is None or to_source is None:
+            if "currency_conversion_unavailable" not in plan.parameters.validation_warnings:
+                plan.parameters.validation_warnings.append("currency_conversion_unavailable")
+            target = source
+        else:
+            rate = to_target / to_source
+
+    pattern = _amount_pattern(source)
+    fields: List[Tuple[Any, Any]] = []
+    if plan.budget_info:
+        for path in MONEY_PATHS:
+            _collect(plan.budget_info, path, pattern, fields)
+    if target != source:
+        values = [container[key] for container, key in fields]
+        converted = [
+            round(float(v) * rate, 2) if not isinstance(v, str) else _convert_string(v, pattern, rate, target)
+            for v in values
+        ]
+        for (container, key), value in zip(fields, converted):
+            container[key] = value
+
+    if plan.budget_info is not None:
+        plan.budget_info["currency"] = target
+        for key in ("flight_options", "flexible_dates"):
+            for option in plan.budget_info.get(key, []) or []:
+                if isinstance(option, dict):
+                    option["currency"] = target
+    return plan
@@ -1,17 +1,19 @@
 from typing import Any, Dict, List, Optional, Tuple
+from app.core.cache import cache
 from app.core.config import settings
-import requests
-import random
+from app.integrations import flights
+from app.integrations.poi import places
+from app.integrations.resilience import http_get
 
 def get_weather_forecast(city: str) -> Dict[str, Any]:
     key = getattr(settings, "OPENWEATHERMAP_API_KEY", "")
     if not key:
         return {"status": "unavailable"}
     try:
-        r = requests.get(
+        r = http_get(
+            "openweathermap",
             "https://api.openweathermap.org/data/2.5/forecast",
             params={"q": city, "appid": key, "units": "metric"},
-            timeout=20,
         )
         if r.ok:
             data = r.json()
@@ -36,39 +38,26 @@ def get_weather_forecast(city: str) -> Dict[str, Any]:
     return {"status": "error"}
 
 
-def get_currency_rate(target: str) -> Optional[float]:
-    key = getattr(settings, "CURRENCYLAYER_API_KEY", "")
-    if not key:
-        return None
-    try:
-        r = requests.get(
-            "http://api.currencylayer.com/live",
-            params={"access_key": key, "currencies": target, "source": "USD", "format": 1},
-            timeout=20,
-        )
-        if r.ok:
-            data = r.json()
-            quotes = data.get("quotes", {})
-            rate = quotes.get(f"USD{target.upper()}")
-            if isinstance(rate, (int, float)):
-                return float(rate)
-    except Exception:
-        pass
-    return None
-
-
 def search_places_text(query: str) -> List[Dict[str, Any]]:
     key = getattr(settings, "GOOGLE_PLACES_API_KEY", "") or getattr(settings, "GOOGLE_API_KEY", "")
     if not key:
         return []
+    cache_id = query.strip().lower()
+    cached = cache.get("places", cache_id)
+    if cached is not None:
+        return cached
+    local = places.lookup(query)
+    if local is not None:
+        return local
     try:
-        r = requests.get(
+        r = http_get(
+            "google_places",
             "https://maps.googleapis.com/maps/api/place/textsearch/json",
             params={"query": query, "key": key},
-            timeout=20,
         )
         if r.ok:
             data = r.json()
+            places.add(query, data.get("results", []))
             out = []
             for it in data.get("results", []):
                 loc = it.get("geometry", {}).get("location", {})
@@ -79,6 +68,8 @@ def search_places_text(query: str) -> List[Dict[str, Any]]:
                     "lat": loc.get("lat"),
                     "lng": loc.get("lng"),
                 })
+            if out:
+                cache.set("places", cache_id, out, settings.PLACES_CACHE_TTL_SECONDS)
             return out
     except Exception:
         pass
@@ -90,10 +81,10 @@ def route_duration_seconds(start: Tuple[float, float], end: Tuple[float, float])
     if not key:
         return None
     try:
-        r = requests.get(
+        r = http_get(
+            "openrouteservice",
             "https://api.openrouteservice.org/v2/directions/driving-car",
             params={"api_key": key, "start": f"{start[1]},{start[0]}", "end": f"{end[1]},{end[0]}"},
-            timeout=20,
         )
         if r.ok:
             data = r.json()
@@ -106,53 +97,13 @@ def route_duration_seconds(start: Tuple[float, float], end: Tuple[float, float])
 
 def get_flight_prices(origin: str, destination: str, date: Optional[str] = None) -> List[Dict[str, Any]]:
     """
-    Mock function to return realistic flight options.
+    Simulated flight options from the local fare engine (app/integrations/flights.py).
     """
-    if not origin or not destination:
-        return []
-        
-    # Seed random for consistent results for same inputs
-    seed_str = f"{origin}-{destination}"
-    random.seed(seed_str)
-    
-    # Base price calculation based on string length difference (arbitrary but consistent)
-    base_price = 300 + (len(origin) + len(destination)) * 20
-    
-    airlines = ["SkyHigh Air", "Oceanic Airlines", "Global Wings", "BudgetFly"]
-    options = []
-    
-    for i in range(3):
-        airline = airlines[i]
-        price_variance = random.randint(-50, 150)
-        price = base_price + price_variance
-        
-        # Outbound Leg
-        out_duration_h = random.randint(3, 15)
-        out_duration_m = random.randint(0, 59)
-        out_stops = random.choice([0, 1, 2])
-        
-        # Return Leg
-        ret_duration_h = random.randint(3, 15)
-        ret_duration_m = random.randint(0, 59)
-        ret_stops = random.choice([0, 1, 2])
-        
-        options.append({
-            "airline": airline,
-            "price": price,
-            "currency": "USD",
-            "type": "Round Trip",
-            "outbound": {
-                "duration": f"{out_duration_h}h {out_duration_m}m",
-                "stops": out_stops,
-                "departure_time": f"{random.randint(6, 20):02d}:{random.randint(0, 59):02d}",
-                "arrival_time": f"{random.randint(6, 20):02d}:{random.randint(0, 59):02d}" # Simplified, ignores timezones
-            },
-            "return": {
-                "duration": f"{ret_duration_h}h {ret_duration_m}m",
-                "stops": ret_stops,
-                "departure_time": f"{random.randint(6, 20):02d}:{random.randint(0, 59):02d}",
-                "arrival_time": f"{random.randint(6, 20):02d}:{random.randint(0, 59):02d}"
-            }
-        })
-        
-    return sorted(options, key=lambda x: x["price"])
\ No newline at end of file
+    return flights.quote(origin, destination, date)
+
+
+def get_flexible_date_prices(origin: str, destination: str, date: str, window_days: int = 3) -> List[Dict[str, Any]]:
+    """
+    Cheapest simulated fare per departure date across a +/- `window_days` window.
+    """
+    return flights.flexible_date_prices(origin, destination, date, window_days)
@@ -0,0 +1,188 @@
+import hashlib
+import math
+import random
+from datetime import date as Date, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+# IATA code -> (lat, lng). Coordinates are city-centre approximations.
+AIRPORTS: Dict[str, Tuple[float, float]] = {
+    "LHR": (51.47, -0.45), "CDG": (49.01, 2.55), "FRA": (50.04, 8.56), "AMS": (52.31, 4.76),
+    "MAD": (40.49, -3.57), "BCN": (41.30, 2.08), "FCO": (41.80, 12.25), "IST": (41.26, 28.74),
+    "ATH": (37.94, 23.94), "LIS": (38.77, -9.13), "DXB": (25.25, 55.36), "DOH": (25.27, 51.61),
+    "JFK": (40.64, -73.78), "LAX": (33.94, -118.41), "SFO": (37.62, -122.38), "ORD": (41.97, -87.91),
+    "MIA": (25.79, -80.29), "YYZ": (43.68, -79.63), "MEX": (19.44, -99.07), "GRU": (-23.43, -46.47),
+    "EZE": (-34.82, -58.54), "HND": (35.55, 139.78), "ICN": (37.46, 126.44), "PEK": (40.08, 116.58),
+    "HKG": (22.31, 113.91), "SIN": (1.36, 103.99), "BKK": (13.69, 100.75), "DPS": (-8.75, 115.17),
+    "KUL": (2.75, 101.71), "DEL": (28.56, 77.10), "BOM": (19.09, 72.87), "SYD": (-33.94, 151.18),
+    "MEL": (-37.67, 144.84), "AKL": (-37.01, 174.79), "CPT": (-33.97, 18.60), "JNB": (-26.14, 28.25),
+    "CAI": (30.12, 31.41), "RAK": (31.61, -8.04), "REK": (63.99, -22.62), "HNL": (21.32, -157.92),
+}
+
+# Lower-cased city / country / alias -> IATA code.
+CITY_AIRPORTS: Dict[str, str] = {
+    "london": "LHR", "paris": "CDG", "frankfurt": "FRA", "germany": "FRA", "amsterdam": "AMS",
+    "madrid": "MAD", "spain": "MAD", "barcelona": "BCN", "rome": "FCO", "italy": "FCO",
+    "istanbul": "IST", "turkey": "IST", "athens": "ATH", "greece": "ATH", "lisbon": "LIS",
+    "portugal": "LIS", "dubai": "DXB", "doha": "DOH", "new york": "JFK", "nyc": "JFK",
+    "los angeles": "LAX", "san francisco": "SFO", "chicago": "ORD", "miami": "MIA",
+    "toronto": "YYZ", "canada": "YYZ", "mexico city": "MEX", "mexico": "MEX", "sao paulo": "GRU",
+    "são paulo": "GRU", "brazil": "GRU", "buenos aires": "EZE", "argentina": "EZE",
+    "tokyo": "HND", "japan": "HND", "kyoto": "HND", "seoul": "ICN", "korea": "ICN",
+    "south korea": "ICN", "beijing": "PEK", "china": "PEK", "hong kong": "HKG",
+    "singapore": "SIN", "bangkok": "BKK", "thailand": "BKK", "bali": "DPS", "indonesia": "DPS",
+    "kuala lumpur": "KUL", "malaysia": "KUL", "delhi": "DEL", "new delhi": "DEL", "india": "DEL",
+    "mumbai": "BOM", "sydney": "SYD", "australia": "SYD", "melbourne": "MEL",
+    "auckland": "AKL", "new zealand": "AKL", "cape town": "CPT", "johannesburg": "JNB",
+    "south africa": "JNB", "cairo": "CAI", "egypt": "CAI", "marrakech": "RAK", "morocco": "RAK",
+    "reykjavik": "REK", "iceland": "REK", "honolulu": "HNL", "hawaii": "HNL",
+}
+
+AIRLINES = [
+    # name, price factor, typical stops on long routes
+    ("SkyHigh Air", 1.15, 0),
+    ("Oceanic Airlines", 1.0, 1),
+    ("Global Wings", 0.95, 1),
+    ("BudgetFly", 0.8, 2),
+]
+
+# Relative demand by month (Jan..Dec) and weekday (Mon..Sun).
+SEASON_FACTORS = [0.85, 0.85, 0.95, 1.0, 1.05, 1.2, 1.3, 1.3, 1.0, 0.95, 0.85, 1.25]
+WEEKDAY_FACTORS = [1.0, 0.9, 0.9, 1.0, 1.1, 1.05, 1.1]
+
+
+def _haversine_km(a: Tuple[float, float], b: Tuple[float, float]) -> float:
+    lat1, lng1, lat2, lng2 = map(math.radians, (a[0], a[1], b[0], b[1]))
+    h = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2
+    return 2 * 6371.0 * math.asin(math.sqrt(h))
+
+
+# (origin code, destination code) -> great-circle km, built once at import.
+ROUTES: Dict[Tuple[str, str], float] = {
+    (o, d): _haversine_km(AIRPORTS[o], AIRPORTS[d])
+    for o in AIRPORTS for d in AIRPORTS if o != d
+}
+
+
+def _stable_int(text: str) -> int:
+    # hash() is salted per process; fares must not change between workers.
+    return int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "big")
+
+
+def resolve_airport(place: str) -> Optional[str]:
+    """Maps a city, country or IATA code to a known airport code."""
+    key = (place or "").strip().lower()
+    if key.upper() in AIRPORTS:
+        return key.upper()
+    if key in CITY_AIRPORTS:
+        return CITY_AIRPORTS[key]
+    # "Kyoto, Japan" / "Tokyo Japan": try each comma- or space-separated part.
+    for part in [p.strip() for p in key.split(",")] + key.split():
+        if part in CITY_AIRPORTS:
+            return CITY_AIRPORTS[part]
+    return None
+
+
+def route_distance_km(origin: str, destination: str) -> float:
+    o, d = resolve_airport(origin), resolve_airport(destination)
+    if o and d and (o, d) in ROUTES:
+        return ROUTES[(o, d)]
+    if o and o == d:
+        return 300.0
+    # Unknown pair: a stable pseudo-distance so prices stay consistent per route.
+    pair = "-".join(sorted([(origin or "").lower(), (destination or "").lower()]))
+    return 800.0 + _stable_int(pair) % 9000
+
+
+def _parse_date(value: Optional[str]) -> Optional[Date]:
+    try:
+        return Date.fromisoformat(value) if value else None
+    except ValueError:
+        return None
+
+
+def _demand_factor(day: Optional[Date]) -> float:
+    if day is None:
+        return 1.0
+    return SEASON_FACTORS[day.month - 1] * WEEKDAY_FACTORS[day.weekday()]
+
+
+def _base_fare(distance_km: float) -> float:
+    # Round-trip economy: fixed costs plus a per-km rate that tapers on long haul.
+    return 90.0 + 0.09 * distance_km + 0.03 * min(distance_km, 3000.0)
+
+
+def _format_duration(hours: float) -> str:
+    total = int(round(hours * 60))
+    return f"{total // 60}h {total % 60}m"
+
+
+def _leg(rng: random.Random, distance_km: float, stops: int) -> Dict[str, Any]:
+    hours = distance_km / 800.0 + 0.5 + stops * rng.uniform(1.0, 3.0)
+    dep_minutes = rng.randint(6 * 60, 21 * 60)
+    arr_minutes = (dep_minutes + int(hours * 60)) % (24 * 60)
+    return {
+        "duration": _format_duration(hours),
+        "stops": stops,
+        "departure_time": f"{dep_minutes // 60:02d}:{dep_minutes % 60:02d}",
+        "arrival_time": f"{arr_minutes // 60:02d}:{arr_minutes % 60:02d}",  # Simplified, ignores timezones
+    }
+
+
+def _jitter(*parts: Any) -> float:
+    return 0.92 + 0.20 * (_stable_int("|".join(str(p).lower() for p in parts)) % 10000) / 10000
+
+
+def _fares(origin: str, destination: str, distance: float, day: Optional[Date]) -> List[Tuple[str, int, int]]:
+    """(airline, stops, price) for every option on one date."""
+    base = _base_fare(distance) * _demand_factor(day)
+    fares = []
+    for airline, factor, stops in AIRLINES:
+        for nonstop in ((True, False) if distance > 3000 else (True,)):
+            price = base * factor * (1.0 if nonstop else 0.82) * _jitter(origin, destination, day, airline, nonstop)
+            fares.append((airline, 0 if nonstop else max(1, stops), int(round(price))))
+    return fares
+
+
+def quote(origin: str, destination: str, date: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Simulated round-trip options for one departure date, cheapest first.
+    Deterministic per (origin, destination, date) and safe to call concurrently:
+    each call draws schedules from its own RNG instead of reseeding the global one.
+    """
+    if not origin or not destination:
+        return []
+    distance = route_distance_km(origin, destination)
+    day = _parse_date(date)
+    rng = random.Random(_stable_int(f"{origin.lower()}|{destination.lower()}|{day}"))
+    options = []
+    for airline, stops, price in _fares(origin, destination, distance, day):
+        options.append({
+            "airline": airline,
+            "price": price,
+            "currency": "USD",
+            "type": "Round Trip",
+            "departure_date": day.isoformat() if day else None,
+            "outbound": _leg(rng, distance, stops),
+            "return": _leg(rng, distance, stops),
+        })
+    return sorted(options, key=lambda x: x["price"])
+
+
+def flexible_date_prices(origin: str, destination: str, date: str, window_days: int = 3) -> List[Dict[str, Any]]:
+    """
+    Cheapest fare for every departure date within +/- `window_days` of `date`,
+    in one call. The route is resolved once and no schedules are generated, so
+    a whole window costs about as much as a single `quote`. Prices match the
+    cheapest `quote` option for the same date. Entries are in date order.
+    """
+    center = _parse_date(date)
+    if not origin or not destination or center is None:
+        return []
+    distance = route_distance_km(origin, destination)
+    days = [center + timedelta(days=offset) for offset in range(-window_days, window_days + 1)]
+    cheapest = [min(_fares(origin, destination, distance, day), key=lambda f: f[2]) for day in days]
+    best = min(price for _, _, price in cheapest)
+    return [
+        {"date": day.isoformat(), "cheapest_price": price, "airline": airline, "currency": "USD", "is_cheapest": price == best}
+        for day, (airline, _, price) in zip(days, cheapest)
+    ]
@@ -0,0 +1,224 @@
+import json
+import math
+import re
+import sqlite3
+import statistics
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+from app.core import logs, metrics
+from app.core.config import settings
+
+log = logs.get_logger(__name__)
+
+_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+# Cell size at geohash precision 4 is about 39 x 20 km, so a cell and its
+# neighbours cover a city-sized radius.
+AREA_PRECISION = 4
+_STOPWORDS = {"a", "an", "and", "the", "of", "in", "near", "best", "top", "to", "for", "with", "things", "do"}
+
+
+def geohash(lat: float, lng: float, precision: int = 9) -> str:
+    lat_lo, lat_hi, lng_lo, lng_hi = -90.0, 90.0, -180.0, 180.0
+    out, bits, ch, even = [], 0, 0, True
+    while len(out) < precision:
+        if even:
+            mid = (lng_lo + lng_hi) / 2
+            ch = ch << 1 | (lng >= mid)
+            lng_lo, lng_hi = (mid, lng_hi) if lng >= mid else (lng_lo, mid)
+        else:
+            mid = (lat_lo + lat_hi) / 2
+            ch = ch << 1 | (lat >= mid)
+            lat_lo, lat_hi = (mid, lat_hi) if lat >= mid else (lat_lo, mid)
+        even = not even
+        bits += 1
+        if bits == 5:
+            out.append(_BASE32[ch])
+            bits, ch = 0, 0
+    return "".join(out)
+
+
+def _neighbourhood(lat: float, lng: float, precision: int) -> Set[str]:
+    """The geohash cell containing the point and the eight around it."""
+    lng_bits = (precision * 5 + 1) // 2
+    dlat, dlng = 180.0 / 2 ** (precision * 5 - lng_bits), 360.0 / 2 ** lng_bits
+    cells = set()
+    for i in (-1, 0, 1):
+        for j in (-1, 0, 1):
+            y = max(-89.999999, min(89.999999, lat + i * dlat))
+            x = (lng + j * dlng + 180.0) % 360.0 - 180.0
+            cells.add(geohash(y, x, precision))
+    return cells
+
+
+def _km(a: Tuple[float, float], b: Tuple[float, float]) -> float:
+    la1, lo1, la2, lo2 = map(math.radians, (a[0], a[1], b[0], b[1]))
+    h = math.sin((la2 - la1) / 2) ** 2 + math.cos(la1) * math.cos(la2) * math.sin((lo2 - lo1) / 2) ** 2
+    return 2 * 6371.0 * math.asin(math.sqrt(h))
+
+
+def normalize(text: str) -> str:
+    return " ".join(re.findall(r"[a-z0-9]+", text.lower()))
+
+
+def terms(text: str) -> Set[str]:
+    """Lowercase words minus stopwords, with plural "s" dropped ("museums" matches "museum")."""
+    return {w[:-1] if len(w) > 3 and w.endswith("s") else w for w in normalize(text).split() if w not in _STOPWORDS}
+
+
+def split_query(query: str) -> Tuple[str, str]:
+    """ "museums in Paris" -> ("museums", "paris"); the area is "" when there is none."""
+    what, sep, where = query.rpartition(" in ")
+    return (what, normalize(where)) if sep else (query, "")
+
+
+class PlaceStore:
+    """
+    Places seen in Places API results, kept in SQLite and indexed by geohash
+    and normalized name. Callers query it with the "<what> in <area>" strings
+    they already send to Places. It answers exact-name lookups and "places
+    matching X near Y" in-process, and returns None when local coverage of the
+    area is too thin. Each area's centre is taken from the first results seen
+    for it. An empty POI_STORE_PATH disables the store.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path if path is not None else settings.POI_STORE_PATH
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> Optional[sqlite3.Connection]:
+        if self._conn is None and self.path:
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(
+                "CREATE TABLE IF NOT EXISTS places ("
+                "place_id TEXT PRIMARY KEY, name TEXT NOT NULL, name_key TEXT NOT NULL, address TEXT, "
+                "lat REAL NOT NULL, lng REAL NOT NULL, geohash TEXT NOT NULL, rating REAL, "
+                "categories TEXT NOT NULL, tags TEXT NOT NULL, updated_at REAL NOT NULL);"
+                "CREATE INDEX IF NOT EXISTS places_geohash ON places (geohash);"
+                "CREATE INDEX IF NOT EXISTS places_name ON places (name_key);"
+                "CREATE TABLE IF NOT EXISTS areas (area TEXT PRIMARY KEY, lat REAL NOT NULL, lng REAL NOT NULL);"
+            )
+            self._conn = conn
+        return self._conn
+
+    def lookup(self, query: str) -> Optional[List[Dict[str, Any]]]:
+        """Local answer to a Places text query, or None when Places should be asked."""
+        what, area = split_query(query)
+        try:
+            with self._lock:
+                conn = self._connect()
+                if conn is None:
+                    return None
+                center = self._center(conn, area) if area else None
+                exact = self._by_name(conn, normalize(what), center)
+                if exact:
+                    metrics.incr("poi_lookups", source="name")
+                    return exact
+                if center is None:
+                    return None
+                rows = self._cells(conn, center)
+        except sqlite3.Error as e:
+            log.warning("poi.read_failed", error=str(e))
+            return None
+        # Matching parses each row, so it runs after the lock is released.
+        found = self._near(rows, terms(what), center)
+        if len(found) < settings.POI_MIN_LOCAL_RESULTS:
+            metrics.incr("poi_lookups", source="remote")
+            return None
+        metrics.incr("poi_lookups", source="local")
+        return found
+
+    def add(self, query: str, results: Iterable[Dict[str, Any]]):
+        """
+        Stores raw Places results. The query's words are kept as tags so a place
+        found by "food in Rome" matches "food" later even though no category says so.
+        """
+        what, area = split_query(query)
+        tags = terms(what)
+        rows = []
+        for it in results:
+            loc = it.get("geometry", {}).get("location", {})
+            lat, lng, name = loc.get("lat"), loc.get("lng"), it.get("name")
+            if lat is None or lng is None or not name:
+                continue
+            rows.append((it.get("place_id") or f"{normalize(name)}@{geohash(lat, lng)}", name, normalize(name),
+                         it.get("formatted_address"), lat, lng, geohash(lat, lng), it.get("rating"), it.get("types", [])))
+        if not rows:
+            return
+        try:
+            with self._lock:
+                conn = self._connect()
+                if conn is None:
+                    return
+                if area and self._center(conn, area) is None:
+                    conn.execute("INSERT INTO areas (area, lat, lng) VALUES (?, ?, ?)",
+                                 (area, statistics.median(r[4] for r in rows), statistics.median(r[5] for r in rows)))
+                for row in rows:
+                    old = conn.execute("SELECT tags FROM places WHERE place_id = ?", (row[0],)).fetchone()
+                    merged = sorted(tags | set(json.loads(old[0]) if old else []))
+                    conn.execute(
+                        "INSERT OR REPLACE INTO places (place_id, name, name_key, address, lat, lng, geohash, rating, "
+                        "categories, tags, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                        (*row[:8], json.dumps(row[8]), json.dumps(merged), time.time()),
+                    )
+                conn.commit()
+        except sqlite3.Error as e:
+            log.warning("poi.write_failed", error=str(e))
+
+    def _center(self, conn: sqlite3.Connection, area: str) -> Optional[Tuple[float, float]]:
+        row = conn.execute("SELECT lat, lng FROM areas WHERE area = ?", (area,)).fetchone()
+        return (row[0], row[1]) if row else None
+
+    def _by_name(self, conn: sqlite3.Connection, name_key: str, center: Optional[Tuple[float, float]]) -> List[Dict[str, Any]]:
+        if not name_key:
+            return []
+        rows = conn.execute("SELECT * FROM places WHERE name_key = ?", (name_key,)).fetchall()
+        if center is not None:
+            rows = [r for r in rows if _km(center, (r[4], r[5])) <= settings.POI_RADIUS_KM]
+            rows.sort(key=lambda r: _km(center, (r[4], r[5])))
+        elif len(rows) > 1:
+            # Same name in several places and no area to pick one by.
+            return []
+        return [self._result(r) for r in rows]
+
+    def _cells(self, conn: sqlite3.Connection, center: Tuple[float, float]) -> List[tuple]:
+        """Places in the area's geohash cell and its neighbours, one index range per cell."""
+        cells = sorted(_neighbourhood(center[0], center[1], AREA_PRECISION))
+        clause = " OR ".join("(geohash >= ? AND geohash < ?)" for _ in cells)
+        # "{" sorts right after "z", the last geohash character, so [cell, cell + "{") is the prefix range.
+        bounds = [b for c in cells for b in (c, c + "{")]
+        return conn.execute(f"SELECT * FROM places WHERE {clause}", bounds).fetchall()
+
+    def _near(self, rows: List[tuple], wanted: Set[str], center: Tuple[float, float]) -> List[Dict[str, Any]]:
+        scored = []
+        for r in rows:
+            if _km(center, (r[4], r[5])) > settings.POI_RADIUS_KM:
+                continue
+            have = terms(r[1]) | set(json.loads(r[9])) | {t for c in json.loads(r[8]) for t in terms(c.replace("_", " "))}
+            if wanted and wanted <= have:
+                scored.append(r)
+        scored.sort(key=lambda r: -(r[7] or 0.0))
+        return [self._result(r) for r in scored[:20]]
+
+    @staticmethod
+    def _result(row: tuple) -> Dict[str, Any]:
+        return {"name": row[1], "address": row[3], "rating": row[7], "lat": row[4], "lng": row[5]}
+
+    def open(self, path: str):
+        """Switches to another store file (used by tests)."""
+        self.close()
+        with self._lock:
+            self.path = path
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+places = PlaceStore()
@@ -0,0 +1,259 @@
+import random
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, TypeVar
+import requests
+from app.core.config import settings
+from app.core import deadline, logs, metrics
+from app.integrations.cassette import cassettes, decode_http, encode_http
+
+T = TypeVar("T")
+log = logs.get_logger(__name__)
+
+RETRYABLE_STATUS = {408, 429, 500, 502, 503, 504}
+
+
+class OutboundError(Exception):
+    """Base class for failures raised by the outbound-call wrapper itself."""
+
+
+class CircuitOpenError(OutboundError):
+    def __init__(self, provider: str):
+        super().__init__(f"circuit open for {provider}")
+        self.provider = provider
+
+
+class RateLimitedError(OutboundError):
+    def __init__(self, provider: str):
+        super().__init__(f"rate limit wait exceeded for {provider}")
+        self.provider = provider
+
+
+class DeadlineExceededError(OutboundError):
+    def __init__(self, provider: str):
+        super().__init__(f"deadline exceeded before calling {provider}")
+        self.provider = provider
+
+
+class RetryableStatusError(OutboundError):
+    def __init__(self, provider: str, status: int):
+        super().__init__(f"{provider} returned HTTP {status}")
+        self.provider = provider
+        self.status = status
+
+
+def is_retryable(exc: BaseException) -> bool:
+    """
+    True for transient failures worth another attempt: network errors, timeouts,
+    HTTP 408/429/5xx from `requests`, googleapiclient and google.api_core errors.
+    """
+    if isinstance(exc, RetryableStatusError):
+        return True
+    if isinstance(exc, OutboundError):
+        return False
+    if isinstance(exc, (requests.ConnectionError, requests.Timeout, TimeoutError, ConnectionError)):
+        return True
+    status = getattr(exc, "status_code", None)
+    if status is None:
+        status = getattr(getattr(exc, "resp", None), "status", None)
+    if status is None:
+        status = getattr(exc, "code", None)
+    try:
+        return int(status) in RETRYABLE_STATUS
+    except (TypeError, ValueError):
+        return False
+
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self, max_wait: float) -> bool:
+        """Takes one token, sleeping up to `max_wait` seconds for it to become available."""
+        deadline = time.monotonic() + max_wait
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return True
+                wait = (1 - self.tokens) / self.rate if self.rate > 0 else max_wait
+            if now + wait > deadline:
+                return False
+            time.sleep(wait)
+
+
+class CircuitBreaker:
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int, reset_seconds: float):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_seconds:
+                self.state = self.HALF_OPEN
+                self._probe_in_flight = False
+            if self.state == self.HALF_OPEN and not self._probe_in_flight:
+                # Let exactly one probe through; everyone else keeps failing fast.
+                self._probe_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self._probe_in_flight = False
+
+    def release(self):
+        """Gives up a half-open probe slot without judging the provider's health."""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._probe_in_flight = False
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+
+class Provider:
+    def __init__(self, name: str):
+        self.name = name
+        rate = settings.PROVIDER_RATE_LIMITS.get(name, settings.DEFAULT_PROVIDER_RATE_LIMIT)
+        self.bucket = TokenBucket(rate, max(1.0, rate * settings.RATE_LIMIT_BURST_SECONDS))
+        self.breaker = CircuitBreaker(settings.BREAKER_FAILURE_THRESHOLD, settings.BREAKER_RESET_SECONDS)
+        limit = settings.PROVIDER_MAX_CONCURRENCY.get(name)
+        self.slots = threading.BoundedSemaphore(limit) if limit else None
+
+
+_providers: Dict[str, Provider] = {}
+_providers_lock = threading.Lock()
+
+
+def get_provider(name: str) -> Provider:
+    with _providers_lock:
+        p = _providers.get(name)
+        if p is None:
+            p = _providers[name] = Provider(name)
+        return p
+
+
+def reset_providers():
+    with _providers_lock:
+        _providers.clear()
+
+
+def _backoff(attempt: int) -> float:
+    cap = min(settings.OUTBOUND_BACKOFF_MAX_SECONDS, settings.OUTBOUND_BACKOFF_BASE_SECONDS * (2 ** attempt))
+    return random.uniform(0, cap)
+
+
+def call(provider: str, fn: Callable[[], T]) -> T:
+    """
+    Runs `fn` against `provider` with rate and concurrency limits, retries on
+    transient errors and a circuit breaker. Raises instead of returning a fallback, so callers keep
+    their existing except-branches as the degraded path.
+    """
+    p = get_provider(provider)
+    if not p.breaker.allow():
+        metrics.incr("outbound_short_circuited", provider=provider)
+        raise CircuitOpenError(provider)
+    dl = deadline.current()
+    attempt = 0
+    t0 = time.perf_counter()
+    while True:
+        if dl is not None and dl.expired():
+            metrics.incr("outbound_cancelled" if dl.cancelled else "outbound_deadline_exceeded", provider=provider)
+            p.breaker.release()
+            raise DeadlineExceededError(provider)
+        if not p.bucket.acquire(deadline.clamp(settings.OUTBOUND_RATE_WAIT_SECONDS)):
+            metrics.incr("outbound_rate_limited", provider=provider)
+            p.breaker.release()
+            raise RateLimitedError(provider)
+        if p.slots is not None and not p.slots.acquire(timeout=deadline.clamp(settings.OUTBOUND_RATE_WAIT_SECONDS)):
+            metrics.incr("outbound_rate_limited", provider=provider)
+            p.breaker.release()
+            raise RateLimitedError(provider)
+        metrics.incr("outbound_calls", provider=provider)
+        try:
+            result = fn()
+        except Exception as e:
+            if p.slots is not None:
+                p.slots.release()
+            retryable = is_retryable(e)
+            if retryable and attempt < settings.OUTBOUND_MAX_RETRIES:
+                delay = _backoff(attempt)
+                if dl is None or delay < dl.remaining():
+                    metrics.incr("outbound_retries", provider=provider)
+                    time.sleep(delay)
+                    attempt += 1
+                    continue
+            metrics.incr("outbound_failures", provider=provider)
+            log.warning("outbound.failed", provider=provider, attempts=attempt + 1, retryable=retryable,
+                        duration_ms=round((time.perf_counter() - t0) * 1000, 1), error=str(e))
+            if retryable and dl is not None and dl.expired():
+                # Our own budget ran out; that is not evidence the provider is down.
+                p.breaker.release()
+            elif retryable:
+                p.breaker.record_failure()
+            else:
+                # The provider answered; a bad request or parse error says nothing about its health.
+                p.breaker.record_success()
+            raise
+        if p.slots is not None:
+            p.slots.release()
+        p.breaker.record_success()
+        log.info("outbound.call", provider=provider, attempts=attempt + 1,
+                 duration_ms=round((time.perf_counter() - t0) * 1000, 1))
+        return result
+
+
+def http_get(provider: str, url: str, params: Dict[str, Any], timeout: Optional[float] = None) -> requests.Response:
+    """`requests.get` through `call`, turning retryable HTTP statuses into exceptions."""
+    def _do() -> requests.Response:
+        r = cassettes.intercept(
+            provider, url, {"url": url, "params": params},
+            lambda: requests.get(url, params=params, timeout=deadline.clamp(timeout or settings.OUTBOUND_TIMEOUT_SECONDS)),
+            encode_http, decode_http,
+        )
+        if r.status_code in RETRYABLE_STATUS:
+            raise RetryableStatusError(provider, r.status_code)
+        return r
+    return call(provider, _do)
+
+
+def provider_states() -> Dict[str, Any]:
+    with _providers_lock:
+        providers = list(_providers.values())
+    return {
+        "circuit_breakers": {
+            p.name: {"state": p.breaker.state, "failures": p.breaker.failures}
+            for p in providers
+        }
+    }
+
+
+metrics.register_collector(provider_states)
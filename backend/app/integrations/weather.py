@@ -0,0 +1,163 @@
+import calendar
+import csv
+import threading
+import time
+from array import array
+from datetime import date as Date, timedelta
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from app.core.config import settings
+from app.integrations.external import get_weather_forecast
+
+NORMALS_PATH = Path(__file__).resolve().parent / "data" / "climate_normals.csv"
+
+
+class ClimateNormals:
+    """
+    Monthly mean temperature (C) and precipitation (mm) per city, read once from
+    the bundled CSV into flat arrays indexed by `city_index * 12 + month`.
+    """
+
+    def __init__(self, path: Path = NORMALS_PATH):
+        self.index: Dict[str, int] = {}
+        self.temps = array("f")
+        self.precip = array("f")
+        with path.open(newline="", encoding="utf-8") as f:
+            for i, row in enumerate(csv.DictReader(f)):
+                for name in [row["city"]] + [a for a in row["aliases"].split(";") if a]:
+                    self.index.setdefault(name.strip().lower(), i)
+                self.temps.extend(float(row[f"t{m:02d}"]) for m in range(1, 13))
+                self.precip.extend(float(row[f"p{m:02d}"]) for m in range(1, 13))
+
+    def lookup(self, city: str) -> Optional[int]:
+        key = (city or "").strip().lower()
+        if key in self.index:
+            return self.index[key]
+        # "Kyoto, Japan" -> "kyoto", then "japan"
+        for part in key.split(","):
+            if part.strip() in self.index:
+                return self.index[part.strip()]
+        return None
+
+    def for_day(self, city_index: int, day: Date) -> Tuple[float, float]:
+        """
+        (temperature, daily precipitation) for `day`, interpolated linearly
+        between the two nearest mid-month normals.
+        """
+        days_in_month = calendar.monthrange(day.year, day.month)[1]
+        pos = (day.day - 0.5) / days_in_month - 0.5  # -0.5..0.5 around mid-month
+        m0 = day.month - 1
+        m1 = (m0 + (1 if pos >= 0 else -1)) % 12
+        w = abs(pos)
+        base = city_index * 12
+        temp = self.temps[base + m0] * (1 - w) + self.temps[base + m1] * w
+        rain = self.precip[base + m0] * (1 - w) + self.precip[base + m1] * w
+        return round(temp, 1), round(rain / days_in_month, 1)
+
+
+_normals: Optional[ClimateNormals] = None
+_normals_lock = threading.Lock()
+
+
+def normals() -> ClimateNormals:
+    global _normals
+    if _normals is None:
+        with _normals_lock:
+            if _normals is None:
+                _normals = ClimateNormals()
+    return _normals
+
+
+class ForecastCache:
+    """
+    Per-city, per-day forecast temperatures. One OpenWeatherMap call fills every
+    day it returns; the city is not refetched until WEATHER_FORECAST_TTL_SECONDS pass.
+    """
+
+    def __init__(self):
+        self._days: Dict[Tuple[str, str], float] = {}
+        self._fetched: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        # One refresh per city at a time; other callers wait for it instead of fetching too.
+        self._refreshing: Dict[str, threading.Lock] = {}
+
+    def _fresh(self, key: str) -> bool:
+        with self._lock:
+            return time.monotonic() - self._fetched.get(key, -1e18) < settings.WEATHER_FORECAST_TTL_SECONDS
+
+    def get(self, city: str, day: Date) -> Optional[float]:
+        key = (city or "").strip().lower()
+        if not self._fresh(key):
+            with self._lock:
+                refreshing = self._refreshing.setdefault(key, threading.Lock())
+            with refreshing:
+                if not self._fresh(key):
+                    self._refresh(city, key)
+        with self._lock:
+            return self._days.get((key, day.isoformat()))
+
+    def _refresh(self, city: str, key: str):
+        forecast = get_weather_forecast(city)
+        with self._lock:
+            # A failed fetch is remembered too, so a down provider is not asked again per request.
+            self._fetched[key] = time.monotonic()
+            for item in forecast.get("daily", []) if forecast.get("status") == "ok" else []:
+                self._days[(key, item["date"])] = item["avg_temp_c"]
+
+    def reset(self):
+        with self._lock:
+            self._days.clear()
+            self._fetched.clear()
+            self._refreshing.clear()
+
+
+forecasts = ForecastCache()
+
+
+def _parse_date(value: Optional[str]) -> Optional[Date]:
+    try:
+        return Date.fromisoformat(value) if value else None
+    except ValueError:
+        return None
+
+
+def get_trip_weather(city: str, start_date: Optional[str], duration_days: int, forecast: bool = True) -> Dict[str, Any]:
+    """
+    Expected weather for each day of the trip. Days inside the forecast horizon use
+    the (cached) live forecast; all others, and any day the forecast misses, use
+    climate normals. Trips without a start date are assumed to start today.
+    `forecast=False` answers from normals alone, without any network call.
+    """
+    start = _parse_date(start_date) or Date.today()
+    today = Date.today()
+    horizon = today + timedelta(days=settings.WEATHER_FORECAST_HORIZON_DAYS)
+    use_forecast = forecast and bool(getattr(settings, "OPENWEATHERMAP_API_KEY", "")) and start <= horizon
+    city_index = normals().lookup(city)
+
+    daily: List[Dict[str, Any]] = []
+    for n in range(max(duration_days, 1)):
+        day = start + timedelta(days=n)
+        entry: Dict[str, Any] = {"day_number": n + 1, "date": day.isoformat()}
+        temp = forecasts.get(city, day) if use_forecast and today <= day <= horizon else None
+        if temp is not None:
+            entry.update({"avg_temp_c": temp, "source": "forecast"})
+        elif city_index is not None:
+            t, rain = normals().for_day(city_index, day)
+            entry.update({"avg_temp_c": t, "precip_mm": rain, "source": "climate_normals"})
+        else:
+            continue
+        daily.append(entry)
+
+    if not daily:
+        return {"status": "unavailable"}
+    return {"status": "ok", "daily": daily}
+
+
+def align_to_itinerary(itinerary: List[Dict[str, Any]], weather: Optional[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Attaches each day's expected weather to the matching itinerary day."""
+    by_day = {d["day_number"]: d for d in (weather or {}).get("daily", [])}
+    for day in itinerary:
+        w = by_day.get(day.get("day_number"))
+        if w:
+            day["weather"] = {k: v for k, v in w.items() if k != "day_number"}
+    return itinerary
@@ -1,13 +1,24 @@
-from fastapi import FastAPI, Request
+import asyncio
+from contextlib import asynccontextmanager
+from fastapi import FastAPI
 from app.core.config import settings
+from app.core import logs, metrics, profiling, sdk
+from app.core.compression import CompressionMiddleware
 from app.api.endpoints_trip import router as trip_router
+from app.api.endpoints_admin import router as admin_router
 
 from fastapi.middleware.cors import CORSMiddleware
-import logging
 
-logging.basicConfig(level=getattr(logging, settings.LOG_LEVEL, logging.INFO))
-logger = logging.getLogger("travel_dream")
-app = FastAPI(title=settings.PROJECT_NAME, version=settings.VERSION)
+logs.setup(settings.LOG_LEVEL)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    sdk.preload(settings.PRELOAD_SDKS)
+    # Lets a request profile see the worker threads of its to_thread calls.
+    asyncio.get_running_loop().set_default_executor(profiling.ProfilingExecutor())
+    yield
+
+app = FastAPI(title=settings.PROJECT_NAME, version=settings.VERSION, lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -16,16 +27,18 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(CompressionMiddleware, minimum_size=settings.COMPRESSION_MIN_BYTES)
+app.add_middleware(profiling.ProfileMiddleware)
+# Outermost, so every later event of the request carries its ID.
+app.add_middleware(logs.RequestLogMiddleware)
 
 app.include_router(trip_router, prefix="/api/v1/trip", tags=["trip"])
+app.include_router(admin_router, prefix="/api/v1/admin", tags=["admin"])
 
 @app.get("/")
 def read_root():
     return {"message": "Welcome to Travel Dream Simulator API"}
 
-@app.middleware("http")
-async def log_requests(request: Request, call_next):
-    logger.info(f"{request.method} {request.url}")
-    response = await call_next(request)
-    logger.info(f"{response.status_code} {request.url}")
-    return response
+@app.get("/metrics")
+def read_metrics():
+    return metrics.snapshot()
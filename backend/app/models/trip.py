@@ -20,8 +20,28 @@ class TripParameters(BaseModel):
     validation_warnings: List[str] = Field(default_factory=list)
 
 class TripPlan(BaseModel):
+    plan_id: Optional[str] = None
     parameters: TripParameters
     itinerary: List[dict] = Field(default_factory=list)
     budget_info: Optional[dict] = None
     research_info: Optional[dict] = None
     status: str = "draft"
+    degraded_stages: List[str] = Field(default_factory=list)
+
+class PlanRefinement(BaseModel):
+    """Parameter delta for a stored plan; only the fields that are set (and not null) change."""
+    duration_days: Optional[int] = Field(None, gt=0)
+    travelers: Optional[int] = Field(None, gt=0)
+    budget_total: Optional[float] = None
+    currency: Optional[str] = None
+    start_date: Optional[str] = None
+    origin: Optional[str] = None
+    interests: Optional[List[str]] = None
+    budget_range: Optional[str] = None
+    travel_style: Optional[str] = None
+    dietary_restrictions: Optional[List[str]] = None
+
+class PlanRefinementResult(BaseModel):
+    plan: TripPlan
+    regenerated: List[str] = Field(default_factory=list)
+    diff: List[dict] = Field(default_factory=list)
@@ -0,0 +1,67 @@
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+import requests
+
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+RUNS = int(os.getenv("RUNS", "5"))
+IMPORT_SNIPPET = "import time; t0 = time.perf_counter(); import app.main; print((time.perf_counter() - t0) * 1000.0)"
+
+
+def import_ms() -> float:
+    out = subprocess.run([sys.executable, "-c", IMPORT_SNIPPET], cwd=BACKEND_DIR, capture_output=True, text=True, check=True)
+    return float(out.stdout.strip().splitlines()[-1])
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def first_request_ms() -> float:
+    """Process spawn to first 200 from GET /, as a new worker would experience it."""
+    port = free_port()
+    t0 = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        while True:
+            if proc.poll() is not None:
+                raise RuntimeError("server exited during startup")
+            try:
+                if requests.get(f"http://127.0.0.1:{port}/", timeout=1).ok:
+                    return (time.perf_counter() - t0) * 1000.0
+            except requests.ConnectionError:
+                time.sleep(0.01)
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+def main():
+    print(f"Benchmarking startup over {RUNS} runs (PRELOAD_SDKS={os.getenv('PRELOAD_SDKS', '[]')})")
+    imports = [import_ms() for _ in range(RUNS)]
+    firsts = [first_request_ms() for _ in range(RUNS)]
+    summary = {
+        "import_ms_median": statistics.median(imports),
+        "import_ms_max": max(imports),
+        "first_request_ms_median": statistics.median(firsts),
+        "first_request_ms_max": max(firsts),
+    }
+    print("Summary:")
+    print(json.dumps(summary, indent=2))
+
+
+if __name__ == "__main__":
+    main()
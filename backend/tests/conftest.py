@@ -0,0 +1,27 @@
+import pytest
+from app.core.cache import cache
+from app.core.model_router import model_router
+from app.core.plan_store import plan_store
+from app.integrations import resilience
+from app.integrations.cassette import cassettes
+from app.integrations.poi import places
+from app.integrations.currency import rates
+
+
+@pytest.fixture(autouse=True)
+def fresh_outbound_state(tmp_path):
+    # Breakers and rate buckets are process-wide; one test's failures must not trip the next.
+    resilience.reset_providers()
+    # Each test gets an empty shared cache instead of the worker's on-disk one.
+    cache.open(str(tmp_path / "cache.db"))
+    cassettes.open(str(tmp_path / "cassette.db"), "off")
+    places.open(str(tmp_path / "poi.db"))
+    plan_store.open(str(tmp_path / "plans.db"))
+    yield
+    resilience.reset_providers()
+    rates.reset()
+    model_router.reset()
+    cache.close()
+    cassettes.close()
+    places.close()
+    plan_store.close()
@@ -0,0 +1,90 @@
+import asyncio
+import pytest
+from fastapi.testclient import TestClient
+from app.agents import dream_interpreter, logistics_agent, research_agent
+from app.core import metrics, sdk
+from app.core.admission import AdmissionController, Overloaded
+from app.core.config import settings
+from app.main import app
+
+
+class CountingModel:
+    def __init__(self):
+        self.calls = 0
+
+    def generate_content(self, prompt: str, **kwargs):
+        self.calls += 1
+        raise RuntimeError("offline")
+
+
+PARAMS = {"destination": "Tokyo", "duration_days": 2, "original_request": "Tokyo",
+          "preferences": {"budget_range": "Moderate"}}
+
+
+def test_queue_admits_when_a_slot_frees_and_sheds_when_full(monkeypatch):
+    monkeypatch.setattr(settings, "ADMISSION_MAX_INFLIGHT", 1)
+    monkeypatch.setattr(settings, "ADMISSION_MAX_QUEUE", 1)
+    controller = AdmissionController()
+
+    async def scenario():
+        async def hold(seconds):
+            async with controller.admit("generate") as degraded:
+                await asyncio.sleep(seconds)
+                return degraded
+
+        first = asyncio.create_task(hold(0.2))
+        await asyncio.sleep(0.01)
+        queued = asyncio.create_task(hold(0))
+        await asyncio.sleep(0.01)
+        with pytest.raises(Overloaded):
+            await hold(0)
+        return await first, await queued
+
+    # The queued request still runs, but degraded.
+    assert asyncio.run(scenario()) == (False, True)
+    assert controller.inflight == 0 and controller.queued == 0
+
+
+def test_degraded_admission_uses_heuristic_stages(monkeypatch):
+    model = CountingModel()
+    monkeypatch.setattr(sdk, "gemini_model", lambda name, key: model)
+    monkeypatch.setattr(settings, "ADMISSION_DEGRADE_INFLIGHT", 0)
+    for module in (dream_interpreter, logistics_agent, research_agent):
+        monkeypatch.setattr(module, "search_places_text", lambda q: [])
+    metrics.reset()
+
+    plan = TestClient(app).post("/api/v1/trip/generate", json=PARAMS).json()
+
+    assert model.calls == 0
+    assert plan["degraded_stages"] == ["research", "logistics", "budget"]
+    assert plan["budget_info"]["total_estimated_cost"] == 240
+    assert metrics.snapshot()["counters"]['stage_degraded{reason="load",stage="budget"}'] == 1
+
+
+def test_overload_returns_429_with_retry_after(monkeypatch):
+    monkeypatch.setattr(settings, "ADMISSION_MAX_INFLIGHT", 0)
+    monkeypatch.setattr(settings, "ADMISSION_MAX_QUEUE", 0)
+    resp = TestClient(app).post("/api/v1/trip/generate", json=PARAMS)
+    assert resp.status_code == 429
+    assert resp.headers["retry-after"] == str(settings.ADMISSION_RETRY_AFTER_SECONDS)
+
+
+def test_shed_fallbacks_run_off_the_event_loop(monkeypatch):
+    monkeypatch.setattr(sdk, "gemini_model", lambda name, key: CountingModel())
+    monkeypatch.setattr(settings, "ADMISSION_DEGRADE_INFLIGHT", 0)
+    on_loop = []
+
+    def places(query):
+        # The heuristic interpreter validates the destination with a blocking Places call.
+        try:
+            asyncio.get_running_loop()
+            on_loop.append(True)
+        except RuntimeError:
+            on_loop.append(False)
+        return []
+    monkeypatch.setattr(dream_interpreter, "search_places_text", places)
+
+    resp = TestClient(app).post("/api/v1/trip/interpret", json={"description": "a week in Lisbon"})
+
+    assert resp.status_code == 200
+    assert on_loop and not any(on_loop)
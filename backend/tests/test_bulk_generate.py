@@ -0,0 +1,53 @@
+import json
+from app.agents import dream_interpreter, logistics_agent, research_agent
+from app.cli import bulk_generate
+from app.core import sdk
+from app.core.config import settings
+
+
+class FailingModel:
+    def generate_content(self, prompt: str, **kwargs):
+        raise RuntimeError("offline")
+
+
+def test_bulk_generate_streams_results_and_resumes(tmp_path, monkeypatch):
+    monkeypatch.setattr(sdk, "gemini_model", lambda name, key: FailingModel())
+    monkeypatch.setattr(settings, "PROVIDER_MAX_CONCURRENCY", {})
+    for module in (dream_interpreter, logistics_agent, research_agent):
+        monkeypatch.setattr(module, "search_places_text", lambda q: [])
+    source = tmp_path / "in.jsonl"
+    source.write_text("\n".join([
+        json.dumps({"id": "a", "description": "5 day trip to Lisbon for food"}),
+        json.dumps({"id": "b", "destination": "Kyoto", "duration_days": 2, "original_request": "Kyoto"}),
+        json.dumps({"id": "c", "destination": "Kyoto"}),
+    ]) + "\n")
+    output = tmp_path / "out.jsonl"
+    args = [str(source), str(output), "--workers", "2", "--provider-limit", "gemini=1"]
+
+    assert bulk_generate.main(args) == 1
+    records = {r["id"]: r for r in map(json.loads, output.read_text().splitlines())}
+    assert records["a"]["status"] == "ok" and records["a"]["plan"]["parameters"]["duration_days"] == 5
+    assert set(records["a"]["timings_ms"]) == {"interpret", "generate", "total"}
+    assert records["b"]["status"] == "ok" and len(records["b"]["plan"]["itinerary"]) == 2
+    assert records["c"]["status"] == "error"
+    assert settings.PROVIDER_MAX_CONCURRENCY == {"gemini": 1}
+
+    # Every line is in the output, so a rerun appends nothing.
+    assert bulk_generate.main(args) == 0
+    assert len(output.read_text().splitlines()) == 3
+
+    # A crash mid-write leaves a partial last record; it is dropped and redone once.
+    lines = output.read_text().splitlines()
+    redo = json.loads(lines[-1])["id"]
+    output.write_text("\n".join(lines[:-1]) + "\n" + lines[-1][:40])
+    bulk_generate.main(args)
+    ids = [json.loads(line)["id"] for line in output.read_text().splitlines()]
+    assert sorted(ids) == ["a", "b", "c"] and ids[-1] == redo
+
+
+def test_reservoir_keeps_fixed_size_sample():
+    r = bulk_generate.Reservoir(size=100)
+    for v in range(10000):
+        r.add(float(v))
+    assert r.count == 10000 and len(r.values) == 100
+    assert 8000 < r.percentile(0.95) < 10000
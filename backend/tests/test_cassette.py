@@ -0,0 +1,112 @@
+import json
+import sqlite3
+import time
+import pytest
+import requests
+from app.agents.research_agent import ResearchAgent
+from app.core.config import settings
+from app.integrations import resilience
+from app.integrations.cassette import CassetteMissError, cassettes
+from app.integrations.resilience import http_get
+
+
+class Response:
+    def __init__(self, text: str):
+        self.text = text
+
+
+class CountingModel:
+    def __init__(self, text: str):
+        self.text = text
+        self.calls = 0
+
+    def generate_content(self, prompt, **kwargs):
+        self.calls += 1
+        return Response(self.text)
+
+
+def fake_get(body, delay=0.0):
+    calls = []
+
+    def get(url, params=None, timeout=None):
+        calls.append(params)
+        time.sleep(delay)
+        r = requests.Response()
+        r.status_code = 200
+        r._content = json.dumps(body).encode()
+        r.headers["Content-Type"] = "application/json"
+        return r
+    return get, calls
+
+
+def test_records_with_keys_redacted_and_replays_without_network(monkeypatch, tmp_path):
+    path = str(tmp_path / "c.db")
+    get, calls = fake_get({"temp": 21})
+    monkeypatch.setattr(requests, "get", get)
+
+    cassettes.open(path, "record")
+    assert http_get("weather", "https://api.example/w", {"q": "Lisbon", "appid": "s3cret"}).json() == {"temp": 21}
+    cassettes.close()
+    stored = sqlite3.connect(path).execute("SELECT request FROM interactions").fetchone()[0]
+    assert "s3cret" not in stored and "REDACTED" in stored
+
+    cassettes.open(path, "replay")
+    monkeypatch.setattr(settings, "CASSETTE_REPLAY_LATENCY", False)
+    # A different key still matches: credentials are not part of the match.
+    r = http_get("weather", "https://api.example/w", {"q": "Lisbon", "appid": "other"})
+    assert r.status_code == 200 and r.json() == {"temp": 21}
+    assert len(calls) == 1
+
+
+def test_replay_keeps_or_drops_recorded_latency(monkeypatch, tmp_path):
+    path = str(tmp_path / "c.db")
+    get, _ = fake_get({}, delay=0.2)
+    monkeypatch.setattr(requests, "get", get)
+    cassettes.open(path, "record")
+    http_get("weather", "https://api.example/w", {"q": "Rome"})
+
+    cassettes.open(path, "replay")
+    monkeypatch.setattr(settings, "CASSETTE_REPLAY_LATENCY", True)
+    t0 = time.perf_counter()
+    http_get("weather", "https://api.example/w", {"q": "Rome"})
+    assert time.perf_counter() - t0 >= 0.2
+
+    monkeypatch.setattr(settings, "CASSETTE_REPLAY_LATENCY", False)
+    t0 = time.perf_counter()
+    http_get("weather", "https://api.example/w", {"q": "Rome"})
+    assert time.perf_counter() - t0 < 0.1
+
+
+def test_unrecorded_request_misses_unless_loose(monkeypatch, tmp_path):
+    path = str(tmp_path / "c.db")
+    get, _ = fake_get({"temp": 9})
+    monkeypatch.setattr(requests, "get", get)
+    cassettes.open(path, "record")
+    http_get("weather", "https://api.example/w", {"q": "Oslo"})
+
+    cassettes.open(path, "replay")
+    monkeypatch.setattr(settings, "CASSETTE_REPLAY_LATENCY", False)
+    monkeypatch.setattr(settings, "CASSETTE_REPLAY_LOOSE", False)
+    with pytest.raises(CassetteMissError):
+        http_get("weather", "https://api.example/w", {"q": "Bergen"})
+    monkeypatch.setattr(settings, "CASSETTE_REPLAY_LOOSE", True)
+    assert http_get("weather", "https://api.example/w", {"q": "Bergen"}).json() == {"temp": 9}
+    with pytest.raises(CassetteMissError):
+        http_get("weather", "https://api.example/other", {"q": "Bergen"})
+    assert resilience.get_provider("weather").breaker.state == resilience.CircuitBreaker.CLOSED
+
+
+def test_llm_calls_replay_in_recorded_order(monkeypatch, tmp_path):
+    path = str(tmp_path / "c.db")
+    agent = ResearchAgent(api_key="k", google_api_key="", google_cse_id="")
+    cassettes.open(path, "record")
+    for text in ('["a"]', '["b"]'):
+        agent.model_instance = CountingModel(text)
+        agent._generate("same prompt")
+
+    cassettes.open(path, "replay")
+    monkeypatch.setattr(settings, "CASSETTE_REPLAY_LATENCY", False)
+    model = CountingModel("live")
+    agent.model_instance = model
+    assert [agent._generate("same prompt").text for _ in range(3)] == ['["a"]', '["b"]', '["a"]']
+    assert model.calls == 0
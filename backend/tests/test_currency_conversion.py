@@ -0,0 +1,55 @@
+from app.integrations import currency
+from app.integrations.currency import convert_plan, rates
+from app.models.trip import TripParameters, TripPlan
+
+
+def make_plan(currency_code: str) -> TripPlan:
+    return TripPlan(
+        parameters=TripParameters(destination="Paris", duration_days=2, currency=currency_code, original_request="Paris"),
+        itinerary=[{"day_number": 1, "morning": {"activity": "Louvre", "estimated_cost": 20}}],
+        budget_info={
+            "total_estimated_cost": 1000,
+            "breakdown": {"accommodation": 400, "food": 300, "flights": "$300"},
+            "flight_options": [{"airline": "BudgetFly", "price": 300, "currency": "USD"}],
+            "alternative_scenarios": [{"title": "Shorter", "new_duration_days": 1, "estimated_cost": 500}],
+        },
+        research_info={"accommodations": [{"name": "Hotel", "estimated_cost": "$150/night"}],
+                       "transport": "Metro passes cost $30 a week"},
+    )
+
+
+def test_convert_plan_rewrites_budget_amounts_only(monkeypatch):
+    calls = []
+
+    def fake_fetch():
+        calls.append(1)
+        return {"USD": 1.0, "EUR": 0.5}
+
+    monkeypatch.setattr(currency, "_fetch_table", fake_fetch)
+    rates.reset()
+
+    plan = convert_plan(make_plan("EUR"), "EUR")
+    convert_plan(make_plan("EUR"), "EUR")
+
+    assert len(calls) == 1
+    b = plan.budget_info
+    assert b["currency"] == "EUR"
+    assert b["total_estimated_cost"] == 500
+    assert b["breakdown"] == {"accommodation": 200, "food": 150, "flights": "150.00 EUR"}
+    assert b["flight_options"][0] == {"airline": "BudgetFly", "price": 150, "currency": "EUR"}
+    assert b["alternative_scenarios"][0]["estimated_cost"] == 250
+    assert b["alternative_scenarios"][0]["new_duration_days"] == 1
+    # Free text and per-activity notes outside budget_info are not rewritten.
+    assert plan.itinerary[0]["morning"]["estimated_cost"] == 20
+    assert plan.research_info == make_plan("EUR").research_info
+
+
+def test_convert_plan_stays_in_usd_without_rates(monkeypatch):
+    monkeypatch.setattr(currency, "_fetch_table", lambda: None)
+    rates.reset()
+    plan = convert_plan(make_plan("JPY"), "JPY")
+    assert plan.budget_info["currency"] == "USD"
+    assert plan.budget_info["total_estimated_cost"] == 1000
+    assert plan.parameters.validation_warnings.count("currency_conversion_unavailable") == 1
+    convert_plan(plan, "JPY")
+    assert plan.parameters.validation_warnings.count("currency_conversion_unavailable") == 1
@@ -0,0 +1,69 @@
+import asyncio
+import time
+from app.agents.orchestrator import TripOrchestrator
+from app.core.deadline import Deadline
+from app.models.trip import TripParameters, TripPreferences
+
+
+class SlowModel:
+    def generate_content(self, prompt: str, **kwargs):
+        time.sleep(3)
+        raise RuntimeError("too slow")
+
+
+def test_generate_degrades_every_stage_within_deadline():
+    orchestrator = TripOrchestrator()
+    orchestrator.research_agent.model_instance = SlowModel()
+    orchestrator.logistics_agent.model_instance = SlowModel()
+    orchestrator.budget_agent.model_instance = SlowModel()
+    params = TripParameters(
+        destination="Tokyo",
+        duration_days=2,
+        travelers=1,
+        original_request="Trip to Tokyo",
+        preferences=TripPreferences(interests=[], budget_range="Moderate", travel_style="relaxed")
+    )
+
+    async def timed():
+        t0 = time.perf_counter()
+        plan = await orchestrator.generate(params, Deadline(1.0))
+        return plan, time.perf_counter() - t0
+
+    # Timed inside the loop: asyncio.run still joins the abandoned worker threads on exit.
+    plan, elapsed = asyncio.run(timed())
+
+    assert elapsed < 2.0
+    assert plan.degraded_stages == ["research", "logistics", "budget"]
+    assert len(plan.itinerary) == 2
+    assert plan.budget_info["total_estimated_cost"] == 120 * 2
+
+
+def test_deadline_header_is_capped():
+    assert Deadline.from_header(10_000_000).remaining() <= 120.0
+    assert Deadline.from_header(500).remaining() <= 0.5
+
+
+def test_degraded_interpret_keeps_warning_order(monkeypatch):
+    from app.agents import orchestrator
+    from app.agents.dream_interpreter import DreamInterpreterAgent
+
+    async def failing(self, description):
+        raise RuntimeError("model unavailable")
+
+    def fallback(self, description):
+        return TripParameters(
+            destination="Tokyo",
+            duration_days=2,
+            original_request=description,
+            validation_warnings=["duration_assumed", "budget_assumed", "interpret_degraded", "travelers_assumed"],
+        )
+
+    monkeypatch.setattr(DreamInterpreterAgent, "process", failing)
+    monkeypatch.setattr(DreamInterpreterAgent, "fallback", fallback)
+    for _ in range(3):
+        params = asyncio.run(orchestrator.interpret_request("Trip to Tokyo", Deadline(5.0)))
+        assert params.validation_warnings == ["duration_assumed", "budget_assumed", "interpret_degraded", "travelers_assumed"]
+
+    monkeypatch.setattr(DreamInterpreterAgent, "fallback", lambda self, d: TripParameters(destination="Tokyo", duration_days=2, original_request=d, validation_warnings=["b", "a"]))
+    params = asyncio.run(orchestrator.interpret_request("Trip to Tokyo", Deadline(5.0)))
+    assert params.validation_warnings == ["b", "a", "interpret_degraded"]
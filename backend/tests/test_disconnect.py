@@ -0,0 +1,85 @@
+import asyncio
+import json
+import threading
+import time
+import pytest
+from app.agents import logistics_agent, research_agent
+from app.core import deadline, metrics, sdk
+from app.core.config import settings
+from app.core.deadline import Deadline
+from app.integrations.resilience import DeadlineExceededError, call
+from app.main import app
+
+
+class SlowModel:
+    def __init__(self):
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def generate_content(self, prompt: str, **kwargs):
+        with self.lock:
+            self.calls += 1
+        time.sleep(0.4)
+        raise RuntimeError("slow")
+
+
+def disconnect_after(body: bytes, seconds: float):
+    """ASGI receive: the request body, then http.disconnect once `seconds` have passed."""
+    at = time.monotonic() + seconds
+    sent = False
+
+    async def receive():
+        nonlocal sent
+        if not sent:
+            sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        # Answer without awaiting once gone: is_disconnected() polls from a cancelled scope.
+        if time.monotonic() < at:
+            await asyncio.sleep(at - time.monotonic())
+        return {"type": "http.disconnect"}
+    return receive
+
+
+def test_client_disconnect_cancels_pipeline(monkeypatch):
+    monkeypatch.setattr(settings, "DISCONNECT_POLL_SECONDS", 0.05)
+    metrics.reset()
+    model = SlowModel()
+    monkeypatch.setattr(sdk, "gemini_model", lambda name, key: model)
+    for module in (logistics_agent, research_agent):
+        monkeypatch.setattr(module, "search_places_text", lambda q: [])
+    body = json.dumps({"destination": "Tokyo", "duration_days": 2, "original_request": "Tokyo"}).encode()
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "POST", "scheme": "http",
+        "path": "/api/v1/trip/generate", "raw_path": b"/api/v1/trip/generate", "root_path": "", "query_string": b"",
+        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+        "client": ("test", 1), "server": ("test", 80),
+    }
+    messages = []
+
+    async def send(message):
+        messages.append(message)
+
+    async def run():
+        t0 = time.perf_counter()
+        # The whole app, middleware included, so nothing on the way hides the disconnect.
+        await app(scope, disconnect_after(body, 0.2), send)
+        return time.perf_counter() - t0
+
+    elapsed = asyncio.run(run())
+    assert elapsed < 1.0
+    assert messages[0]["status"] == 499
+    counters = metrics.snapshot()["counters"]
+    assert counters['requests_cancelled{endpoint="generate"}'] == 1
+    assert counters['stage_cancelled{stage="research"}'] == 1
+    # The research thread's in-flight LLM call finished, but nothing new was started.
+    assert model.calls == 1
+
+
+def test_cancelling_a_deadline_cancels_its_children():
+    parent = Deadline(30)
+    child = parent.child(10)
+    parent.cancel()
+    assert child.cancelled and child.remaining() == 0.0
+    with deadline.scope(child):
+        with pytest.raises(DeadlineExceededError):
+            call("gemini", lambda: "never called")
@@ -0,0 +1,33 @@
+import random
+from concurrent.futures import ThreadPoolExecutor
+from app.integrations.flights import flexible_date_prices, quote
+
+
+def test_quote_is_deterministic_and_leaves_global_rng_alone():
+    random.seed(1234)
+    expected_next = random.random()
+    random.seed(1234)
+    first = quote("London", "Tokyo", "2026-07-10")
+    assert random.random() == expected_next
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(lambda _: quote("London", "Tokyo", "2026-07-10"), range(16)))
+    assert all(r == first for r in results)
+    assert len(first) > 3
+    assert [o["price"] for o in first] == sorted(o["price"] for o in first)
+
+
+def test_pricing_depends_on_route_and_season():
+    short = quote("London", "Paris", "2026-02-10")[0]["price"]
+    long_haul = quote("London", "Sydney", "2026-02-10")[0]["price"]
+    assert long_haul > short
+    assert quote("London", "Tokyo", "2026-08-05")[0]["price"] > quote("London", "Tokyo", "2026-02-04")[0]["price"]
+
+
+def test_flexible_dates_match_single_date_quotes():
+    window = flexible_date_prices("New York", "Bali", "2026-05-20", window_days=3)
+    assert [d["date"] for d in window][0] == "2026-05-17"
+    assert len(window) == 7
+    for entry in window:
+        assert entry["cheapest_price"] == quote("New York", "Bali", entry["date"])[0]["price"]
+    assert sum(d["is_cheapest"] for d in window) >= 1
@@ -0,0 +1,23 @@
+import subprocess
+import sys
+from pathlib import Path
+from app.agents.logistics_agent import LogisticsAgent
+from app.core import sdk
+
+HEAVY = ["google.generativeai", "googleapiclient.discovery", "google.protobuf", "reportlab"]
+
+
+def test_importing_the_app_does_not_load_heavy_sdks():
+    code = f"import sys, app.main; print([m for m in {HEAVY!r} if m in sys.modules])"
+    out = subprocess.run([sys.executable, "-c", code], cwd=Path(__file__).resolve().parent.parent,
+                         capture_output=True, text=True, check=True)
+    assert out.stdout.strip() == "[]"
+
+
+def test_model_is_built_on_first_use(monkeypatch):
+    built = []
+    monkeypatch.setattr(sdk, "gemini_model", lambda name, key: built.append((name, key)) or object())
+    agent = LogisticsAgent(api_key="k")
+    assert built == []
+    assert agent.model_instance is agent.model_instance
+    assert built == [("gemini-1.5-pro", "k")]
@@ -0,0 +1,70 @@
+import io
+import json
+import logging
+import queue
+import pytest
+from fastapi.testclient import TestClient
+from app.core import logs, metrics
+from app.core.config import settings
+from app.main import app
+
+
+@pytest.fixture
+def captured():
+    stream = io.StringIO()
+    logs.setup("INFO", stream)
+
+    def lines():
+        logs.shutdown()
+        return [json.loads(line) for line in stream.getvalue().splitlines()]
+    yield lines
+    logs.setup(settings.LOG_LEVEL)
+
+
+def test_events_are_json_with_request_id_and_fields(captured):
+    log = logs.get_logger("test")
+    with logs.correlated("req-42"):
+        log.warning("thing.failed", provider="x", attempts=2)
+    try:
+        raise ValueError("boom")
+    except ValueError:
+        log.exception("thing.crashed")
+
+    first, second = captured()
+    assert first["event"] == "thing.failed" and first["level"] == "warning"
+    assert first["request_id"] == "req-42" and first["provider"] == "x" and first["attempts"] == 2
+    assert "ValueError: boom" in second["exc"] and "request_id" not in second
+
+
+def test_success_events_are_sampled_per_request(captured, monkeypatch):
+    monkeypatch.setattr(settings, "LOG_SUCCESS_SAMPLE_RATE", 0.0)
+    log = logs.get_logger("test")
+    with logs.correlated("req-1"):
+        log.info("outbound.call")
+        log.info("request.finished", keep=True)
+        log.warning("outbound.failed")
+    assert [line["event"] for line in captured()] == ["request.finished", "outbound.failed"]
+
+    assert logs.sampled("abc", 0.5) == logs.sampled("abc", 0.5)
+    kept = sum(logs.sampled(f"r{i}", 0.25) for i in range(4000))
+    assert 800 < kept < 1200
+
+
+def test_full_queue_drops_instead_of_blocking():
+    metrics.reset()
+    handler = logs.AsyncQueueHandler(queue.Queue(maxsize=1))
+    for _ in range(3):
+        handler.handle(logging.makeLogRecord({"msg": "x", "levelno": logging.WARNING}))
+    assert metrics.snapshot()["counters"]["log_records_dropped"] == 2
+
+
+def test_requests_get_a_correlation_id(captured):
+    client = TestClient(app)
+    echoed = client.get("/", headers={"X-Request-ID": "trace-me"})
+    assert echoed.headers["X-Request-ID"] == "trace-me"
+    fresh = client.get("/", headers={"X-Request-ID": "not safe/../"})
+    assert fresh.headers["X-Request-ID"] != "not safe/../"
+
+    finished = [line for line in captured() if line["event"] == "request.finished"]
+    assert [line["request_id"] for line in finished] == ["trace-me", fresh.headers["X-Request-ID"]]
+    assert finished[0]["status"] == 200 and finished[0]["path"] == "/"
@@ -0,0 +1,67 @@
+import asyncio
+import json
+import re
+import threading
+import time
+from app.agents import logistics_agent
+from app.agents.logistics_agent import LogisticsAgent
+from app.models.trip import TripParameters, TripPreferences
+
+
+class Response:
+    def __init__(self, text: str):
+        self.text = text
+
+
+class ChunkModel:
+    def __init__(self):
+        self.prompts = []
+        self.lock = threading.Lock()
+
+    def generate_content(self, prompt: str, **kwargs):
+        with self.lock:
+            self.prompts.append(prompt)
+        time.sleep(0.3)
+        if "Outline a" in prompt:
+            return Response(json.dumps([
+                {"day_number": d, "theme": f"Theme {d}", "area": "Center", "highlights": [f"Sight {d}"]}
+                for d in range(1, 13)
+            ]))
+        start, end = map(int, re.search(r"days (\d+) to (\d+)", prompt).groups())
+        if start == 6:
+            return Response("not json")
+        return Response(json.dumps([
+            {"day_number": d, "morning": {"activity": f"Sight {d}", "description": "", "location": ""},
+             "afternoon": {"activity": "Walk", "description": "", "location": ""},
+             "evening": {"activity": "Dinner", "description": "", "location": ""}}
+            for d in range(start, end + 1)
+        ]))
+
+
+def test_long_trip_is_generated_in_parallel_chunks(monkeypatch):
+    monkeypatch.setattr(logistics_agent, "search_places_text", lambda q: [])
+    agent = LogisticsAgent(api_key="dummy")
+    agent.model_instance = ChunkModel()
+    params = TripParameters(
+        destination="Tokyo",
+        duration_days=12,
+        original_request="12 days in Tokyo",
+        preferences=TripPreferences(interests=["food"], budget_range="Moderate", travel_style="relaxed")
+    )
+
+    t0 = time.perf_counter()
+    itinerary = asyncio.run(agent.process(params, {}))
+    elapsed = time.perf_counter() - t0
+
+    # One outline call plus three concurrent chunks, not four sequential calls.
+    assert elapsed < 1.1
+    assert [d["day_number"] for d in itinerary] == list(range(1, 13))
+    assert itinerary[0]["morning"]["activity"] == "Sight 1"
+    assert itinerary[0]["theme"] == "Theme 1"
+    # The failed middle chunk falls back day by day instead of sinking the whole trip.
+    assert itinerary[6]["morning"]["location"] == "City Center"
+    assert itinerary[11]["morning"]["activity"] == "Sight 12"
+
+    chunk_prompt = next(p for p in agent.model_instance.prompts if "days 1 to 5" in p)
+    covered = chunk_prompt.split("Already Covered On Other Days")[1]
+    assert "Sight 7" in covered and "Sight 2" not in covered
@@ -0,0 +1,65 @@
+from app.agents.logistics_agent import LogisticsAgent
+from app.core import metrics, sdk
+from app.core.config import settings
+from app.core.model_router import model_router
+
+
+class Response:
+    def __init__(self, text: str):
+        self.text = text
+
+
+class TimingOutModel:
+    def generate_content(self, prompt: str, **kwargs):
+        raise TimeoutError("deadline exceeded")
+
+
+class NamedModel:
+    def __init__(self, name: str):
+        self.name = name
+
+    def generate_content(self, prompt: str, **kwargs):
+        return Response(self.name)
+
+
+def test_tasks_route_to_their_configured_tier():
+    assert model_router.select("interpret") == "gemini-1.5-flash-8b"
+    assert model_router.select("itinerary") == "gemini-1.5-pro"
+    assert model_router.select("unknown task") == "gemini-1.5-flash"
+
+
+def test_slow_tier_falls_back_to_faster_one_until_samples_age_out(monkeypatch):
+    metrics.reset()
+    for _ in range(settings.MODEL_ROUTING_MIN_SAMPLES):
+        model_router.record("gemini-1.5-pro", 25.0, True)
+    for _ in range(3):
+        assert model_router.select("itinerary") == "gemini-1.5-flash"
+    # Counted once per move onto the fallback, not per call routed there.
+    assert metrics.snapshot()["counters"]['model_tier_fallback{task="itinerary",tier="large",to="medium"}'] == 1
+
+    for _ in range(settings.MODEL_ROUTING_MIN_SAMPLES):
+        model_router.record("gemini-1.5-flash", 1.0, False)
+    # The fastest tier is always allowed, whatever its stats.
+    assert model_router.select("itinerary") == "gemini-1.5-flash-8b"
+
+    monkeypatch.setattr(settings, "MODEL_ROUTING_WINDOW_SECONDS", 0.0)
+    assert model_router.select("itinerary") == "gemini-1.5-pro"
+
+
+def test_agent_calls_use_the_routed_model_and_report_latency(monkeypatch):
+    monkeypatch.setattr(sdk, "gemini_model", lambda name, key: NamedModel(name))
+    agent = LogisticsAgent(api_key="k")
+    assert agent._generate("plan").text == "gemini-1.5-pro"
+    assert agent._generate("outline", task="itinerary_outline").text == "gemini-1.5-flash"
+    assert model_router.states()["models"]["gemini-1.5-pro"]["samples"] == 1
+
+
+def test_agent_retry_is_routed_to_a_faster_tier(monkeypatch):
+    monkeypatch.setattr(settings, "MODEL_ROUTING_MIN_SAMPLES", 1)
+    monkeypatch.setattr(settings, "OUTBOUND_BACKOFF_BASE_SECONDS", 0.0)
+    monkeypatch.setattr(sdk, "gemini_model", lambda name, key: TimingOutModel() if name == "gemini-1.5-pro" else NamedModel(name))
+    agent = LogisticsAgent(api_key="k")
+
+    assert agent._generate("plan").text == "gemini-1.5-flash"
+    models = model_router.states()["models"]
+    assert models["gemini-1.5-pro"]["error_rate"] == 1.0 and models["gemini-1.5-flash"]["samples"] == 1
@@ -0,0 +1,53 @@
+import pytest
+from fastapi.testclient import TestClient
+from app.api import endpoints_trip
+from app.core.plan_store import PlanStore
+from app.main import app
+from app.models.trip import TripPlan, TripParameters
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    s = PlanStore(str(tmp_path / "plans.db"))
+    monkeypatch.setattr(endpoints_trip, "plan_store", s)
+    yield s
+    s.close()
+
+
+def make_plan(days: int = 1) -> TripPlan:
+    return TripPlan(
+        parameters=TripParameters(destination="Tokyo", duration_days=days, original_request="Tokyo"),
+        itinerary=[{"day_number": n, "morning": {"activity": "Shrine " * 50, "description": "", "location": ""}} for n in range(1, days + 1)],
+        status="generated",
+    )
+
+
+def test_plan_ids_are_content_addressed(store):
+    a, b = make_plan(), make_plan()
+    assert store.save(a) == store.save(b)
+    assert store.save(make_plan(days=2)) != a.plan_id
+    assert store.get(a.plan_id).itinerary == a.itinerary
+
+
+def test_get_plan_supports_etag_and_compression(store):
+    client = TestClient(app)
+    plan_id = store.save(make_plan(days=5))
+
+    resp = client.get(f"/api/v1/trip/plans/{plan_id}", headers={"Accept-Encoding": "gzip"})
+    assert resp.status_code == 200
+    assert resp.headers["content-encoding"] == "gzip"
+    assert resp.json()["plan_id"] == plan_id
+    etag = resp.headers["etag"]
+
+    resp = client.get(f"/api/v1/trip/plans/{plan_id}", headers={"If-None-Match": etag})
+    assert resp.status_code == 304
+    assert client.get("/api/v1/trip/plans/missing").status_code == 404
+
+
+def test_export_pdf_by_plan_id(store):
+    client = TestClient(app)
+    plan_id = store.save(make_plan())
+    resp = client.post(f"/api/v1/trip/export/pdf?plan_id={plan_id}")
+    assert resp.status_code == 200
+    assert resp.headers.get("content-type") == "application/pdf"
+    assert client.post("/api/v1/trip/export/pdf?plan_id=missing").status_code == 404
@@ -0,0 +1,71 @@
+import json
+import requests
+from app.core.config import settings
+from app.integrations import external
+from app.integrations.poi import geohash, places
+
+
+def place(name, lat, lng, rating, types, pid=None):
+    return {"name": name, "place_id": pid or name, "formatted_address": f"{name}, Paris", "rating": rating,
+            "types": types, "geometry": {"location": {"lat": lat, "lng": lng}}}
+
+
+MUSEUMS = [
+    place("Louvre Museum", 48.8606, 2.3376, 4.7, ["museum", "tourist_attraction"]),
+    place("Musée d'Orsay", 48.8600, 2.3266, 4.8, ["museum"]),
+    place("Centre Pompidou", 48.8607, 2.3522, 4.5, ["museum", "point_of_interest"]),
+]
+
+
+def test_geohash_matches_reference_value():
+    assert geohash(57.64911, 10.40744, 11) == "u4pruydqqvj"
+
+
+def test_answers_nearby_matches_and_exact_names_locally():
+    places.add("museums in Paris", MUSEUMS + [place("Louvre Museum", 33.66, -95.55, 3.9, ["museum"], pid="texas")])
+
+    found = places.lookup("museum in paris")
+    assert [p["name"] for p in found] == ["Musée d'Orsay", "Louvre Museum", "Centre Pompidou"]
+    # The Texas namesake is outside the area, so the exact lookup is unambiguous.
+    assert [p["lat"] for p in places.lookup("Louvre Museum in Paris")] == [48.8606]
+    # Nothing local matches, so Places has to be asked.
+    assert places.lookup("nightlife in Paris") is None
+    assert places.lookup("museums in Lyon") is None
+
+
+def test_query_words_become_tags():
+    places.add("art in Paris", MUSEUMS)
+    assert len(places.lookup("art in Paris")) == 3
+
+
+def test_search_places_text_only_calls_places_when_coverage_is_thin(monkeypatch):
+    monkeypatch.setattr(settings, "GOOGLE_PLACES_API_KEY", "k")
+    calls = []
+
+    def get(url, params=None, timeout=None):
+        calls.append(params["query"])
+        r = requests.Response()
+        r.status_code = 200
+        r._content = json.dumps({"results": MUSEUMS}).encode()
+        return r
+    monkeypatch.setattr(requests, "get", get)
+
+    assert len(external.search_places_text("museums in Paris")) == 3
+    assert external.search_places_text("Centre Pompidou in Paris")[0]["lng"] == 2.3522
+    assert len(external.search_places_text("museum in paris")) == 3
+    assert calls == ["museums in Paris"]
+    external.search_places_text("cafes in Paris")
+    assert calls == ["museums in Paris", "cafes in Paris"]
+
+
+def test_area_lookup_searches_the_geohash_index():
+    places.add("museums in Paris", MUSEUMS)
+    conn = places._connect()
+    statements = []
+    conn.set_trace_callback(statements.append)
+    places.lookup("museum in Paris")
+    conn.set_trace_callback(None)
+
+    area_query = next(sql for sql in statements if "geohash >=" in sql)
+    plan = " ".join(row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + area_query))
+    assert "USING INDEX places_geohash" in plan and "SCAN places" not in plan
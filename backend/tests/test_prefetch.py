@@ -0,0 +1,74 @@
+import json
+from fastapi.testclient import TestClient
+from app.agents import dream_interpreter, logistics_agent, research_agent
+from app.agents.prefetch import research_prefetch
+from app.agents.research_agent import ResearchAgent
+from app.core import metrics, sdk
+from app.core.cache import cache
+from app.main import app
+from app.models.trip import TripParameters
+
+
+class Response:
+    def __init__(self, text: str):
+        self.text = text
+
+
+class CountingModel:
+    def __init__(self):
+        self.synthesis_calls = 0
+
+    def generate_content(self, prompt: str, **kwargs):
+        if "search queries" in prompt:
+            return Response(json.dumps(["things to do"]))
+        if "Synthesize" in prompt:
+            self.synthesis_calls += 1
+            return Response(json.dumps({"activities": [{"name": "Tram 28", "description": "", "estimated_cost": "$3"}],
+                                        "accommodations": [], "dining": []}))
+        raise RuntimeError("use the heuristic path")
+
+
+def setup(monkeypatch) -> CountingModel:
+    model = CountingModel()
+    monkeypatch.setattr(sdk, "gemini_model", lambda name, key: model)
+    monkeypatch.setattr(research_prefetch, "_agent", None)
+    for module in (dream_interpreter, logistics_agent, research_agent):
+        monkeypatch.setattr(module, "search_places_text", lambda q: [])
+    metrics.reset()
+    return model
+
+
+def test_interpret_prefetches_research_that_generate_reuses(monkeypatch):
+    model = setup(monkeypatch)
+    client = TestClient(app)
+
+    params = client.post("/api/v1/trip/interpret", json={"description": "5 day trip to Lisbon"}).json()
+    assert cache.get("research", ResearchAgent.cache_key(TripParameters(**params))) is not None
+    assert metrics.snapshot()["counters"]['research_prefetch{outcome="started"}'] == 1
+
+    plan = client.post("/api/v1/trip/generate", json=params).json()
+    assert model.synthesis_calls == 1
+    assert plan["research_info"]["activities"][0]["name"] == "Tram 28"
+    assert "research" not in plan["degraded_stages"]
+
+
+def test_prefetch_can_be_turned_off_per_request(monkeypatch):
+    model = setup(monkeypatch)
+    resp = TestClient(app).post("/api/v1/trip/interpret", json={"description": "5 day trip to Lisbon", "prefetch_research": False})
+    assert resp.status_code == 200
+    assert model.synthesis_calls == 0
+
+
+def test_prefetch_is_not_used_after_the_budget_is_edited(monkeypatch):
+    model = setup(monkeypatch)
+    client = TestClient(app)
+
+    params = client.post("/api/v1/trip/interpret", json={"description": "5 day trip to Lisbon"}).json()
+    assert model.synthesis_calls == 1
+    # The user picks another tier on the clarification screen before generating.
+    params["preferences"]["budget_range"] = "Luxury"
+    client.post("/api/v1/trip/generate", json=params)
+
+    assert model.synthesis_calls == 2
+    assert 'research_prefetch{outcome="joined"}' not in metrics.snapshot()["counters"]
+    assert cache.get("research", ResearchAgent.cache_key(TripParameters(**params))) is not None
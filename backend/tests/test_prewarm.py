@@ -0,0 +1,82 @@
+import asyncio
+import json
+from app.agents import research_agent
+from app.agents.research_agent import ResearchAgent
+from app.cli import prewarm
+from app.core import sdk
+from app.models.trip import TripParameters, TripPreferences
+
+
+class Response:
+    def __init__(self, text: str):
+        self.text = text
+
+
+class ResearchModel:
+    def __init__(self):
+        self.calls = 0
+
+    def generate_content(self, prompt: str, **kwargs):
+        self.calls += 1
+        if "search queries" in prompt:
+            return Response(json.dumps(["things to do"]))
+        return Response(json.dumps({"activities": [{"name": "Temple", "description": "", "estimated_cost": "$10"}],
+                                    "accommodations": [], "dining": []}))
+
+
+def test_prewarm_fills_cache_resumes_and_warms_workers(tmp_path, monkeypatch, capsys):
+    model = ResearchModel()
+    monkeypatch.setattr(sdk, "gemini_model", lambda name, key: model)
+    monkeypatch.setattr(research_agent, "search_places_text", lambda q: [{"name": q, "lat": 1.0, "lng": 2.0}])
+    destinations = tmp_path / "destinations.txt"
+    destinations.write_text("Kyoto\nLisbon\n")
+    args = ["--destinations", str(destinations), "--interests", "food,culture", "--interests", "nightlife",
+            "--cache", str(tmp_path / "cache.db"), "--checkpoint", str(tmp_path / "checkpoint.jsonl")]
+
+    assert prewarm.main(args) == 0
+    assert '"ok": 4' in capsys.readouterr().out
+    assert model.calls == 8
+
+    # A rerun resumes from the checkpoint and does no work.
+    assert prewarm.main(args) == 0
+    assert '"skipped": 4' in capsys.readouterr().out
+    assert model.calls == 8
+
+    # A worker on the same cache answers from it, whatever the interest order.
+    prewarm.cache.open(str(tmp_path / "cache.db"))
+    agent = ResearchAgent(api_key="k", google_api_key="", google_cse_id="")
+    params = TripParameters(destination="Kyoto", duration_days=2, original_request="Kyoto",
+                            preferences=TripPreferences(interests=["culture", "food"], budget_range="moderate",
+                                                        travel_style="Balanced"))
+    findings = asyncio.run(agent.process(params))
+    assert model.calls == 8
+    assert findings["activities"][0]["name"] == "Temple"
+    assert [p["name"] for p in findings["top_places"]] == ["food in Kyoto", "culture in Kyoto"]
+    assert findings["weather"]["status"] == "ok"
+
+
+def test_budget_tiers_do_not_share_research(tmp_path, monkeypatch, capsys):
+    model = ResearchModel()
+    monkeypatch.setattr(sdk, "gemini_model", lambda name, key: model)
+    monkeypatch.setattr(research_agent, "search_places_text", lambda q: [])
+    agent = ResearchAgent(api_key="k", google_api_key="", google_cse_id="")
+
+    def params(budget_range, travel_style):
+        return TripParameters(destination="Lima", duration_days=4, original_request="Lima",
+                              preferences=TripPreferences(interests=["food"], budget_range=budget_range,
+                                                          travel_style=travel_style))
+
+    agent.destination_findings(params("Budget", "backpacker"))
+    agent.destination_findings(params("Luxury", "luxury"))
+    assert model.calls == 4
+    # Same tier, differently cased and a different length: served from the cache.
+    agent.destination_findings(params("luxury ", "Luxury"))
+    assert model.calls == 4
+
+    destinations = tmp_path / "destinations.txt"
+    destinations.write_text("Lima\n")
+    args = ["--destinations", str(destinations), "--interests", "food", "--budget-range", "Budget",
+            "--budget-range", "Luxury", "--travel-style", "backpacker",
+            "--cache", str(tmp_path / "cache.db"), "--checkpoint", str(tmp_path / "checkpoint.jsonl")]
+    assert prewarm.main(args) == 0
+    assert '"ok": 2' in capsys.readouterr().out
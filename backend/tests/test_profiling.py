@@ -0,0 +1,43 @@
+import time
+from fastapi.testclient import TestClient
+from app.agents import dream_interpreter, logistics_agent, research_agent
+from app.core import sdk
+from app.core.config import settings
+from app.main import app
+
+
+class SleepyModel:
+    def generate_content(self, prompt: str, **kwargs):
+        time.sleep(0.05)
+        raise RuntimeError("offline")
+
+
+PARAMS = {"destination": "Tokyo", "duration_days": 1, "original_request": "Tokyo"}
+
+
+def test_admin_header_profiles_request_to_folded_stacks(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "ADMIN_TOKEN", "secret")
+    monkeypatch.setattr(settings, "PROFILE_DIR", str(tmp_path))
+    monkeypatch.setattr(sdk, "gemini_model", lambda name, key: SleepyModel())
+    for module in (dream_interpreter, logistics_agent, research_agent):
+        monkeypatch.setattr(module, "search_places_text", lambda q: [])
+
+    with TestClient(app) as client:
+        resp = client.post("/api/v1/trip/generate", json=PARAMS,
+                           headers={"X-Profile-Token": "secret", "X-Request-ID": "req-1"})
+        assert resp.status_code == 200
+        assert resp.headers["x-profile-id"] == "req-1"
+
+        assert client.get("/api/v1/admin/profiles").status_code == 403
+        listed = client.get("/api/v1/admin/profiles", headers={"X-Admin-Token": "secret"}).json()["profiles"]
+        assert [p["request_id"] for p in listed] == ["req-1"]
+        assert listed[0]["path"] == "/api/v1/trip/generate"
+
+        folded = client.get("/api/v1/admin/profiles/req-1", headers={"X-Admin-Token": "secret"}).text
+        lines = folded.splitlines()
+        assert all(line.rsplit(" ", 1)[1].isdigit() for line in lines)
+        # Worker-thread time lands in the model call, async time in the awaiting stage.
+        assert any(line.startswith("thread ") and "SleepyModel.generate_content" in line for line in lines)
+        assert any(line.startswith("request;") and "run_stage" in line for line in lines)
+
+        assert "x-profile-id" not in client.post("/api/v1/trip/generate", json=PARAMS).headers
@@ -0,0 +1,150 @@
+import json
+import re
+import pytest
+from fastapi.testclient import TestClient
+from app.agents import logistics_agent
+from app.api import endpoints_trip
+from app.integrations import currency
+from app.core.plan_store import PlanStore
+from app.main import app
+from app.models.trip import TripParameters, TripPlan, TripPreferences
+
+
+class Response:
+    def __init__(self, text: str):
+        self.text = text
+
+
+class DayModel:
+    def __init__(self):
+        self.prompts = []
+
+    def generate_content(self, prompt: str, **kwargs):
+        self.prompts.append(prompt)
+        start, end = map(int, re.search(r"days (\d+) to (\d+)", prompt).groups())
+        return Response(json.dumps([
+            {"day_number": d, "morning": {"activity": f"New sight {d}", "description": "", "location": ""},
+             "afternoon": {"activity": "Walk", "description": "", "location": ""},
+             "evening": {"activity": "Dinner", "description": "", "location": ""}}
+            for d in range(start, end + 1)
+        ]))
+
+
+@pytest.fixture
+def setup(tmp_path, monkeypatch):
+    store = PlanStore(str(tmp_path / "plans.db"))
+    monkeypatch.setattr(endpoints_trip, "plan_store", store)
+    monkeypatch.setattr(logistics_agent, "search_places_text", lambda q: [])
+    model = DayModel()
+    build = endpoints_trip.TripOrchestrator
+
+    def orchestrator():
+        o = build()
+        for agent in (o.research_agent, o.logistics_agent, o.budget_agent):
+            agent.model_instance = model
+        return o
+
+    monkeypatch.setattr(endpoints_trip, "TripOrchestrator", orchestrator)
+    yield store, model
+    store.close()
+
+
+def make_plan() -> TripPlan:
+    day = lambda n: {"day_number": n, "morning": {"activity": f"Sight {n}", "description": "", "location": ""},
+                     "afternoon": {"activity": "Museum", "description": "", "location": ""},
+                     "evening": {"activity": "Dinner", "description": "", "location": ""}}
+    return TripPlan(
+        parameters=TripParameters(destination="Tokyo", duration_days=3, original_request="Tokyo",
+                                  preferences=TripPreferences(interests=["food"], budget_range="Moderate")),
+        itinerary=[day(n) for n in range(1, 4)],
+        budget_info={"total_estimated_cost": 900, "currency": "USD",
+                     "breakdown": {"accommodation": 360, "food": 270, "activities": 135, "transport": 135}},
+        research_info={"summary": "Tokyo"},
+        status="generated",
+    )
+
+
+def test_extending_a_trip_generates_only_the_new_days(setup):
+    store, model = setup
+    plan_id = store.save(make_plan())
+
+    resp = TestClient(app).patch(f"/api/v1/trip/plans/{plan_id}", json={"duration_days": 5})
+    assert resp.status_code == 200
+    body = resp.json()
+
+    assert len(model.prompts) == 1
+    assert "days 4 to 5" in model.prompts[0] and "Sight 1" in model.prompts[0]
+    days = body["plan"]["itinerary"]
+    assert [d["morning"]["activity"] for d in days] == ["Sight 1", "Sight 2", "Sight 3", "New sight 4", "New sight 5"]
+    assert body["plan"]["budget_info"]["total_estimated_cost"] == 1500
+    assert body["regenerated"] == ["itinerary_days:4-5", "weather", "budget_rescaled"]
+    assert body["plan"]["plan_id"] != plan_id
+    ops = {op["path"]: op["op"] for op in body["diff"]}
+    assert ops["/parameters/duration_days"] == "replace"
+    assert ops["/itinerary/3"] == ops["/itinerary/4"] == "add"
+    assert not any(path.startswith(("/itinerary/0", "/itinerary/1", "/itinerary/2")) and "weather" not in path for path in ops)
+
+
+def test_travelers_change_rescales_budget_without_llm_calls(setup):
+    store, model = setup
+    plan_id = store.save(make_plan())
+
+    body = TestClient(app).patch(f"/api/v1/trip/plans/{plan_id}", json={"travelers": 2, "duration_days": 3}).json()
+
+    assert model.prompts == []
+    assert body["regenerated"] == ["budget_rescaled"]
+    assert body["plan"]["budget_info"]["breakdown"]["food"] == 540
+    assert body["diff"] == [
+        {"op": "replace", "path": "/parameters/travelers", "value": 2},
+        {"op": "replace", "path": "/budget_info/total_estimated_cost", "value": 1800.0},
+        {"op": "replace", "path": "/budget_info/breakdown/accommodation", "value": 720.0},
+        {"op": "replace", "path": "/budget_info/breakdown/food", "value": 540.0},
+        {"op": "replace", "path": "/budget_info/breakdown/activities", "value": 270.0},
+        {"op": "replace", "path": "/budget_info/breakdown/transport", "value": 270.0},
+    ]
+
+
+def test_refining_a_missing_plan_is_404(setup):
+    assert TestClient(app).patch("/api/v1/trip/plans/missing", json={"travelers": 2}).status_code == 404
+
+
+def test_invalid_or_null_fields_do_not_reach_the_pipeline(setup):
+    store, model = setup
+    plan_id = store.save(make_plan())
+    client = TestClient(app)
+
+    assert client.patch(f"/api/v1/trip/plans/{plan_id}", json={"duration_days": 0}).status_code == 422
+    assert client.patch(f"/api/v1/trip/plans/{plan_id}", json={"travelers": -1}).status_code == 422
+    resp = client.patch(f"/api/v1/trip/plans/{plan_id}", json={"duration_days": None, "travelers": None})
+    assert resp.status_code == 200
+    assert resp.json()["plan"]["parameters"]["duration_days"] == 3
+    assert model.prompts == []
+
+
+def test_plan_left_in_usd_is_not_reconverted(setup, monkeypatch):
+    store, _ = setup
+    monkeypatch.setattr(currency.rates, "rate", lambda code: {"USD": 1.0, "EUR": 0.5}.get(code))
+    plan = make_plan()
+    # Conversion was unavailable when this plan was generated, so its amounts are still USD.
+    plan.parameters.currency = "EUR"
+    plan_id = store.save(plan)
+
+    body = TestClient(app).patch(f"/api/v1/trip/plans/{plan_id}", json={"travelers": 2}).json()
+
+    assert body["plan"]["budget_info"]["currency"] == "EUR"
+    assert body["plan"]["budget_info"]["total_estimated_cost"] == 900
+
+
+def test_rescale_replaces_the_date_shift_hint_and_keeps_other_suggestions():
+    from app.agents.budget_agent import BudgetAgent
+
+    agent = BudgetAgent(api_key="dummy")
+    old = TripParameters(destination="Lisbon", origin="New York", start_date="2026-05-01", duration_days=3, original_request="Lisbon")
+    info = agent.fallback(old)
+    info["suggestions"].append("Flights are cheapest around the shoulder season")
+    assert info["flexible_dates_suggestion"].startswith("Flights are cheapest around 2026-")
+
+    same_fare = agent.rescale(info, old, old.model_copy(update={"start_date": "2026-05-05"}))
+    assert "flexible_dates_suggestion" not in same_fare
+    assert same_fare["suggestions"] == info["suggestions"]
+    assert [d["date"] for d in same_fare["flexible_dates"]][3] == "2026-05-05"
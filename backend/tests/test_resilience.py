@@ -0,0 +1,79 @@
+import threading
+import time
+import pytest
+from app.core.config import settings
+from app.core import metrics
+from app.integrations import resilience
+from app.integrations.resilience import CircuitBreaker, CircuitOpenError, RetryableStatusError, call
+
+
+@pytest.fixture(autouse=True)
+def fast_backoff(monkeypatch):
+    monkeypatch.setattr(settings, "OUTBOUND_BACKOFF_BASE_SECONDS", 0.0)
+    monkeypatch.setattr(settings, "OUTBOUND_MAX_RETRIES", 2)
+    monkeypatch.setattr(settings, "BREAKER_FAILURE_THRESHOLD", 2)
+
+
+def test_retries_transient_errors_then_succeeds():
+    attempts = []
+
+    def flaky():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise RetryableStatusError("test_flaky", 503)
+        return "ok"
+
+    assert call("test_flaky", flaky) == "ok"
+    assert len(attempts) == 3
+
+
+def test_non_retryable_error_is_raised_immediately():
+    attempts = []
+
+    def bad_request():
+        attempts.append(1)
+        raise ValueError("bad payload")
+
+    with pytest.raises(ValueError):
+        call("test_bad", bad_request)
+    assert len(attempts) == 1
+    assert resilience.get_provider("test_bad").breaker.state == CircuitBreaker.CLOSED
+
+
+def test_breaker_opens_and_fails_fast():
+    attempts = []
+
+    def down():
+        attempts.append(1)
+        raise ConnectionError("refused")
+
+    for _ in range(2):
+        with pytest.raises(ConnectionError):
+            call("test_down", down)
+    assert len(attempts) == 6
+
+    with pytest.raises(CircuitOpenError):
+        call("test_down", down)
+    assert len(attempts) == 6
+    assert metrics.snapshot()["circuit_breakers"]["test_down"]["state"] == "open"
+
+
+def test_provider_concurrency_limit(monkeypatch):
+    monkeypatch.setattr(settings, "PROVIDER_MAX_CONCURRENCY", {"slow": 2})
+    active, peak = [0], [0]
+    lock = threading.Lock()
+
+    def work():
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        time.sleep(0.05)
+        with lock:
+            active[0] -= 1
+
+    threads = [threading.Thread(target=call, args=("slow", work)) for _ in range(6)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert peak[0] == 2
@@ -0,0 +1,77 @@
+import json
+from app.agents.research_agent import ResearchAgent
+from app.agents.search_results import canonical_url, merge_queries, select_results
+from app.core import metrics
+from app.models.trip import TripParameters, TripPreferences
+
+
+def result(link, title, snippet):
+    return {"title": title, "link": link, "snippet": snippet}
+
+
+def test_merges_near_duplicate_queries_keeping_order():
+    queries = ["things to do in Kyoto", "best things to do in Kyoto", "Kyoto ramen restaurants",
+               "top things to do Kyoto", "Kyoto temples guide"]
+    assert merge_queries(queries, 0.6) == ["things to do in Kyoto", "Kyoto ramen restaurants", "Kyoto temples guide"]
+
+
+def test_canonical_url_ignores_tracking_and_cosmetic_differences():
+    assert canonical_url("https://www.Example.com/a/?utm_source=x&b=2&a=1#top") == "example.com/a?a=1&b=2"
+    assert canonical_url("http://example.com/a?a=1&b=2") == "example.com/a?a=1&b=2"
+    assert canonical_url(None) is None
+
+
+def test_drops_duplicates_and_keeps_top_k_by_relevance():
+    results = [
+        {"query": "things to do in Kyoto", "organic_results": [
+            result("https://www.kyoto.travel/fushimi-inari/", "Fushimi Inari",
+                   "The Fushimi Inari shrine is famous for its thousands of vermilion torii gates on the mountain"),
+            result("https://shop.example/kyoto-souvenirs", "Souvenir shopping", "Where to buy souvenirs and gifts"),
+        ]},
+        {"query": "Kyoto temples guide", "organic_results": [
+            result("https://kyoto.travel/fushimi-inari?utm_source=cse", "Fushimi Inari", "Same page, other query"),
+            result("https://blog.example/inari", "Inari visit",
+                   "Fushimi Inari shrine is famous for its thousands of vermilion torii gates on the mountain trail"),
+            result("https://temples.example/kinkakuji", "Kinkaku-ji temple", "The golden pavilion temple and its garden"),
+        ]},
+        {"query": "Kyoto ramen", "organic_results": [
+            result("https://food.example/ramen", "Kyoto ramen", "Ramen shops and food stalls near the station"),
+        ]},
+    ]
+    selected = select_results(results, ["temples", "food"], top_k=3, snippet_similarity=0.8)
+    titles = [r["title"] for g in selected for r in g["organic_results"]]
+    assert len(titles) == 3
+    assert set(titles) >= {"Kinkaku-ji temple", "Kyoto ramen"}
+    assert "Inari visit" not in titles and "Souvenir shopping" not in titles
+
+
+class RecordingModel:
+    def __init__(self):
+        self.synthesis_prompt = ""
+
+    def generate_content(self, prompt, **kwargs):
+        class Response:
+            text = ""
+        if "search queries" in prompt:
+            Response.text = json.dumps(["things to do in Lima", "best things to do in Lima", "Lima food markets"])
+        else:
+            self.synthesis_prompt = prompt
+            Response.text = json.dumps({"activities": [], "accommodations": [], "dining": []})
+        return Response()
+
+
+def test_research_searches_only_distinct_queries(monkeypatch):
+    metrics.reset()
+    agent = ResearchAgent(api_key="k", google_api_key="", google_cse_id="")
+    agent.model_instance = model = RecordingModel()
+    monkeypatch.setattr("app.agents.research_agent.search_places_text", lambda q: [])
+    searched = []
+    original = agent._execute_searches
+    monkeypatch.setattr(agent, "_execute_searches", lambda qs: searched.extend(qs) or original(qs))
+    params = TripParameters(destination="Lima", duration_days=3, travelers=1, original_request="Lima",
+                            preferences=TripPreferences(interests=["food"], budget_range="Moderate", travel_style="relaxed"))
+
+    agent.destination_findings(params)
+    assert searched == ["things to do in Lima", "Lima food markets"]
+    assert "best things to do" not in model.synthesis_prompt
+    assert metrics.snapshot()["counters"]["research_queries_merged"] == 1
@@ -0,0 +1,72 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from app.core.config import settings
+from app.integrations import weather
+from app.integrations.weather import align_to_itinerary, get_trip_weather, normals
+
+
+def test_far_future_trip_uses_climate_normals_without_network(monkeypatch):
+    monkeypatch.setattr(settings, "OPENWEATHERMAP_API_KEY", "key")
+    monkeypatch.setattr(weather, "get_weather_forecast", lambda city: (_ for _ in ()).throw(AssertionError("network")))
+    start = (date.today() + timedelta(days=60)).isoformat()
+    w = get_trip_weather("Kyoto, Japan", start, 3)
+    assert w["status"] == "ok"
+    assert [d["day_number"] for d in w["daily"]] == [1, 2, 3]
+    assert all(d["source"] == "climate_normals" for d in w["daily"])
+
+
+def test_normals_interpolate_smoothly_across_month_boundary():
+    i = normals().lookup("Tokyo")
+    end_of_jan, _ = normals().for_day(i, date(2026, 1, 31))
+    start_of_feb, _ = normals().for_day(i, date(2026, 2, 1))
+    assert abs(end_of_jan - start_of_feb) < 0.2
+    assert normals().for_day(i, date(2026, 8, 15))[0] > normals().for_day(i, date(2026, 1, 15))[0]
+
+
+def test_forecast_is_cached_per_city_and_aligned_to_days(monkeypatch):
+    monkeypatch.setattr(settings, "OPENWEATHERMAP_API_KEY", "key")
+    calls = []
+    today = date.today()
+
+    def fake_forecast(city):
+        calls.append(city)
+        return {"status": "ok", "daily": [{"date": (today + timedelta(days=n)).isoformat(), "avg_temp_c": 20.0 + n} for n in range(5)]}
+
+    monkeypatch.setattr(weather, "get_weather_forecast", fake_forecast)
+    weather.forecasts.reset()
+    first = get_trip_weather("Paris", today.isoformat(), 7)
+    get_trip_weather("paris", today.isoformat(), 2)
+
+    assert calls == ["Paris"]
+    sources = [d["source"] for d in first["daily"]]
+    assert sources[:5] == ["forecast"] * 5 and sources[5:] == ["climate_normals"] * 2
+
+    itinerary = align_to_itinerary([{"day_number": 1}, {"day_number": 2}], first)
+    assert itinerary[1]["weather"] == {"date": (today + timedelta(days=1)).isoformat(), "avg_temp_c": 21.0, "source": "forecast"}
+    weather.forecasts.reset()
+
+
+def test_unknown_city_without_key_is_unavailable(monkeypatch):
+    monkeypatch.setattr(settings, "OPENWEATHERMAP_API_KEY", "")
+    assert get_trip_weather("Atlantis", None, 3) == {"status": "unavailable"}
+
+
+def test_concurrent_stale_lookups_fetch_once(monkeypatch):
+    monkeypatch.setattr(settings, "OPENWEATHERMAP_API_KEY", "key")
+    calls = []
+    today = date.today()
+
+    def slow_forecast(city):
+        calls.append(city)
+        time.sleep(0.2)
+        return {"status": "ok", "daily": [{"date": today.isoformat(), "avg_temp_c": 18.0}]}
+
+    monkeypatch.setattr(weather, "get_weather_forecast", slow_forecast)
+    weather.forecasts.reset()
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        temps = list(pool.map(lambda _: weather.forecasts.get("Oslo", today), range(8)))
+
+    assert calls == ["Oslo"]
+    assert temps == [18.0] * 8
+    weather.forecasts.reset()